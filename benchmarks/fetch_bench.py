@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark for portfolio.fetch against a local stub API
+Starts a threaded HTTP server that answers Polygon aggregate and
+CoinGecko market_chart requests with synthetic daily bars after a fixed
+latency, and rejects a share of requests with 429 + Retry-After. Then
+refreshes a few hundred symbols into a temporary raw CSV with one worker
+(the notebooks' sequential loop) and with a pool, and refreshes again to
+show that an up-to-date file costs no requests.
+
+Usage (from the project root):
+    python benchmarks/fetch_bench.py
+    python benchmarks/fetch_bench.py --symbols 500 --latency 0.1 --workers 32
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from load_test import ROOT
+
+sys.path.insert(0, ROOT)
+from portfolio import fetch  # noqa: E402
+
+DAY_MS = 86_400_000
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.05
+    reject = 0.05
+    requests = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.requests += 1
+        time.sleep(self.latency)
+        if random.random() < self.reject:
+            return self.send_json(429, {'error': 'rate limited'}, {'Retry-After': '0.2'})
+        url = urllib.parse.urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if parts[:3] == ['v2', 'aggs', 'ticker']:
+            return self.send_json(200, {'results': polygon_bars(parts[3], parts[7], parts[8])})
+        if parts[0] == 'coins' and parts[2:] == ['market_chart']:
+            return self.send_json(200, coingecko_chart(parts[1], int(query['days'])))
+        self.send_json(404, {'error': 'not found'})
+
+
+def _days(start, end):
+    day = datetime.datetime.strptime(start, '%Y-%m-%d')
+    while day <= datetime.datetime.strptime(end, '%Y-%m-%d'):
+        if day.weekday() < 5:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def polygon_bars(ticker, start, end):
+    rng = random.Random(ticker)
+    bars = []
+    for day in _days(start, end):
+        close = 100 + rng.random() * 10
+        ms = int(day.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000) + 4 * 3_600_000
+        bars.append({'t': ms, 'o': close, 'h': close + 1, 'l': close - 1, 'c': close,
+                     'v': rng.randrange(1_000_000, 50_000_000)})
+    return bars
+
+
+def coingecko_chart(coin_id, days):
+    rng = random.Random(coin_id)
+    today = int(time.time() * 1000) // DAY_MS * DAY_MS
+    stamps = [today - i * DAY_MS for i in range(days, -1, -1)]
+    return {'prices': [[t, 1000 + rng.random() * 100] for t in stamps],
+            'total_volumes': [[t, rng.random() * 1e9] for t in stamps],
+            'market_caps': [[t, rng.random() * 1e11] for t in stamps]}
+
+
+def run(name, symbols, url, workers, path):
+    StubHandler.requests = 0
+    t0 = time.perf_counter()
+    series = fetch.SERIES[name]
+    # The stub has no rate limit of its own beyond the injected 429s
+    with fetch.Client(series.provider, base_url=url, rate=1000, workers=workers,
+                      backoff=0.05) as client:
+        results = fetch.refresh(name, symbols, client, path=path)
+    seconds = time.perf_counter() - t0
+    rows = sum(r.rows for r in results)
+    failed = sum(1 for r in results if r.error)
+    return seconds, rows, failed, StubHandler.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--series', choices=sorted(fetch.SERIES), default='stocks')
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per response')
+    parser.add_argument('--reject', type=float, default=0.05, help='share of 429 responses')
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.reject = args.reject
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+
+    print(f"{args.symbols} {args.series} symbols, {args.latency * 1000:.0f} ms latency, "
+          f"{args.reject:.0%} 429s\n")
+    print(f"{'run':<28} {'seconds':>8} {'rows':>9} {'requests':>9} {'failed':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, workers in [('sequential (1 worker)', 1),
+                               (f'pooled ({args.workers} workers)', args.workers)]:
+            path = os.path.join(tmp, f'{workers}.csv')
+            seconds, rows, failed, requests = run(args.series, symbols, url, workers, path)
+            print(f"{label:<28} {seconds:>8.2f} {rows:>9} {requests:>9} {failed:>7}")
+        seconds, rows, failed, requests = run(args.series, symbols, url, args.workers, path)
+        print(f"{'up to date (rerun)':<28} {seconds:>8.2f} {rows:>9} {requests:>9} {failed:>7}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Figure assembly and serialization benchmark: go.* vs portfolio.spec
+Builds the same five-trace line chart (minute dates on x, random walks
+on y, plotly_white, hovertemplates) at several total point counts, once with
+go.Figure/go.Scatter/update_layout and fig.to_json()/fig.to_html(), and
+once as a plain dict with portfolio.spec serialized by portfolio.output's
+writers. Reports build and serialize times and the JSON size, and checks
+that both paths produce the same figure.
+
+Usage (from the project root):
+    python benchmarks/figure_bench.py
+    python benchmarks/figure_bench.py --sizes 10000 100000 --json figures.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from load_test import ROOT
+
+sys.path.insert(0, ROOT)
+from portfolio import output, spec  # noqa: E402
+
+TRACES = 5
+COLORS = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E']
+HOVER = '<b>%{fullData.name}</b><br>Date: %{x|%Y-%m-%d}<br>Value: %{y:.2f}<extra></extra>'
+
+
+def synthetic(points):
+    per_trace = points // TRACES
+    dates = pd.date_range('2000-01-01', periods=per_trace, freq='min')
+    rng = np.random.default_rng(0)
+    return dates, [100 + np.cumsum(rng.normal(size=per_trace)) for _ in range(TRACES)]
+
+
+def build_go(dates, series):
+    fig = go.Figure()
+    for i, values in enumerate(series):
+        fig.add_trace(go.Scatter(x=dates, y=values, mode='lines', name=f'S{i}',
+                                 line=dict(color=COLORS[i], width=2), hovertemplate=HOVER))
+    fig.update_layout(title='Synthetic series', template='plotly_white', height=600,
+                      hovermode='x unified')
+    return fig
+
+
+def build_spec(dates, series):
+    data = []
+    for i, values in enumerate(series):
+        line = spec.template('scatter', mode='lines', line=dict(color=COLORS[i], width=2),
+                             hovertemplate=HOVER)
+        data.append(spec.trace(line, x=dates, y=values, name=f'S{i}'))
+    return spec.figure(data, spec.layout(title='Synthetic series', template='plotly_white',
+                                         height=600, hovermode='x unified'))
+
+
+def timed(function, *args):
+    t0 = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - t0
+
+
+def run(points, out_dir):
+    dates, series = synthetic(points)
+    result = {'points': points}
+
+    fig, result['go_build_s'] = timed(build_go, dates, series)
+    text, result['go_json_s'] = timed(fig.to_json)
+    _, result['go_html_s'] = timed(fig.to_html)
+    result['go_json_mb'] = round(len(text) / 2**20, 2)
+
+    plain_fig, result['spec_build_s'] = timed(build_spec, dates, series)
+    spec_text, result['spec_json_s'] = timed(lambda f: spec.dumps(spec.plain(f)), plain_fig)
+    _, result['spec_html_s'] = timed(output.write_html, plain_fig,
+                                     os.path.join(out_dir, 'standalone.html'))
+    _, result['spec_split_s'] = timed(output.write_split, plain_fig,
+                                      os.path.join(out_dir, 'split.html'), 'plotly.min.js')
+    result['spec_json_mb'] = round(len(spec_text) / 2**20, 2)
+    result['split_json_mb'] = round(
+        os.path.getsize(output.data_path(os.path.join(out_dir, 'split.html'))) / 2**20, 2)
+
+    result['same_figure'] = json.loads(text) == json.loads(spec_text)
+    for key, value in result.items():
+        if key.endswith('_s'):
+            result[key] = round(value, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='total points per figure')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for points in args.sizes:
+            print(f"Running {points:,} points...")
+            results.append(run(points, out_dir))
+
+    print()
+    print(f"{'points':>10}  {'go build':>9}{'to_json':>9}{'to_html':>9}  "
+          f"{'spec build':>11}{'json':>8}{'html':>8}{'split':>8}  {'MB':>6}{'split MB':>9}  same")
+    print("-" * 104)
+    for r in results:
+        print(f"{r['points']:>10,}  {r['go_build_s']:>9}{r['go_json_s']:>9}{r['go_html_s']:>9}  "
+              f"{r['spec_build_s']:>11}{r['spec_json_s']:>8}{r['spec_html_s']:>8}"
+              f"{r['spec_split_s']:>8}  {r['spec_json_mb']:>6}{r['split_json_mb']:>9}  "
+              f"{r['same_figure']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Large-file benchmark for serve.py
+Compares sendfile() streaming with the Python copy loop by downloading a
+generated binary file repeatedly, and reports throughput and server CPU
+time per download.
+
+Usage (from the project root):
+    python benchmarks/large_file_bench.py
+    python benchmarks/large_file_bench.py --size-mb 256 --clients 4 --downloads 5
+"""
+import argparse
+import http.client
+import json
+import os
+import resource
+import threading
+import time
+
+from load_test import ROOT, free_port, start_server, stop_server
+
+MODES = {
+    'copy loop': ['--no-sendfile'],
+    'sendfile': [],
+}
+
+
+def download(port, path, n_downloads, sizes):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    for _ in range(n_downloads):
+        conn.request('GET', path)
+        response = conn.getresponse()
+        received = 0
+        while True:
+            chunk = response.read(1024 * 1024)
+            if not chunk:
+                break
+            received += len(chunk)
+        sizes.append(received)
+    conn.close()
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_mode(extra_args, url_path, clients, n_downloads):
+    port = free_port()
+    cpu_before = children_cpu()
+    proc = start_server(port, extra_args)
+    sizes = []
+    try:
+        threads = [threading.Thread(target=download, args=(port, url_path, n_downloads, sizes))
+                   for _ in range(clients)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+    finally:
+        stop_server(proc)
+    # The server's CPU time is only reported once it has been reaped
+    cpu = children_cpu() - cpu_before
+
+    total_mb = sum(sizes) / 2**20
+    return {
+        'downloads': len(sizes),
+        'seconds': round(elapsed, 3),
+        'mb_per_s': round(total_mb / elapsed, 1),
+        'server_cpu_s': round(cpu, 3),
+        'cpu_ms_per_download': round(cpu / max(len(sizes), 1) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=64, help='size of the generated file')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--downloads', type=int, default=5, help='downloads per client')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    payload = os.path.join(ROOT, 'benchmarks', f'_payload_{args.size_mb}mb.bin')
+    with open(payload, 'wb') as f:
+        for _ in range(args.size_mb):
+            f.write(os.urandom(2**20))
+    url_path = '/' + os.path.relpath(payload, ROOT).replace(os.sep, '/')
+
+    results = {}
+    try:
+        for mode, extra in MODES.items():
+            print(f"Running {mode}...")
+            results[mode] = run_mode(extra, url_path, args.clients, args.downloads)
+    finally:
+        os.remove(payload)
+
+    print()
+    print(f"{'mode':<12}{'downloads':>10}{'MB/s':>10}{'server CPU s':>14}{'CPU ms/dl':>12}")
+    print("-" * 58)
+    for mode, r in results.items():
+        print(f"{mode:<12}{r['downloads']:>10}{r['mb_per_s']:>10}"
+              f"{r['server_cpu_s']:>14}{r['cpu_ms_per_download']:>12}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'size_mb': args.size_mb, 'clients': args.clients,
+                       'downloads_per_client': args.downloads, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
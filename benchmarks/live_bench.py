@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Fan-out benchmark for serve.py's /api/live event stream
+Starts the server with synthetic ticks (--live-ticks), subscribes a
+growing number of clients to one channel and reads every stream from a
+single selector. Reports how many updates reached every client, the
+spread between the first and the last client receiving each update, and
+the server's CPU time per update. Each update is encoded once no matter
+how many clients there are; the last column shows what encoding it per
+client would have added.
+
+Usage (from the project root):
+    python benchmarks/live_bench.py
+    python benchmarks/live_bench.py --clients 10 100 1000 --interval 0.1 --rows 20
+"""
+import argparse
+import json
+import os
+import selectors
+import socket
+import statistics
+import time
+
+from load_test import free_port, percentile, start_server, stop_server
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def subscribe(port, dataset, column):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(f'GET /api/live/{dataset}?column={column} HTTP/1.1\r\n'
+                 f'Host: localhost\r\n\r\n'.encode())
+    head = b''
+    while b'\r\n\r\n' not in head:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise RuntimeError("server closed the event stream")
+        head += chunk
+    if not head.startswith(b'HTTP/1.1 200'):
+        raise RuntimeError(head.split(b'\r\n', 1)[0].decode())
+    sock.setblocking(False)
+    return sock, head.split(b'\r\n\r\n', 1)[1]
+
+
+def read_streams(clients, duration):
+    """Read every stream for ``duration`` seconds; returns ({id: [arrival times]}, sample data)."""
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    for sock, rest in clients:
+        selector.register(sock, selectors.EVENT_READ)
+        buffers[sock] = rest
+    arrivals = {}
+    sample = None
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for key, _ in selector.select(max(0.0, deadline - time.perf_counter())):
+            now = time.perf_counter()
+            data = key.fileobj.recv(1 << 16)
+            if not data:
+                selector.unregister(key.fileobj)
+                continue
+            buffers[key.fileobj] += data
+            *events, buffers[key.fileobj] = buffers[key.fileobj].split(b'\n\n')
+            for event in events:
+                fields = dict(line.split(b': ', 1) for line in event.split(b'\n')
+                              if b': ' in line and not line.startswith(b':'))
+                if b'id' in fields:
+                    arrivals.setdefault(int(fields[b'id']), []).append(now)
+                    sample = fields.get(b'data', sample)
+    selector.close()
+    return arrivals, sample
+
+
+def run(n_clients, args):
+    port = free_port()
+    proc = start_server(port, ['--live-ticks', str(args.interval),
+                               '--live-tick-rows', str(args.rows),
+                               '--live-max-clients', str(n_clients + 10)])
+    clients = []
+    try:
+        for _ in range(n_clients):
+            clients.append(subscribe(port, args.dataset, args.column))
+        cpu0 = cpu_seconds(proc.pid)
+        arrivals, sample = read_streams(clients, args.duration)
+        cpu = cpu_seconds(proc.pid) - cpu0
+    finally:
+        for sock, _ in clients:
+            sock.close()
+        stop_server(proc)
+
+    # The first and last updates may straddle the measurement window
+    ids = sorted(arrivals)[1:-1]
+    complete = [i for i in ids if len(arrivals[i]) == n_clients]
+    spreads = sorted((max(arrivals[i]) - min(arrivals[i])) * 1000 for i in complete)
+    encode_ms = 0.0
+    if sample:
+        payload = json.loads(sample)
+        t0 = time.perf_counter()
+        for _ in range(n_clients - 1):
+            json.dumps(payload, separators=(',', ':')).encode()
+        encode_ms = (time.perf_counter() - t0) * 1000
+    updates = max(len(ids), 1)
+    return {
+        'clients': n_clients,
+        'updates': len(ids),
+        'complete': len(complete),
+        'bytes': len(sample or b''),
+        'spread_p50': statistics.median(spreads) if spreads else float('nan'),
+        'spread_p99': percentile(spreads, 99),
+        'cpu_ms': cpu * 1000 / updates,
+        'encode_ms': encode_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--interval', type=float, default=0.2, help='seconds between ticks')
+    parser.add_argument('--rows', type=int, default=1, help='rows per entity in each tick')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds to read per run')
+    parser.add_argument('--dataset', default='stocks')
+    parser.add_argument('--column', default='close')
+    args = parser.parse_args()
+
+    print(f"{args.dataset}/{args.column}: a tick of {args.rows} row(s) per entity "
+          f"every {args.interval}s, read for {args.duration}s")
+    print(f"{'clients':>8} {'updates':>8} {'to all':>7} {'bytes':>7} "
+          f"{'spread p50':>11} {'p99':>8} {'server cpu':>11} {'per-client encode':>18}")
+    for n_clients in args.clients:
+        r = run(n_clients, args)
+        print(f"{r['clients']:>8} {r['updates']:>8} {r['complete']:>7} {r['bytes']:>7} "
+              f"{r['spread_p50']:>9.1f}ms {r['spread_p99']:>6.1f}ms "
+              f"{r['cpu_ms']:>7.2f}ms/u {r['encode_ms']:>14.2f}ms/u")
+
+
+if __name__ == '__main__':
+    main()
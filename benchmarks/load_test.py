@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Load test for serve.py
+Starts the server in each mode, hammers it with concurrent keep-alive
+clients and reports requests/second and latency percentiles. Meanwhile
+--idle-clients connections (more than the server's 16 workers by
+default) make one request and then sit idle with the connection kept
+alive, as browser tabs do; they must not hold up the active clients.
+
+Usage (from the project root):
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --clients 32 --requests 200 --slow-clients 2
+    python benchmarks/load_test.py --modes pooled --server-args "--workers 4"
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = [
+    '/',
+    '/site/style.css',
+    '/site/playground.html',
+    '/data/processed/crypto_risk_return.csv',
+    '/visualizations/static/crypto_risk_return.png',
+]
+
+MODES = {
+    'single-threaded': ['--single-threaded'],
+    'pooled': [],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def start_server(port, extra_args):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'serve.py'), '--port', str(port)] + extra_args,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return proc
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def client_worker(port, paths, n_requests, latencies, errors, start_event):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    start_event.wait()
+    for i in range(n_requests):
+        path = paths[i % len(paths)]
+        t0 = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+            # http.client reconnects on its own when the server closes
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(type(exc).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def slow_client(port, path, stop_event, chunk=16 * 1024, delay=0.05):
+    """Download a large file at a trickle to hold a connection open."""
+    while not stop_event.is_set():
+        try:
+            sock = socket.create_connection(('127.0.0.1', port), timeout=30)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, chunk)
+            sock.sendall(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            while not stop_event.is_set():
+                if not sock.recv(chunk):
+                    break
+                time.sleep(delay)
+            sock.close()
+        except OSError:
+            time.sleep(delay)
+
+
+def idle_client(port, path):
+    """A keep-alive connection that has made one request and stays open."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('GET', path)
+    conn.getresponse().read()
+    return conn
+
+
+def run_load(port, paths, clients, n_requests, slow_clients, slow_path, idle_clients=0):
+    latencies, errors = [], []
+    start_event, stop_event = threading.Event(), threading.Event()
+    idle = [idle_client(port, paths[i % len(paths)]) for i in range(idle_clients)]
+
+    slow_threads = [threading.Thread(target=slow_client, args=(port, slow_path, stop_event),
+                                     daemon=True)
+                    for _ in range(slow_clients)]
+    for t in slow_threads:
+        t.start()
+    if slow_clients:
+        # Let the slow downloads grab their connections first
+        time.sleep(0.5)
+
+    threads = [threading.Thread(target=client_worker,
+                                args=(port, paths, n_requests, latencies, errors, start_event))
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    start_event.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stop_event.set()
+    for conn in idle:
+        conn.close()
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help='requests per client')
+    parser.add_argument('--slow-clients', type=int, default=1,
+                        help='clients trickling a large PNG during the run')
+    parser.add_argument('--slow-path', default='/visualizations/static/defi_tvl_trends.png')
+    parser.add_argument('--idle-clients', type=int, default=64,
+                        help='keep-alive connections left idle after one request')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--server-args', default='',
+                        help='extra arguments for the pooled server, e.g. "--workers 32"')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        port = free_port()
+        extra = MODES[mode] + (args.server_args.split() if mode == 'pooled' else [])
+        print(f"Running {mode} server on port {port}...")
+        proc = start_server(port, extra)
+        try:
+            results[mode] = run_load(port, DEFAULT_PATHS, args.clients, args.requests,
+                                     args.slow_clients, args.slow_path, args.idle_clients)
+        finally:
+            stop_server(proc)
+
+    print()
+    print(f"{'mode':<18}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print("-" * 66)
+    for mode, r in results.items():
+        print(f"{mode:<18}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p99_ms']:>10}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'clients': args.clients, 'requests_per_client': args.requests,
+                       'slow_clients': args.slow_clients, 'idle_clients': args.idle_clients,
+                       'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
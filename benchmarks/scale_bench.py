@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Scale benchmark: load, transform, figure build, serialize and serve
+Generates a synthetic data/processed/ tree per scale with
+benchmarks/synthetic.py (kept in --work and reused when it exists) and
+times each phase of the pipeline on it:
+
+- load: portfolio.loader parsing every dataset the figures read (no caches)
+- transform: the derived data computed from those rows (daily returns,
+  rolling volatility and Sharpe in one pass and as python -m portfolio
+  stream continues them, the summary tables, a correlation matrix)
+- figures: the build function of every registered figure
+- serialize: portfolio.output writing each figure as a shell plus JSON
+- serve: serve.py answering the figure JSON and the dataset APIs; the
+  first (cold) request and the median of --repeat more
+
+Each phase and item records wall time, peak memory and the bytes written
+or sent. Peak memory is the peak RSS of the process doing the work,
+reset before each item on Linux (elsewhere it only grows). The first four
+phases run in a fresh process per scale with PORTFOLIO_ROOT set to the
+synthetic tree. Results go to a JSON file, and --compare lists the
+phases and figures that got slower, hungrier or bigger than in an
+earlier file (exit status 1 if any did).
+
+Usage (from the project root):
+    python benchmarks/scale_bench.py                           # 10x, 100x and 1000x
+    python benchmarks/scale_bench.py --scales 10 10000 --shape history --work /tmp/scale
+    python benchmarks/scale_bench.py --compare benchmarks/results/scale-20250101-120000.json
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import synthetic
+from load_test import ROOT, free_port, start_server, stop_server
+from portfolio import PROJECT_ROOT, build, correlation, loader, output, stream, summary
+from portfolio.figures import FIGURES
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+# Columns of the benchmarked correlation matrix
+CORRELATION_COLUMNS = 500
+# One request per figure JSON, plus these API queries
+API_PATHS = [
+    '/api/datasets',
+    '/api/datasets/stocks?entity=AAPL&limit=1000',
+    '/api/series/stocks?entity=AAPL&column=close&points=2000',
+    '/api/series/crypto?entity=BTC&column=volatility_30d&points=2000',
+    '/api/series/defi?entity=Uniswap&column=tvl_millions&points=2000',
+]
+PHASES = ('load', 'transform', 'figures', 'serialize', 'serve')
+# Differences below these are noise, whatever the ratio
+MIN_CHANGE = {'seconds': 0.05, 'peak_mb': 20, 'bytes': 4096}
+
+
+def _status_mb(field, pid='self'):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak():
+    """Start a new peak RSS measurement for this process (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_mb(pid='self'):
+    """Peak RSS in MB since the last reset_peak() (or process start)."""
+    peak = _status_mb('VmHWM', pid)
+    if peak is None and pid == 'self':
+        # KB on Linux; no reset, so this is the peak of the whole process
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return peak
+
+
+def timed(function, *args, **kwargs):
+    """(result, seconds, peak MB) of one call."""
+    reset_peak()
+    t0 = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - t0, peak_mb()
+
+
+def phase(items):
+    """Totals of a phase from its items: summed time and bytes, largest peak."""
+    ok = [item for item in items.values() if 'error' not in item]
+    return {
+        'seconds': round(sum(item['seconds'] for item in ok), 4),
+        'peak_mb': round(max((item.get('peak_mb', 0) for item in ok), default=0), 1),
+        'bytes': sum(item.get('bytes', 0) for item in ok),
+        'errors': len(items) - len(ok),
+        'items': items,
+    }
+
+
+def error_text(exc):
+    # plotly's validation errors go on to list every valid property
+    lines = str(exc).strip().splitlines()
+    return f"{type(exc).__name__}: {lines[0] if lines else ''}".strip()
+
+
+def _item(seconds, peak, **extra):
+    return dict(seconds=round(seconds, 4), peak_mb=round(peak, 1), **extra)
+
+
+def run_phases(root):
+    """Load, transform, build and serialize in this process; runs with PORTFOLIO_ROOT=root."""
+    if os.path.realpath(PROJECT_ROOT) != os.path.realpath(root):
+        raise RuntimeError(f"PORTFOLIO_ROOT is {PROJECT_ROOT}, expected {root}")
+    phases = {'baseline_mb': round(_status_mb('VmRSS') or 0, 1)}
+
+    items = {}
+    loader.clear_memo()
+    for name in sorted({i for f in FIGURES.values() for i in f.inputs}):
+        frame, seconds, peak = timed(loader.load, name, use_disk_cache=False)
+        items[name] = _item(seconds, peak, rows=len(frame),
+                            bytes=os.path.getsize(loader.source_path(name)))
+    phases['load'] = phase(items)
+
+    stocks = loader.load('stock_market_processed')
+    crypto = loader.load('crypto_processed')
+    transforms = {
+        'daily_return': lambda: stream.STEPS['stocks'].compute(stocks),
+        # One pass, and the per-coin state python -m portfolio stream carries across chunks
+        'volatility': lambda: stream.STEPS['crypto'].compute(crypto),
+        'volatility_streamed': lambda: stream.STEPS['crypto'].carry().update(crypto),
+        'summary_tables': lambda: summary.update(root=root, rebuild=True, write=False),
+        'correlation': lambda: correlation.correlation(
+            correlation.wide(stocks, 'ticker', 'daily_return').iloc[:, :CORRELATION_COLUMNS]),
+    }
+    items = {}
+    for name, transform in transforms.items():
+        _, seconds, peak = timed(transform)
+        items[name] = _item(seconds, peak)
+    phases['transform'] = phase(items)
+
+    out_dir = os.path.join(root, build.OUTPUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    plotly_url = output.plotly_bundle(out_dir)
+    built, written = {}, {}
+    for figure in FIGURES.values():
+        path = os.path.join(out_dir, figure.output)
+        try:
+            fig, seconds, peak = timed(figure.build, **figure.params)
+            built[figure.name] = _item(seconds, peak)
+            _, seconds, peak = timed(output.write_split, fig, path, plotly_url)
+            del fig
+            written[figure.name] = _item(seconds, peak, bytes=os.path.getsize(path)
+                                         + os.path.getsize(output.data_path(path)))
+        except Exception as e:
+            error = error_text(e)
+            built.setdefault(figure.name, {'error': error})
+            written[figure.name] = {'error': error}
+    phases['figures'] = phase(built)
+    phases['serialize'] = phase(written)
+    return phases
+
+
+@contextlib.contextmanager
+def portfolio_root(root):
+    """Point processes started inside the block at ``root``."""
+    previous = os.environ.get('PORTFOLIO_ROOT')
+    os.environ['PORTFOLIO_ROOT'] = root
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ['PORTFOLIO_ROOT']
+        else:
+            os.environ['PORTFOLIO_ROOT'] = previous
+
+
+def fetch(conn, path):
+    """(seconds, body) of one GET, as a browser asks for it."""
+    t0 = time.perf_counter()
+    conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path}: HTTP {response.status}")
+    return time.perf_counter() - t0, body
+
+
+def serve_phase(root, figures, repeat):
+    """Time serve.py answering each figure's JSON and API_PATHS from ``root``."""
+    paths = [f'/{build.OUTPUT_DIR}/{os.path.splitext(FIGURES[name].output)[0]}.json'
+             for name in figures] + API_PATHS
+    port = free_port()
+    with portfolio_root(root):
+        proc = start_server(port, [])
+    items = {}
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+        for path in paths:
+            try:
+                seconds, body = fetch(conn, path)
+                warm = [fetch(conn, path)[0] for _ in range(repeat)]
+            except (OSError, RuntimeError, http.client.HTTPException) as e:
+                items[path] = {'error': error_text(e)}
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+                continue
+            items[path] = {'seconds': round(seconds, 4),
+                           'warm_ms': round(statistics.median(warm) * 1000, 2) if warm else None,
+                           'bytes': len(body)}
+        conn.close()
+        peak = peak_mb(proc.pid)
+    finally:
+        stop_server(proc)
+    result = phase(items)
+    # One server process answers every request, so its peak covers the whole phase
+    result['peak_mb'] = round(peak or 0, 1)
+    return result
+
+
+def prepare(scale, args):
+    """Root of the synthetic tree for ``scale``, generated unless it is already there."""
+    root = os.path.join(args.work, f'scale-{scale:g}-{args.shape}-{args.seed}')
+    info = synthetic.existing(root)
+    if info and (info['scale'], info['shape'], info['seed']) == (scale, args.shape, args.seed):
+        return root, info, None
+    shutil.rmtree(root, ignore_errors=True)
+    t0 = time.perf_counter()
+    info = synthetic.generate(scale, root, args.shape, args.seed)
+    return root, info, time.perf_counter() - t0
+
+
+def run(scale, args):
+    root, info, generate_seconds = prepare(scale, args)
+    rows = sum(d['rows'] for d in info['datasets'].values())
+    size = sum(d['bytes'] for d in info['datasets'].values())
+    print(f"\n{scale:g}x ({args.shape}): {rows:,} rows, {size / 2**20:,.1f} MB of CSV"
+          + (f", generated in {generate_seconds:.1f}s" if generate_seconds else ""))
+
+    result = {'scale': scale, 'shape': args.shape, 'seed': args.seed, 'rows': rows,
+              'input_bytes': size, 'datasets': info['datasets'],
+              'generate_seconds': round(generate_seconds, 2) if generate_seconds else None}
+    try:
+        with portfolio_root(root), concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            phases = pool.submit(run_phases, root).result()
+    except concurrent.futures.process.BrokenProcessPool:
+        result['error'] = "benchmark process died (out of memory?)"
+        print(f"  [FAIL] {result['error']}")
+        return result
+    result['baseline_mb'] = phases.pop('baseline_mb')
+    built = [name for name, item in phases['serialize']['items'].items() if 'error' not in item]
+    phases['serve'] = serve_phase(root, built, args.repeat)
+    result['phases'] = phases
+
+    print(f"  {'phase':<10} {'seconds':>9} {'peak MB':>9} {'output MB':>10}")
+    for name in PHASES:
+        p = phases[name]
+        print(f"  {name:<10} {p['seconds']:>9.2f} {p['peak_mb']:>9.1f} {p['bytes'] / 2**20:>10.2f}"
+              + (f"  [FAIL] {p['errors']} failed" if p['errors'] else ""))
+    for name in PHASES:
+        for item, data in phases[name]['items'].items():
+            if 'error' in data and not (name == 'serialize' and 'error' in
+                                        phases['figures']['items'].get(item, {})):
+                print(f"  [FAIL] {name}/{item}: {data['error']}")
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def _metrics(run):
+    """{(phase, item or None, metric): value} of one scale's run."""
+    values = {}
+    for name, p in run.get('phases', {}).items():
+        for metric in MIN_CHANGE:
+            values[name, None, metric] = p[metric]
+        for item, data in p['items'].items():
+            for metric in MIN_CHANGE:
+                if metric in data:
+                    values[name, item, metric] = data[metric]
+    return values
+
+
+def compare(old, new, tolerance):
+    """Print the metrics of ``new`` that are worse than in ``old``; returns how many."""
+    before = {(r['scale'], r['shape']): r for r in old['runs']}
+    regressions = 0
+    print(f"\nCompared with {old['created']} (commit {old['environment'].get('commit')}):")
+    for run in new['runs']:
+        previous = before.get((run['scale'], run['shape']))
+        if previous is None:
+            continue
+        old_values = _metrics(previous)
+        for key, value in _metrics(run).items():
+            name, item, metric = key
+            was = old_values.get(key)
+            if was is None or value - was <= MIN_CHANGE[metric] \
+                    or value <= was * (1 + tolerance):
+                continue
+            regressions += 1
+            label = f"{name}/{item}" if item else name
+            change = f"+{value / was - 1:.0%}" if was else "new"
+            print(f"  [FAIL] {run['scale']:g}x {label} {metric}: {was:g} -> {value:g} ({change})")
+    if not regressions:
+        print(f"  [OK] nothing got more than {tolerance:.0%} worse")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=float, nargs='+', default=[10, 100, 1000],
+                        help='dataset sizes relative to the checked-in data')
+    parser.add_argument('--shape', choices=synthetic.SHAPES, default='balanced',
+                        help='grow the number of entities, the history, or both (default)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work', help='directory for the synthetic trees, kept for reuse '
+                                       '(default: a temporary directory, removed afterwards)')
+    parser.add_argument('--repeat', type=int, default=5, help='warm requests per served path')
+    parser.add_argument('--json',
+                        help='results file (default: benchmarks/results/scale-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative change reported as a regression (default: 0.25)')
+    args = parser.parse_args()
+
+    created = datetime.datetime.now()
+    temporary = args.work is None
+    args.work = args.work or tempfile.mkdtemp(prefix='portfolio-scale-')
+    try:
+        runs = [run(scale, args) for scale in args.scales]
+    finally:
+        if temporary:
+            shutil.rmtree(args.work, ignore_errors=True)
+    results = {'created': created.isoformat(timespec='seconds'),
+               'environment': environment(), 'runs': runs}
+
+    path = args.json or os.path.join(RESULTS_DIR, f"scale-{created:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), results, args.tolerance) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
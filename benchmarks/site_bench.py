@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Site size and time-to-first-chart benchmark for the interactive charts
+Builds every figure in each output mode of python -m portfolio build,
+serves the result with serve.py and opens the charts the way a browser
+would: the first chart with a cold cache, then the others in turn with
+whatever they share already cached. Reports the size on disk, the bytes
+sent over the wire (gzip accepted) and the time until everything the
+first chart needs has arrived. Parsing and drawing in the browser are
+not included.
+
+Usage (from the project root):
+    python benchmarks/site_bench.py
+    python benchmarks/site_bench.py --json site.json
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.parse
+
+from load_test import ROOT, free_port, start_server, stop_server
+
+sys.path.insert(0, ROOT)
+from portfolio import build  # noqa: E402
+from portfolio.figures import FIGURES  # noqa: E402
+
+MODES = ('standalone', 'split')
+# Sub-resources a chart page loads: scripts and the split shell's figure JSON
+RESOURCE_PATTERN = re.compile(r'(?:<script src|data-figure)="([^"]+)"')
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def fetch(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"GET {path}: {response.status}")
+    return body, response.getheader('Content-Encoding')
+
+
+def open_chart(port, url_path, cache):
+    """Fetch a chart page and the resources it needs; returns (bytes, seconds)."""
+    t0 = time.perf_counter()
+    body, encoding = fetch(port, url_path)
+    wire = len(body)
+    if encoding == 'gzip':
+        body = gzip.decompress(body)
+
+    resources = [urllib.parse.urljoin(url_path, r)
+                 for r in RESOURCE_PATTERN.findall(body.decode('utf-8', 'replace'))]
+    resources = [r for r in resources if r not in cache]
+    sizes = []
+    # Browsers fetch a page's sub-resources in parallel
+    threads = [threading.Thread(target=lambda r=r: sizes.append(len(fetch(port, r)[0])))
+               for r in resources]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cache.update(r for r in resources if '/assets/' in r)
+    return wire + sum(sizes), time.perf_counter() - t0
+
+
+def run_mode(mode):
+    out_dir = os.path.join(ROOT, 'benchmarks', f'_site_{mode}')
+    shutil.rmtree(out_dir, ignore_errors=True)
+    figures = list(FIGURES.values())
+    results, _ = build.build(figures, workers=1, out_dir=out_dir, force=True, mode=mode)
+    failed = [r.name for r in results if r.error]
+    if failed:
+        raise RuntimeError(f"build failed for {', '.join(failed)}")
+    disk_bytes = directory_size(out_dir)
+
+    port = free_port()
+    proc = start_server(port, [])
+    try:
+        base = '/' + os.path.relpath(out_dir, ROOT).replace(os.sep, '/') + '/'
+        cache = set()
+        charts = [open_chart(port, base + f.output, cache) for f in figures]
+    finally:
+        stop_server(proc)
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    return {
+        'disk_mb': round(disk_bytes / 2**20, 2),
+        'first_chart_kb': round(charts[0][0] / 1024, 1),
+        'first_chart_ms': round(charts[0][1] * 1000, 1),
+        'next_chart_kb': round(sum(c[0] for c in charts[1:]) / max(len(charts) - 1, 1) / 1024, 1),
+        'all_charts_kb': round(sum(c[0] for c in charts) / 1024, 1),
+        'all_charts_ms': round(sum(c[1] for c in charts) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in MODES:
+        print(f"Running {mode}...")
+        results[mode] = run_mode(mode)
+
+    print()
+    print(f"{'mode':<12}{'disk MB':>9}{'1st KB':>10}{'1st ms':>9}{'next KB':>10}"
+          f"{'all KB':>10}{'all ms':>9}")
+    print("-" * 69)
+    for mode, r in results.items():
+        print(f"{mode:<12}{r['disk_mb']:>9}{r['first_chart_kb']:>10}{r['first_chart_ms']:>9}"
+              f"{r['next_chart_kb']:>10}{r['all_charts_kb']:>10}{r['all_charts_ms']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Synthetic, schema-compatible versions of data/processed/ at any scale
+Writes the four row-level processed CSVs with the checked-in datasets'
+columns, entity names and date formats, grown by ``scale``: more
+entities (tickers T00005.., coins C00004.., protocols P00005..), longer
+histories, and intraday rows once a history would span more than ten
+years. ``--shape`` decides how the scale is split between the two.
+Values are random walks; the derived columns (daily returns, 30-day
+volatility and Sharpe) come from the same code as the real pipeline
+(portfolio.stream), and the summary tables and
+correlation matrices are rebuilt from the generated rows with
+portfolio.summary and portfolio.correlation.
+
+Rows are generated and appended a block of entities at a time, so memory
+stays flat however large the scale. Point the package or serve.py at the
+result with PORTFOLIO_ROOT:
+    PORTFOLIO_ROOT=/tmp/portfolio-100x python -m portfolio build
+
+Usage (from the project root):
+    python benchmarks/synthetic.py --scale 100 --out /tmp/portfolio-100x
+    python benchmarks/synthetic.py --scale 1000 --shape history --out /tmp/portfolio-long
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from load_test import ROOT
+
+sys.path.insert(0, ROOT)
+from portfolio import correlation, loader, stream, summary  # noqa: E402
+
+# The checked-in datasets: entity names, rows per entity, first date and frequency
+Base = collections.namedtuple('Base', 'by entities periods start freq prefix')
+
+BASES = {
+    'stock_market_processed': Base('ticker', ['AAPL', 'MSFT', 'GOOGL', 'META', 'NVDA'], 501,
+                                   '2023-10-02 04:00:00', 'B', 'T'),
+    'crypto_processed': Base('coin', ['BTC', 'ETH', 'SOL', 'MATIC'], 366,
+                             '2024-10-03 00:00:00', 'D', 'C'),
+    'defi_historical_processed': Base('protocol', ['Uniswap', 'Aave', 'Compound', 'Curve', 'Lido'],
+                                      180, '2025-04-05 20:39:39.188896', 'D', 'P'),
+    # Extra coins share the crypto names, so sentiment and prices still align
+    'social_sentiment_processed': Base('coin', ['BTC', 'ETH', 'SOL', 'DOGE', 'SHIB'], 30,
+                                       '2025-09-02 20:39:13.282342', 'D', 'C'),
+}
+
+SHAPES = ('balanced', 'entities', 'history')
+# Histories longer than this switch to hourly, then minute rows
+MAX_SPAN_DAYS = 3650
+FREQS = [(None, 1.0), ('h', 1 / 24), ('min', 1 / 1440)]
+BLOCK_ROWS = 1_000_000
+# Entities in the correlation matrices; a matrix over every entity would
+# not fit in memory at the largest scales
+MATRIX_ENTITIES = 500
+
+MATRICES = {
+    'stock_correlations': ('stock_market_processed', 'daily_return'),
+    'defi_correlations': ('defi_historical_processed', 'tvl_millions'),
+}
+
+
+def split(scale, shape):
+    """(entity factor, history factor) whose product is ``scale``."""
+    if shape == 'entities':
+        return scale, 1.0
+    if shape == 'history':
+        return 1, float(scale)
+    entities = max(1, round(math.sqrt(scale)))
+    return entities, scale / entities
+
+
+def layout(base, scale, shape):
+    """(entity names, dates, step in days) of one dataset at ``scale``."""
+    entity_factor, history_factor = split(scale, shape)
+    count = max(1, round(len(base.entities) * entity_factor))
+    names = base.entities[:count] + [f"{base.prefix}{i:05d}"
+                                     for i in range(len(base.entities), count)]
+    periods = max(2, round(base.periods * history_factor))
+    start = pd.Timestamp(base.start)
+    for freq, step in FREQS:
+        freq = freq or base.freq
+        offset = pd.tseries.frequencies.to_offset(freq)
+        if start + (periods - 1) * offset - start <= pd.Timedelta(days=MAX_SPAN_DAYS) \
+                or freq == 'min':
+            return names, pd.date_range(start, periods=periods, freq=freq), step
+
+
+def _walk(rng, start, sigma, shape):
+    # Geometric random walks, one column per entity
+    steps = rng.normal(0, sigma, shape)
+    steps[0] = 0
+    return start * np.exp(np.cumsum(steps, axis=0))
+
+
+def _lognormal(rng, median, sigma, shape):
+    return median * np.exp(rng.normal(0, sigma, shape))
+
+
+def _stocks(rng, shape, step):
+    close = np.round(_walk(rng, _lognormal(rng, 150, 0.8, shape[1]),
+                           0.02 * math.sqrt(step), shape), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, shape)), 2)
+    return {
+        'open': open_,
+        'high': np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.007, shape))), 2),
+        'low': np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.007, shape))), 2),
+        'close': close,
+        'volume': np.round(_lognormal(rng, 6e7 * step, 0.5, shape)),
+    }
+
+
+def _crypto(rng, shape, step):
+    price = _walk(rng, _lognormal(rng, 100, 2.5, shape[1]), 0.04 * math.sqrt(step), shape)
+    return {
+        'price': price,
+        'volume': _lognormal(rng, 1e9 * step, 0.8, shape),
+        'market_cap': price * _lognormal(rng, 1e8, 1.5, shape[1]),
+    }
+
+
+def _defi(rng, shape, step):
+    return {
+        'tvl_millions': _walk(rng, _lognormal(rng, 5000, 0.6, shape[1]),
+                              0.03 * math.sqrt(step), shape),
+        'daily_volume': _lognormal(rng, 600, 0.6, shape),
+        'users_count': np.round(_lognormal(rng, 1.5e6, 0.8, shape)).astype(np.int64),
+        'transactions': np.round(_lognormal(rng, 7e5, 0.8, shape)).astype(np.int64),
+    }
+
+
+def _sentiment(rng, shape, step):
+    return {
+        'sentiment_score': np.clip(rng.normal(64, 11, shape), 0, 100),
+        'social_volume': _lognormal(rng, 9e4, 0.4, shape),
+        'social_dominance': rng.uniform(1, 15, shape),
+        'galaxy_score': np.clip(rng.normal(64, 12, shape), 0, 100),
+    }
+
+
+# Value columns in file order; derived columns follow from the stream STEPS
+VALUES = {
+    'stock_market_processed': (_stocks, stream.STEPS['stocks']),
+    'crypto_processed': (_crypto, stream.STEPS['crypto']),
+    'defi_historical_processed': (_defi, stream.STEPS['defi']),
+    'social_sentiment_processed': (_sentiment, stream.STEPS['sentiment']),
+}
+
+
+def blocks(name, scale, shape, seed=0):
+    """Yield ``name``'s rows at ``scale`` as DataFrames of whole entities, in file order."""
+    base = BASES[name]
+    values, step_def = VALUES[name]
+    names, dates, step = layout(base, scale, shape)
+    per_block = max(1, BLOCK_ROWS // len(dates))
+    for number, first in enumerate(range(0, len(names), per_block)):
+        block = names[first:first + per_block]
+        rng = np.random.default_rng([seed, list(BASES).index(name), number])
+        columns = values(rng, (len(dates), len(block)), step)
+        frame = pd.DataFrame({'date': np.tile(dates.to_numpy(), len(block)),
+                              base.by: np.repeat(block, len(dates))})
+        for column, array in columns.items():
+            frame[column] = array.T.ravel()
+        if step_def.compute is not None:
+            frame = pd.concat([frame, step_def.compute(frame)], axis=1)
+        yield frame
+
+
+def write_dataset(name, scale, shape, root, seed=0):
+    """Write one processed CSV under ``root``; returns (rows, wide values for the matrices)."""
+    schema = loader.SCHEMAS[name]
+    path = loader.source_path(name, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    matrix = [m for m, (source, _) in MATRICES.items() if source == name]
+    wide, rows = [], 0
+    try:
+        for frame in blocks(name, scale, shape, seed):
+            frame.to_csv(tmp_path, mode='a' if rows else 'w', header=not rows, index=False,
+                         date_format=schema.date_format)
+            rows += len(frame)
+            if matrix and sum(w.shape[1] for w in wide) < MATRIX_ENTITIES:
+                wide.append(correlation.wide(frame, BASES[name].by, MATRICES[matrix[0]][1]))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if not matrix:
+        return rows, None
+    return rows, pd.concat(wide, axis=1).iloc[:, :MATRIX_ENTITIES]
+
+
+def generate(scale, root, shape='balanced', seed=0, on_dataset=None):
+    """Write a synthetic data/processed/ tree under ``root``; returns its description.
+
+    ``on_dataset`` is called with (name, info) as each file is finished.
+    """
+    info = {'scale': scale, 'shape': shape, 'seed': seed, 'datasets': {}}
+    for name, base in BASES.items():
+        t0 = time.perf_counter()
+        rows, wide = write_dataset(name, scale, shape, root, seed)
+        names, dates, _ = layout(base, scale, shape)
+        path = loader.source_path(name, root)
+        info['datasets'][name] = {
+            'rows': rows, 'entities': len(names), 'periods': len(dates),
+            'freq': dates.freqstr, 'bytes': os.path.getsize(path),
+            'seconds': round(time.perf_counter() - t0, 3),
+        }
+        for matrix, (source, _) in MATRICES.items():
+            if source == name:
+                matrix_path = loader.source_path(matrix, root)
+                correlation.correlation(wide).to_csv(matrix_path)
+        if on_dataset:
+            on_dataset(name, info['datasets'][name])
+
+    # update() compares with the saved tables, so give it empty ones to replace
+    for table in summary.TABLES.values():
+        open(os.path.join(root, table.path), 'w').close()
+    summary.update(root=root, rebuild=True)
+    with open(os.path.join(root, 'synthetic.json'), 'w') as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def existing(root):
+    """The description generate() saved under ``root``, or None."""
+    try:
+        with open(os.path.join(root, 'synthetic.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, required=True,
+                        help='rows relative to the checked-in datasets (e.g. 10, 1000)')
+    parser.add_argument('--out', required=True, help='root of the tree to write')
+    parser.add_argument('--shape', choices=SHAPES, default='balanced',
+                        help='grow the number of entities, the history, or both (default)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Writing {args.scale:g}x synthetic datasets ({args.shape}) to {args.out}")
+    generate(args.scale, args.out, args.shape, args.seed, on_dataset=lambda name, d: print(
+        f"  [OK] {name:<28} {d['rows']:>11,} rows  {d['entities']:>6} x {d['periods']:<8} "
+        f"{d['freq']:<4} {d['bytes'] / 2**20:>9.1f} MB  {d['seconds']:.1f}s"))
+    print("  [OK] summary tables and correlation matrices")
+
+
+if __name__ == '__main__':
+    main()
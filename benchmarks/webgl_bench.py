@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Browser render benchmark for SVG vs WebGL scatter traces
+Writes benchmarks/webgl_bench.html, a page that draws random-walk line
+charts of 10k, 100k and 1M points with go.Scatter (SVG) and go.Scattergl
+(WebGL) and measures, in the browser, the time to first draw and the
+frame rate while panning. Each row also shows which trace type
+portfolio.webgl picks for a single trace of that size. SVG at 1M points
+can hang the tab for a minute, so it only runs when ticked.
+
+The page loads the shared plotly.js bundle from visualizations/interactive/
+assets/ (written here if missing), so serve it from the project root:
+
+Usage (from the project root):
+    python benchmarks/webgl_bench.py
+    python serve.py        # then open http://localhost:8000/benchmarks/webgl_bench.html
+"""
+import json
+import os
+import sys
+
+from load_test import ROOT
+
+sys.path.insert(0, ROOT)
+from portfolio import build, output, webgl  # noqa: E402
+
+OUTPUT = os.path.join(ROOT, 'benchmarks', 'webgl_bench.html')
+SIZES = [10_000, 100_000, 1_000_000]
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>SVG vs WebGL render benchmark</title>
+<link rel="stylesheet" href="../site/style.css">
+<script src="__PLOTLY__"></script>
+<style>
+  #chart { width: 100%; height: 480px; }
+  table { border-collapse: collapse; margin: 1em 0; }
+  th, td { padding: 4px 12px; text-align: right; border-bottom: 1px solid #ddd; }
+</style>
+</head>
+<body>
+<h1>SVG vs WebGL render benchmark</h1>
+<p>One random-walk line per run, date x axis, plotly_white template.
+   <em>draw</em> is Plotly.newPlot until the next painted frame;
+   <em>pan</em> is the average frame time over __PAN_STEPS__ relayouts that shift the x range.</p>
+<label><input type="checkbox" id="svg-1m"> include SVG at 1M points</label>
+<button id="run">Run</button>
+<table>
+  <thead><tr><th>points</th><th>trace</th><th>portfolio.webgl picks</th>
+             <th>draw ms</th><th>pan ms/frame</th><th>pan fps</th></tr></thead>
+  <tbody id="results"></tbody>
+</table>
+<pre id="json"></pre>
+<div id="chart"></div>
+<script>
+const SIZES = __SIZES__;
+const THRESHOLD = __THRESHOLD__;
+const PAN_STEPS = __PAN_STEPS__;
+const DAY = 86400000;
+
+function series(n) {
+    const x = new Float64Array(n), y = new Float64Array(n);
+    let value = 100;
+    for (let i = 0; i < n; i++) {
+        value += Math.random() - 0.5;
+        x[i] = Date.UTC(2000, 0, 1) + i * DAY / 24;
+        y[i] = value;
+    }
+    return {x, y};
+}
+
+const nextFrame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+
+async function run(n, type) {
+    const chart = document.getElementById('chart');
+    Plotly.purge(chart);
+    const {x, y} = series(n);
+    const trace = {type, x, y, mode: 'lines', name: type, line: {color: '#2E86AB', width: 2},
+                   hovertemplate: '%{x}<br>%{y:.2f}<extra></extra>'};
+    const layout = {template: 'plotly_white', xaxis: {type: 'date'}, hovermode: 'closest',
+                    margin: {t: 20}};
+
+    let t0 = performance.now();
+    await Plotly.newPlot(chart, [trace], layout);
+    await nextFrame();
+    const draw = performance.now() - t0;
+
+    const first = x[0], span = (x[n - 1] - x[0]) / 2;
+    t0 = performance.now();
+    for (let step = 0; step < PAN_STEPS; step++) {
+        const start = first + span * step / PAN_STEPS;
+        await Plotly.relayout(chart, {'xaxis.range': [start, start + span]});
+        await nextFrame();
+    }
+    const frame = (performance.now() - t0) / PAN_STEPS;
+    return {points: n, trace: type, picked: n > THRESHOLD ? 'scattergl' : 'scatter',
+            draw_ms: +draw.toFixed(1), pan_ms: +frame.toFixed(1), pan_fps: +(1000 / frame).toFixed(1)};
+}
+
+document.getElementById('run').addEventListener('click', async () => {
+    const rows = document.getElementById('results');
+    const includeSvg1m = document.getElementById('svg-1m').checked;
+    const results = [];
+    rows.innerHTML = '';
+    for (const n of SIZES) {
+        for (const type of ['scatter', 'scattergl']) {
+            if (type === 'scatter' && n >= 1000000 && !includeSvg1m) continue;
+            const r = await run(n, type);
+            results.push(r);
+            const tr = document.createElement('tr');
+            for (const key of ['points', 'trace', 'picked', 'draw_ms', 'pan_ms', 'pan_fps']) {
+                const td = document.createElement('td');
+                td.textContent = typeof r[key] === 'number' && key === 'points'
+                    ? r[key].toLocaleString() : r[key];
+                tr.appendChild(td);
+            }
+            rows.appendChild(tr);
+        }
+    }
+    document.getElementById('json').textContent = JSON.stringify(results, null, 2);
+});
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    out_dir = os.path.join(ROOT, build.OUTPUT_DIR)
+    bundle = output.plotly_bundle(out_dir)
+    page = (PAGE.replace('__PLOTLY__', f"../{build.OUTPUT_DIR}/{bundle}")
+                .replace('__SIZES__', json.dumps(SIZES))
+                .replace('__THRESHOLD__', str(webgl.TRACE_THRESHOLD))
+                .replace('__PAN_STEPS__', '30'))
+    output.write_atomic(OUTPUT, page.encode('utf-8'))
+    print(f"[OK] Wrote {os.path.relpath(OUTPUT, ROOT)}")
+    print("     Serve the project root (python serve.py) and open /benchmarks/webgl_bench.html")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"""
+Data Visualization Portfolio package
+Shared data loading, grouping and query code used by serve.py and the
+figure scripts in notebooks/
+
+Data is read from and written under PROJECT_ROOT. Setting the
+PORTFOLIO_ROOT environment variable points it at another directory with
+the same data/ layout, such as a tree written by benchmarks/synthetic.py.
+"""
+import os
+
+PROJECT_ROOT = (os.environ.get('PORTFOLIO_ROOT')
+                or os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+"""
+Command line entry point for the portfolio package
+
+Usage (from the project root, or anywhere with it on PYTHONPATH):
+    python -m portfolio build [figures...] [--workers N]
+    python -m portfolio render [charts...] [--workers N]
+    python -m portfolio columnar [datasets...] [--force]
+    python -m portfolio rolling (--check | --append new.csv)
+    python -m portfolio correlation (--check | stocks|defi --top N [--window W])
+    python -m portfolio fetch stocks|crypto [symbols...] [--workers N]
+    python -m portfolio stream [datasets...] [--memory MB] [--check]
+    python -m portfolio summary [tables...] [--check | --query SOURCE]
+"""
+import sys
+
+COMMANDS = {
+    'build': 'portfolio.build',
+    'render': 'portfolio.render',
+    'columnar': 'portfolio.columnar',
+    'rolling': 'portfolio.rolling',
+    'correlation': 'portfolio.correlation',
+    'fetch': 'portfolio.fetch',
+    'stream': 'portfolio.stream',
+    'summary': 'portfolio.summary',
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__.strip())
+        return 2
+    # Import lazily so one command's dependencies never slow down another
+    module = __import__(COMMANDS[argv[0]], fromlist=['main'])
+    return module.main(argv[1:])
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
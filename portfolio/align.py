@@ -0,0 +1,152 @@
+"""
+Sorted as-of joins between processed datasets
+Sentiment is sampled at 20:39:13.282342 each day and prices at midnight,
+so an exact ``merge(on=['date', 'coin'])`` finds almost nothing, and at
+scale it hashes both frames for every join. An as-of join instead pairs
+each left row with the right row of the same entity whose time is the
+last one at or before it (``direction='backward'``), the first one at or
+after it (``'forward'``) or the closer of the two (``'nearest'``), within
+``tolerance``.
+
+index() sorts a frame's rows by (entity, time) once and keeps the result
+for the process, like portfolio.traces.group(). Each join then ranks the
+left times against the index's distinct times and finds every row's
+match with one searchsorted() over combined (entity, rank) keys: no
+per-entity loop, no sorting of the left frame, and the result keeps the
+left frame's row order.
+
+    aligned = align.asof(sentiment, prices, 'coin', columns=['price'],
+                         tolerance=pd.Timedelta('1D'), how='inner')
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIRECTIONS = ('backward', 'forward', 'nearest')
+
+_NAT = np.iinfo(np.int64).min
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _codes(entities, values):
+    """Positions of ``values`` in ``entities`` (compared as strings), -1 if absent."""
+    codes, uniques = pd.factorize(values)
+    positions = entities.get_indexer(pd.Index(uniques).astype(str))
+    return np.where(codes >= 0, positions[codes], -1)
+
+
+def _search(values, queries, side):
+    """np.searchsorted() with the queries visited in sorted order.
+
+    Searching sorted queries walks ``values`` front to back instead of
+    jumping around it, which is several times faster on large inputs.
+    """
+    order = np.argsort(queries, kind='stable')
+    result = np.empty(len(queries), dtype=np.intp)
+    result[order] = np.searchsorted(values, queries[order], side=side)
+    return result
+
+
+def _times(values):
+    return np.asarray(values, dtype='datetime64[ns]').view('i8')
+
+
+class SortedIndex:
+    """A frame's rows sorted by entity, then time, for repeated as-of lookups."""
+
+    def __init__(self, frame, by, on='date'):
+        self.frame = frame
+        self.by = by
+        self.on = on
+        self.entities = pd.Index(pd.unique(frame[by])).astype(str).unique()
+        codes = _codes(self.entities, frame[by])
+        times = _times(frame[on])
+        rows = np.flatnonzero(times != _NAT)
+        self.order = rows[np.lexsort((times[rows], codes[rows]))]
+        self.codes = codes[self.order]
+        self.times = times[self.order]
+        # Ranks of the distinct times make (entity, time) one sortable integer key
+        self.distinct = np.unique(self.times)
+        self.keys = self.codes * (len(self.distinct) + 1) + np.searchsorted(
+            self.distinct, self.times) + 1
+
+    def lookup(self, entities, times, tolerance=None, direction='backward'):
+        """Positions in ``frame`` of each (entity, time)'s match, -1 where there is none."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        codes = _codes(self.entities, entities)
+        times = _times(times)
+        best = np.full(len(times), -1)
+        if not len(self.keys):
+            return best
+        stride = len(self.distinct) + 1
+        candidates = []
+        if direction in ('backward', 'nearest'):
+            keys = codes * stride + _search(self.distinct, times, 'right')
+            candidates.append(_search(self.keys, keys, 'right') - 1)
+        if direction in ('forward', 'nearest'):
+            keys = codes * stride + _search(self.distinct, times, 'left') + 1
+            candidates.append(_search(self.keys, keys, 'left'))
+
+        best_gap = np.full(len(times), np.inf)
+        usable = (codes >= 0) & (times != _NAT)
+        for positions in candidates:
+            inside = (positions >= 0) & (positions < len(self.keys))
+            positions = np.where(inside, positions, 0)
+            gap = np.abs(self.times[positions] - times).astype(np.float64)
+            ok = usable & inside & (self.codes[positions] == codes)
+            if tolerance is not None:
+                ok &= gap <= pd.Timedelta(tolerance).value
+            # Ties go to the backward match, which comes first
+            better = ok & (gap < best_gap)
+            best[better] = positions[better]
+            best_gap[better] = gap[better]
+        return np.where(best >= 0, self.order[best], -1)
+
+
+def index(frame, by, on='date'):
+    """Return the SortedIndex of ``frame``, sorting it only on first use.
+
+    Results are shared across the process, so pass the (read-only) frames
+    returned by portfolio.loader.
+    """
+    key = (id(frame), by, on)
+    with _lock:
+        found = _indexes.get(key)
+        # Keeping a reference to the frame stops its id() from being reused
+        if found is None or found.frame is not frame:
+            found = SortedIndex(frame, by, on)
+            _indexes[key] = found
+    return found
+
+
+def asof(left, right, by, on='date', columns=None, tolerance=None, direction='backward',
+         how='left'):
+    """``left`` with ``columns`` of each row's as-of match in ``right``.
+
+    ``right`` is a frame (indexed with index()) or a SortedIndex. Rows
+    without a match get missing values, or are dropped with
+    ``how='inner'``. Rows keep ``left``'s order and index.
+    """
+    if how not in ('left', 'inner'):
+        raise ValueError("how must be 'left' or 'inner'")
+    right = right if isinstance(right, SortedIndex) else index(right, by, on)
+    columns = [c for c in right.frame.columns if c not in (by, on)] if columns is None else \
+        list(columns)
+    positions = right.lookup(left[by], left[on], tolerance, direction)
+    matched = positions >= 0
+    if how == 'inner':
+        left = left[matched]
+        positions = positions[matched]
+        matched = np.ones(len(positions), dtype=bool)
+
+    result = left.copy()
+    for column in columns:
+        values = right.frame[column].iloc[np.maximum(positions, 0)].set_axis(result.index)
+        if not matched.all():
+            values = values.where(matched)
+        result[f'{column}_right' if column in result.columns else column] = values
+    return result
@@ -0,0 +1,83 @@
+"""
+Shared arrays for the split output
+Figures often carry the same data more than once: a dropdown's "update"
+buttons hold the y arrays of every trace for every choice, including the
+one the traces already show, and traces over the same dates repeat the
+same x. share() stores each repeated array once in the figure JSON's
+``encoded.arrays`` (numbers as a base64 little-endian float64 array) and
+replaces every occurrence with ``{"$shared": k}``. The split chart shell
+in portfolio/output.py swaps the references back for one array (a
+Float64Array for numbers) each, so the traces and buttons also share them
+in the browser.
+"""
+import base64
+import collections
+import json
+import numbers
+
+import numpy as np
+
+# Shorter arrays are left inline
+MIN_LENGTH = 16
+
+
+def _is_numeric(values):
+    return all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in values)
+
+
+def _key(values):
+    if isinstance(values, np.ndarray):
+        return 'f8', values.astype('<f8').tobytes()
+    if _is_numeric(values):
+        return 'f8', np.asarray(values, dtype='<f8').tobytes()
+    return 'json', json.dumps(values)
+
+
+def _walk(value, visit):
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return value
+    for key, item in list(items):
+        is_array = isinstance(item, np.ndarray) or (
+            isinstance(item, list) and len(item) >= MIN_LENGTH
+            and not any(isinstance(v, (dict, list)) for v in item))
+        value[key] = visit(item) if is_array else _walk(item, visit)
+    return value
+
+
+def share(spec):
+    """Store arrays that occur more than once in ``spec`` once; in place.
+
+    numpy arrays (left in place by portfolio.spec.plain(typed=True)) are
+    always moved to ``encoded.arrays``, as binary. Returns ``spec``.
+    """
+    counts = collections.Counter()
+
+    def count(values):
+        counts[_key(values)] += 1
+        return values
+
+    _walk(spec, count)
+    index = {key: None for key, n in counts.items() if n > 1}
+    arrays = []
+
+    def replace(values):
+        key = _key(values)
+        if key not in index:
+            if not isinstance(values, np.ndarray):
+                return values
+            index[key] = None
+        if index[key] is None:
+            index[key] = len(arrays)
+            kind, data = key
+            arrays.append({'f8': base64.b64encode(data).decode('ascii')} if kind == 'f8'
+                          else {'values': values})
+        return {'$shared': index[key]}
+
+    _walk(spec, replace)
+    if arrays:
+        spec.setdefault('encoded', {})['arrays'] = arrays
+    return spec
@@ -0,0 +1,232 @@
+"""
+Parallel, incremental build of the interactive figures in portfolio/figures.py
+Each registered figure is an independent task rendered to
+visualizations/interactive/<name>.html in a process pool, either as a
+small shell plus <name>.json sharing one plotly.js bundle (the default) or
+as a standalone page (see portfolio/output.py). The datasets
+the selected figures need are loaded once in the parent before the pool
+starts: forked workers inherit them, and spawned workers read them from
+portfolio.loader's disk cache instead of parsing the CSVs again.
+
+Only stale figures are rebuilt. A figure's key hashes the contents of its
+input CSVs, its parameters, the source of its module without the other
+figures' functions (its own function and helpers such as
+metric_dropdown), the shared code in SHARED_CODE and the plotly version;
+the key of every output is kept in a manifest next to the outputs (see
+portfolio/manifest.py). Stale figures are started longest-first, using
+the times recorded by the last build.
+
+Usage (from any directory):
+    python -m portfolio build                          # every stale figure
+    python -m portfolio build stock_price_trends defi_tvl_trends
+    python -m portfolio build --group advanced --workers 4
+    python -m portfolio build --force                  # ignore the manifest
+    python -m portfolio build --mode standalone        # plotly.js inlined per chart
+"""
+import argparse
+import collections
+import hashlib
+import inspect
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly
+
+from portfolio import (PROJECT_ROOT, align, arrays, correlation, downsample, frames, loader,
+                       output, spec, traces, trendline, webgl)
+from portfolio.figures import FIGURES
+from portfolio.manifest import BuildManifest
+
+OUTPUT_DIR = 'visualizations/interactive'
+MANIFEST_NAME = '.build-manifest.json'
+
+BuildResult = collections.namedtuple('BuildResult', 'name path seconds error')
+
+
+def select(names=None, group=None):
+    """Return the registered figures to build; raises KeyError for unknown names."""
+    if names:
+        unknown = [n for n in names if n not in FIGURES]
+        if unknown:
+            raise KeyError(f"unknown figure(s): {', '.join(unknown)}")
+        figures = [FIGURES[n] for n in names]
+    else:
+        figures = list(FIGURES.values())
+    if group:
+        figures = [f for f in figures if f.group == group]
+    return figures
+
+
+# Code outside the figure functions that changes what they write
+SHARED_CODE = (loader, align, correlation, trendline, traces, downsample, webgl, frames, arrays,
+               spec, output)
+
+
+def _module_source(figure):
+    # Helpers, constants and imports of the figure's module count as its code;
+    # editing another figure's function leaves it fresh
+    module = inspect.getmodule(figure.build)
+    source = inspect.getsource(module)
+    for other in FIGURES.values():
+        if other is not figure and inspect.getmodule(other.build) is module:
+            source = source.replace(inspect.getsource(other.build), '', 1)
+    return source
+
+
+def figure_key(figure, manifest, mode, root=PROJECT_ROOT):
+    """Hash of everything ``figure``'s output depends on."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"mode={mode}\n".encode())
+    for name in figure.inputs:
+        digest.update(f"{name}={manifest.source_hash(loader.source_path(name, root))}\n".encode())
+    digest.update(_module_source(figure).encode())
+    digest.update(repr(sorted(figure.params.items())).encode())
+    for code in SHARED_CODE:
+        digest.update(inspect.getsource(code).encode())
+    digest.update(plotly.__version__.encode())
+    return digest.hexdigest()
+
+
+def render(name, out_dir, plotly_url=None):
+    """Build and write one figure; runs in a worker process.
+
+    Writes a split shell and JSON when ``plotly_url`` is given, otherwise
+    a standalone page.
+    """
+    t0 = time.perf_counter()
+    figure = FIGURES[name]
+    path = os.path.join(out_dir, figure.output)
+    try:
+        fig = figure.build(**figure.params)
+        if plotly_url:
+            output.write_split(fig, path, plotly_url)
+        else:
+            output.write_html(fig, path)
+    except Exception as e:
+        return BuildResult(name, path, time.perf_counter() - t0, f"{type(e).__name__}: {e}")
+    return BuildResult(name, path, time.perf_counter() - t0, None)
+
+
+def preload(figures):
+    """Load every dataset the figures read, once, in this process."""
+    for name in sorted({i for f in figures for i in f.inputs}):
+        loader.load(name)
+
+
+def _pool_context():
+    # fork shares the preloaded datasets with the workers copy-on-write
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def stale(figures, manifest, out_dir, mode, force=False):
+    """Split ``figures`` into ``(stale, fresh)``; also returns each one's key."""
+    keys = {f.name: figure_key(f, manifest, mode) for f in figures}
+    if force:
+        return figures, [], keys
+
+    def is_fresh(f):
+        path = os.path.join(out_dir, f.output)
+        if mode == 'split' and not os.path.exists(output.data_path(path)):
+            return False
+        return manifest.is_fresh(path, keys[f.name])
+
+    fresh = [f for f in figures if is_fresh(f)]
+    return [f for f in figures if f not in fresh], fresh, keys
+
+
+def build(figures, workers=None, out_dir=None, on_result=None, force=False, mode='split'):
+    """Render the stale ``figures`` with up to ``workers`` processes.
+
+    ``on_result`` is called with each BuildResult as it finishes. Returns
+    ``(results, fresh)``: the results in completion order (a failing
+    figure does not stop others) and the figures that were up to date.
+    """
+    out_dir = out_dir or os.path.join(PROJECT_ROOT, OUTPUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = BuildManifest(os.path.join(out_dir, MANIFEST_NAME))
+    if mode not in output.OUTPUT_MODES:
+        raise ValueError(f"unknown output mode: {mode}")
+    todo, fresh, keys = stale(figures, manifest, out_dir, mode, force)
+    # Longest first, so the slowest figure is not left to run last on its own
+    todo = sorted(todo, key=lambda f: -manifest.get(f.output, 'seconds', 0))
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+
+    results = []
+
+    def finished(result):
+        results.append(result)
+        if not result.error:
+            manifest.record(result.path, keys[result.name], figure=result.name,
+                            seconds=round(result.seconds, 3))
+        if on_result:
+            on_result(result)
+
+    plotly_url = None
+    if todo:
+        preload(todo)
+        if mode == 'split':
+            plotly_url = output.plotly_bundle(out_dir)
+    if workers == 1:
+        for f in todo:
+            finished(render(f.name, out_dir, plotly_url))
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = [pool.submit(render, f.name, out_dir, plotly_url) for f in todo]
+            for future in as_completed(futures):
+                finished(future.result())
+    manifest.save()
+    return results, fresh
+
+
+def report(result):
+    if result.error:
+        print(f"  [FAIL] {result.name}: {result.error}")
+    else:
+        print(f"  [OK] {os.path.basename(result.path):<34} {result.seconds:6.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio build',
+                                     description="Build the interactive Plotly figures")
+    parser.add_argument('names', nargs='*', help='figures to build (default: all)')
+    parser.add_argument('--group', choices=sorted({f.group for f in FIGURES.values()}),
+                        help='only build the figures from one of the original scripts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count; 1 builds in-process)')
+    parser.add_argument('--out', help=f'output directory (default: {OUTPUT_DIR})')
+    parser.add_argument('--mode', choices=output.OUTPUT_MODES, default='split',
+                        help='shared plotly.js with per-chart JSON (default), or standalone pages')
+    parser.add_argument('--force', action='store_true', help='rebuild figures that are up to date')
+    parser.add_argument('--list', action='store_true', help='list the figures and exit')
+    args = parser.parse_args(argv)
+
+    try:
+        figures = select(args.names, args.group)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if args.list:
+        for f in figures:
+            print(f"{f.name:<30} {f.group:<12} {', '.join(f.inputs)}")
+        return 0
+
+    print(f"Building {len(figures)} figure(s) with up to {args.workers} worker(s)...")
+    t0 = time.perf_counter()
+    results, fresh = build(figures, args.workers, args.out, on_result=report,
+                            force=args.force, mode=args.mode)
+    elapsed = time.perf_counter() - t0
+    for f in fresh:
+        print(f"  [--] {f.output} is up to date")
+
+    failed = [r for r in results if r.error]
+    print(f"\n{len(results) - len(failed)} built, {len(fresh)} up to date, {len(failed)} failed "
+          f"in {elapsed:.2f}s (figure time {sum(r.seconds for r in results):.2f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,385 @@
+"""
+Static matplotlib/seaborn chart definitions
+Every image in visualizations/static/ is a function registered with
+@chart: it reads its datasets through portfolio.loader and draws on the
+current (fresh) pyplot figure without saving it, so portfolio.render can
+draw the charts in parallel, write every size and format from one
+drawing, and redraw only those whose inputs or code changed.
+
+The functions were moved here from the plotting cells of
+notebooks/1_stock_market_analysis.ipynb to 4_market_intelligence_analysis.ipynb,
+which compute the same values from the processed files.
+"""
+import collections
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import seaborn as sns  # noqa: E402
+from matplotlib import font_manager  # noqa: E402
+
+from portfolio import loader  # noqa: E402
+
+# ``inputs`` are portfolio.loader dataset names; ``notebook`` is the one
+# the chart used to be saved from
+Chart = collections.namedtuple('Chart', 'name output inputs notebook draw')
+
+CHARTS = {}
+
+# Entity order of the notebooks' loops (and so of legends and panels)
+TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'META', 'NVDA']
+CRYPTO = ['BTC', 'ETH', 'SOL', 'MATIC']
+SENTIMENT_COINS = ['BTC', 'ETH', 'SOL', 'DOGE', 'SHIB']
+PROTOCOLS = ['Uniswap', 'Aave', 'Compound', 'Curve', 'Lido']
+COLORS = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E']
+# The notebooks' images were drawn in the style's first choice of font;
+# without it matplotlib quietly falls back to DejaVu Sans. The fallbacks
+# have Arial's metrics, so text keeps its size and the layout holds.
+FONT = 'Arial'
+FALLBACK_FONTS = ['Liberation Sans', 'Arimo']
+
+
+def chart(name, inputs, notebook):
+    """Register a drawing function as the chart ``name``.png."""
+    def register(draw):
+        CHARTS[name] = Chart(name, f'{name}.png', tuple(inputs), notebook, draw)
+        return draw
+    return register
+
+
+def font():
+    """FONT, or else the first installed FALLBACK_FONTS; None if neither is."""
+    for family in [FONT] + FALLBACK_FONTS:
+        try:
+            font_manager.findfont(font_manager.FontProperties(family=family),
+                                  fallback_to_default=False)
+        except ValueError:
+            continue
+        return family
+    return None
+
+
+def style(strict=False):
+    """The notebooks' plot style; call once per process before drawing.
+
+    Without FONT the charts are drawn in a fallback font, with a warning
+    since the images will not match the committed ones; with ``strict``
+    that raises RuntimeError instead.
+    """
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette('husl')
+    family = font()
+    if family != FONT:
+        message = (f"font {FONT!r} is not installed; drawing in {family or 'the default font'}, "
+                   f"so the charts will not match the committed images")
+        if strict:
+            raise RuntimeError(message)
+        warnings.warn(message, stacklevel=2)
+    if family:
+        plt.rcParams['font.sans-serif'] = [family]
+
+
+def _rows(frame, by, entity):
+    return frame[frame[by] == entity]
+
+
+# ==============================================================================
+# 1_stock_market_analysis.ipynb
+# ==============================================================================
+
+@chart('stock_price_trends_raw', ['stock_market_processed'], 1)
+def stock_price_trends_raw():
+    stock_data = loader.load('stock_market_processed')
+    plt.figure(figsize=(14, 8))
+    for ticker in TICKERS:
+        data = _rows(stock_data, 'ticker', ticker)
+        plt.plot(data['date'], data['close'], label=ticker, linewidth=2)
+
+    plt.title('Tech Stock Price Trends (Last 2 Years)', fontsize=16, fontweight='bold')
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Price ($)', fontsize=12)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+
+@chart('stock_correlation_heatmap', ['stock_correlations'], 1)
+def stock_correlation_heatmap():
+    correlation_matrix = loader.load('stock_correlations')
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0,
+                square=True, linewidths=1, cbar_kws={"shrink": 0.8})
+    plt.title('Tech Stock Return Correlations', fontsize=16, fontweight='bold')
+    plt.tight_layout()
+
+
+@chart('stock_normalized_performance', ['stock_market_processed'], 1)
+def stock_normalized_performance():
+    stock_data = loader.load('stock_market_processed')
+    pivot_close = stock_data.pivot(index='date', columns='ticker', values='close')
+    normalized_data = (pivot_close / pivot_close.iloc[0] - 1) * 100
+
+    plt.figure(figsize=(14, 8))
+    for ticker in TICKERS:
+        plt.plot(normalized_data.index, normalized_data[ticker], label=ticker, linewidth=2)
+
+    plt.title('Tech Stock Normalized Performance (% Change from Start)', fontsize=16,
+              fontweight='bold')
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Return (%)', fontsize=12)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+    plt.tight_layout()
+
+
+# ==============================================================================
+# 2_crypto_volatility_analysis.ipynb
+# ==============================================================================
+
+@chart('crypto_price_trends', ['crypto_processed'], 2)
+def crypto_price_trends():
+    crypto_data = loader.load('crypto_processed')
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
+    for ax, symbol in zip(axes.flatten(), CRYPTO):
+        data = _rows(crypto_data, 'coin', symbol)
+        ax.plot(data['date'], data['price'], linewidth=2, color='#2E86AB')
+        ax.set_title(f'{symbol} Price Trend', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Price (USD)')
+        ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+
+@chart('crypto_volatility_comparison', ['crypto_processed'], 2)
+def crypto_volatility_comparison():
+    crypto_data = loader.load('crypto_processed')
+    plt.figure(figsize=(14, 8))
+    for symbol in CRYPTO:
+        data = _rows(crypto_data, 'coin', symbol).dropna()
+        plt.plot(data['date'], data['volatility_30d'], label=symbol, linewidth=2)
+
+    plt.title('30-Day Rolling Volatility Comparison (Annualized %)', fontsize=16,
+              fontweight='bold')
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Volatility (%)', fontsize=12)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+
+@chart('crypto_returns_distribution', ['crypto_processed'], 2)
+def crypto_returns_distribution():
+    crypto_data = loader.load('crypto_processed')
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
+    for ax, symbol in zip(axes.flatten(), CRYPTO):
+        data = _rows(crypto_data, 'coin', symbol)['daily_return'].dropna() * 100
+        ax.hist(data, bins=50, alpha=0.7, color='#2E86AB', edgecolor='black')
+        ax.axvline(data.mean(), color='red', linestyle='--', linewidth=2,
+                   label=f'Mean: {data.mean():.2f}%')
+        ax.set_title(f'{symbol} Daily Returns Distribution', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Daily Return (%)')
+        ax.set_ylabel('Frequency')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+
+@chart('crypto_risk_return', ['crypto_risk_return'], 2)
+def crypto_risk_return():
+    risk_return = loader.load('crypto_risk_return')
+    plt.figure(figsize=(10, 8))
+    plt.scatter(risk_return['avg_volatility'], risk_return['annualized_return'],
+                s=500, alpha=0.6, c=COLORS[:len(risk_return)])
+
+    for _, row in risk_return.iterrows():
+        plt.annotate(row['coin'], (row['avg_volatility'], row['annualized_return']),
+                     fontsize=12, fontweight='bold', ha='center')
+
+    plt.title('Crypto Risk vs Return Profile', fontsize=16, fontweight='bold')
+    plt.xlabel('Average Volatility (% Annualized)', fontsize=12)
+    plt.ylabel('Annualized Return (%)', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+    plt.tight_layout()
+
+
+# ==============================================================================
+# 3_crypto_social_sentiment.ipynb
+# ==============================================================================
+
+@chart('social_sentiment_trends', ['social_sentiment_processed'], 3)
+def social_sentiment_trends():
+    sentiment_df = loader.load('social_sentiment_processed')
+    plt.figure(figsize=(14, 8))
+    for coin in SENTIMENT_COINS:
+        data = _rows(sentiment_df, 'coin', coin)
+        plt.plot(data['date'], data['sentiment_score'], label=coin, linewidth=2, marker='o')
+
+    plt.title('Social Sentiment Scores Over Time', fontsize=16, fontweight='bold')
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Sentiment Score (0-100)', fontsize=12)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.axhline(y=50, color='gray', linestyle='--', alpha=0.5, label='Neutral')
+    plt.tight_layout()
+
+
+@chart('social_volume_comparison', ['social_sentiment_processed'], 3)
+def social_volume_comparison():
+    sentiment_df = loader.load('social_sentiment_processed')
+    plt.figure(figsize=(14, 8))
+    for coin in SENTIMENT_COINS:
+        data = _rows(sentiment_df, 'coin', coin)
+        plt.plot(data['date'], data['social_volume'], label=coin, linewidth=2)
+
+    plt.title('Social Media Volume Comparison', fontsize=16, fontweight='bold')
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Social Volume', fontsize=12)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+
+@chart('avg_sentiment_by_coin', ['social_sentiment_processed'], 3)
+def avg_sentiment_by_coin():
+    sentiment_df = loader.load('social_sentiment_processed')
+    avg_sentiment = sentiment_df.groupby('coin', observed=True)['sentiment_score'].mean() \
+        .sort_values(ascending=False)
+
+    plt.figure(figsize=(10, 6))
+    bars = plt.bar(avg_sentiment.index.astype(str), avg_sentiment.values, color=COLORS)
+
+    plt.title('Average Social Sentiment by Cryptocurrency', fontsize=16, fontweight='bold')
+    plt.xlabel('Cryptocurrency', fontsize=12)
+    plt.ylabel('Average Sentiment Score', fontsize=12)
+    plt.axhline(y=50, color='gray', linestyle='--', alpha=0.5, label='Neutral')
+    plt.legend()
+    plt.grid(True, alpha=0.3, axis='y')
+
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width() / 2., height, f'{height:.1f}',
+                 ha='center', va='bottom', fontweight='bold')
+    plt.tight_layout()
+
+
+@chart('trending_coins_ranking', ['trending_coins'], 3)
+def trending_coins_ranking():
+    trending_df = loader.load('trending_coins')
+    plt.figure(figsize=(12, 6))
+
+    # Filter out items without market cap rank
+    ranked = trending_df[trending_df['market_cap_rank'] != 'N/A'].copy()
+    ranked['market_cap_rank'] = ranked['market_cap_rank'].astype(int)
+
+    plt.barh(ranked['symbol'], ranked['market_cap_rank'], color='#2E86AB', alpha=0.7)
+    plt.gca().invert_yaxis()  # Invert so rank 1 is at top
+    plt.gca().invert_xaxis()  # Invert x-axis so lower rank (better) is to the right
+
+    plt.title('Trending Coins by Market Cap Rank (Lower is Better)',
+              fontsize=16, fontweight='bold')
+    plt.xlabel('Market Cap Rank', fontsize=12)
+    plt.ylabel('Cryptocurrency', fontsize=12)
+    plt.grid(True, alpha=0.3, axis='x')
+    plt.tight_layout()
+
+
+# ==============================================================================
+# 4_market_intelligence_analysis.ipynb
+# ==============================================================================
+
+def _latest_tvl():
+    historical_df = loader.load('defi_historical_processed')
+    return historical_df.groupby('protocol', observed=True)['tvl_millions'].last() \
+        .sort_values(ascending=False)
+
+
+@chart('defi_tvl_trends', ['defi_historical_processed'], 4)
+def defi_tvl_trends():
+    historical_df = loader.load('defi_historical_processed')
+    plt.figure(figsize=(16, 8))
+    for protocol in PROTOCOLS:
+        data = _rows(historical_df, 'protocol', protocol)
+        plt.plot(data['date'], data['tvl_millions'], label=protocol, linewidth=2.5)
+
+    plt.title('DeFi Protocol TVL Trends (Last 6 Months)', fontsize=18, fontweight='bold', pad=20)
+    plt.xlabel('Date', fontsize=14)
+    plt.ylabel('Total Value Locked (Millions USD)', fontsize=14)
+    plt.legend(fontsize=12, loc='best')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+
+@chart('defi_current_tvl', ['defi_historical_processed'], 4)
+def defi_current_tvl():
+    latest_tvl = _latest_tvl()
+    plt.figure(figsize=(12, 8))
+    bars = plt.barh(latest_tvl.index.astype(str), latest_tvl.values, color=COLORS)
+
+    plt.title('Current Total Value Locked by Protocol', fontsize=18, fontweight='bold', pad=20)
+    plt.xlabel('TVL (Millions USD)', fontsize=14)
+    plt.ylabel('Protocol', fontsize=14)
+    plt.grid(True, alpha=0.3, axis='x')
+
+    for bar in bars:
+        width = bar.get_width()
+        plt.text(width, bar.get_y() + bar.get_height() / 2., f'${width:,.0f}M',
+                 ha='left', va='center', fontweight='bold', fontsize=11,
+                 bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+    plt.tight_layout()
+
+
+@chart('defi_market_share', ['defi_historical_processed'], 4)
+def defi_market_share():
+    latest_tvl = _latest_tvl()
+    plt.figure(figsize=(10, 10))
+    explode = (0.05, 0, 0, 0, 0)  # Slightly separate the largest slice
+
+    wedges, texts, autotexts = plt.pie(latest_tvl.values,
+                                       labels=latest_tvl.index.astype(str),
+                                       autopct='%1.1f%%',
+                                       colors=COLORS,
+                                       explode=explode[:len(latest_tvl)],
+                                       shadow=True,
+                                       startangle=90,
+                                       textprops={'fontsize': 12, 'fontweight': 'bold'})
+
+    plt.title('DeFi Market Share by TVL', fontsize=18, fontweight='bold', pad=20)
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontsize(13)
+    plt.tight_layout()
+
+
+@chart('defi_growth_rates', ['defi_growth_rates'], 4)
+def defi_growth_rates():
+    growth_df = loader.load('defi_growth_rates')
+    plt.figure(figsize=(12, 6))
+    colors_growth = ['green' if x > 0 else 'red' for x in growth_df['growth_30d']]
+    bars = plt.bar(growth_df['protocol'].astype(str), growth_df['growth_30d'],
+                   color=colors_growth, alpha=0.7)
+
+    plt.title('30-Day TVL Growth Rate by Protocol', fontsize=16, fontweight='bold', pad=20)
+    plt.xlabel('Protocol', fontsize=12)
+    plt.ylabel('Growth Rate (%)', fontsize=12)
+    plt.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
+    plt.grid(True, alpha=0.3, axis='y')
+
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width() / 2., height, f'{height:.1f}%',
+                 ha='center', va='bottom' if height > 0 else 'top', fontweight='bold')
+    plt.tight_layout()
+
+
+@chart('defi_correlations', ['defi_correlations'], 4)
+def defi_correlations():
+    correlation_matrix = loader.load('defi_correlations')
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0,
+                square=True, linewidths=2, cbar_kws={"shrink": 0.8},
+                fmt='.2f', annot_kws={'fontsize': 11, 'fontweight': 'bold'})
+    plt.title('DeFi Protocol TVL Correlations', fontsize=16, fontweight='bold', pad=20)
+    plt.tight_layout()
@@ -0,0 +1,289 @@
+"""
+Columnar binary copies of the processed datasets
+Each CSV in data/processed/ gets a directory under data/processed/columnar/
+holding one memory-mappable .npy file per column, with rows sorted by entity
+and date, plus an index.json sidecar that records every entity's row range
+and date bounds. A single ticker/coin/protocol is then a zero-copy slice
+of the mapped arrays. The CSVs remain the interchange format; a store is
+only trusted while its source CSV's mtime and size are unchanged.
+
+Usage (from the project root):
+    python -m portfolio.columnar            # convert every stale dataset
+    python -m portfolio.columnar stocks     # just one
+    python -m portfolio columnar            # same, via the package CLI
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+
+from portfolio import PROJECT_ROOT
+from portfolio.datasets import DATASETS
+
+FORMAT_VERSION = 1
+COLUMNAR_DIR = 'data/processed/columnar'
+
+
+def store_path(dataset, root=PROJECT_ROOT):
+    stem = os.path.splitext(os.path.basename(dataset.path))[0]
+    return os.path.join(root, COLUMNAR_DIR, stem)
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+
+def write_store(dataset, frame, root=PROJECT_ROOT):
+    """Write ``frame`` (the parsed CSV) as a columnar store for ``dataset``."""
+    source = os.path.join(root, dataset.path)
+    stamp = _source_stamp(source)
+
+    # Entities keep the order they first appear in the CSV, rows within an
+    # entity are sorted by date; np.lexsort is stable, so ties keep file order
+    entity_values = frame[dataset.entity_column].to_numpy()
+    _, first_seen, codes = np.unique(entity_values, return_index=True, return_inverse=True)
+    rank = np.argsort(np.argsort(first_seen))[codes]
+    keys = [rank]
+    if dataset.date_column:
+        keys.insert(0, frame[dataset.date_column].to_numpy())
+    frame = frame.iloc[np.lexsort(keys)].reset_index(drop=True)
+
+    final = store_path(dataset, root)
+    building = f"{final}.tmp{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        np.save(os.path.join(building, f"{name}.npy"), values, allow_pickle=False)
+        columns[name] = {'file': f"{name}.npy", 'dtype': values.dtype.str}
+
+    date_unit = None
+    if dataset.date_column:
+        dates = frame[dataset.date_column]
+        # Keep the CSV's precision when the dates are turned back into text
+        date_unit = 'us' if (dates.dt.microsecond != 0).any() else 's'
+
+    entities = {}
+    codes = frame[dataset.entity_column].to_numpy()
+    boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate([[0], boundaries])
+    stops = np.concatenate([boundaries, [len(frame)]])
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        if stop == start:
+            continue
+        info = {'start': start, 'stop': stop}
+        if dataset.date_column:
+            info['first'] = str(frame[dataset.date_column].iloc[start])
+            info['last'] = str(frame[dataset.date_column].iloc[stop - 1])
+        entities[str(codes[start])] = info
+
+    index = {
+        'format_version': FORMAT_VERSION,
+        'dataset': dataset.name,
+        'source': dict(stamp, path=dataset.path),
+        'rows': len(frame),
+        'entity_column': dataset.entity_column,
+        'date_column': dataset.date_column,
+        'date_unit': date_unit,
+        'columns': columns,
+        'order': list(frame.columns),
+        'entities': entities,
+    }
+    with open(os.path.join(building, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=1)
+
+    retired = f"{final}.old{os.getpid()}"
+    if os.path.exists(final):
+        os.rename(final, retired)
+    os.rename(building, final)
+    shutil.rmtree(retired, ignore_errors=True)
+    return final
+
+
+def convert(dataset, root=PROJECT_ROOT, force=False):
+    """Convert one dataset's CSV; returns the store path, or None if it was fresh."""
+    if not force and ColumnarStore.open(dataset, root) is not None:
+        return None
+    import pandas as pd
+
+    # round_trip parsing keeps every float bit-identical to the CSV text
+    frame = pd.read_csv(os.path.join(root, dataset.path), float_precision='round_trip')
+    if dataset.date_column:
+        frame[dataset.date_column] = pd.to_datetime(frame[dataset.date_column])
+    return write_store(dataset, frame, root)
+
+
+class ColumnarStore:
+    """Read side of a columnar store; columns are memory-mapped on first use."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json')) as f:
+            self.index = json.load(f)
+        self.rows = self.index['rows']
+        self.columns = self.index['order']
+        self.entity_column = self.index['entity_column']
+        self.date_column = self.index['date_column']
+        self.entities = self.index['entities']
+        self.mtime_ns = self.index['source']['mtime_ns']
+        self._arrays = {}
+
+    @classmethod
+    def open(cls, dataset, root=PROJECT_ROOT):
+        """Return the store for ``dataset``, or None if it is missing or stale."""
+        directory = store_path(dataset, root)
+        try:
+            store = cls(directory)
+            stamp = _source_stamp(os.path.join(root, dataset.path))
+        except (OSError, ValueError):
+            return None
+        source = store.index['source']
+        if (store.index.get('format_version') != FORMAT_VERSION
+                or (source['mtime_ns'], source['size']) != (stamp['mtime_ns'], stamp['size'])):
+            return None
+        return store
+
+    def column(self, name, entity=None):
+        """The whole column, or one entity's contiguous slice of it (no copy)."""
+        array = self._arrays.get(name)
+        if array is None:
+            spec = self.index['columns'][name]
+            array = np.load(os.path.join(self.directory, spec['file']), mmap_mode='r')
+            self._arrays[name] = array
+        if entity is None:
+            return array
+        info = self.entities[entity]
+        return array[info['start']:info['stop']]
+
+    def rows_between(self, entity, start=None, end=None):
+        """Absolute ``(lo, hi)`` row bounds of ``entity`` within a date range.
+
+        ``start`` and ``end`` are inclusive ISO date prefixes, so ``end`` of
+        '2024-10-05' (or '2024-10') covers the whole day (or month).
+        """
+        info = self.entities[entity]
+        lo, hi = info['start'], info['stop']
+        if self.date_column and (start or end):
+            dates = self.column(self.date_column, entity)
+            if start:
+                lo = info['start'] + int(np.searchsorted(dates, np.datetime64(start), 'left'))
+            if end:
+                # datetime64('2024-10-05') + 1 is the next day in its own unit
+                upper = np.datetime64(end) + 1
+                hi = info['start'] + int(np.searchsorted(dates, upper, 'left'))
+        return lo, max(lo, hi)
+
+    def to_frame(self, entities=None, columns=None, start=None, end=None):
+        """Materialise a pandas DataFrame for the selected rows and columns."""
+        import pandas as pd
+
+        columns = columns or self.columns
+        if entities is None and not (start or end):
+            return pd.DataFrame({c: np.asarray(self.column(c)) for c in columns})
+        ranges = [self.rows_between(e, start, end)
+                  for e in (entities if entities is not None else self.entities)
+                  if e in self.entities]
+        picks = np.concatenate([np.arange(lo, hi) for lo, hi in ranges]) if ranges else np.arange(0)
+        return pd.DataFrame({c: np.asarray(self.column(c))[picks] for c in columns})
+
+
+def _json_values(values):
+    # NaN is not valid JSON; missing values become null as they do from the CSV index
+    if values.dtype.kind == 'f':
+        return [None if math.isnan(v) else v for v in values.tolist()]
+    return values.tolist()
+
+
+class ColumnarDatasetIndex:
+    """Drop-in replacement for datasets.DatasetIndex backed by a ColumnarStore."""
+
+    def __init__(self, dataset, store):
+        self.dataset = dataset
+        self.store = store
+        self.columns = store.columns
+        self.entities = list(store.entities)
+        self.rows = store.rows
+        self.mtime_ns = store.mtime_ns
+
+    def describe(self):
+        firsts = [info['first'] for info in self.store.entities.values() if 'first' in info]
+        lasts = [info['last'] for info in self.store.entities.values() if 'last' in info]
+        return {
+            'entity_column': self.dataset.entity_column,
+            'date_column': self.dataset.date_column,
+            'columns': self.columns,
+            'entities': sorted(self.entities),
+            'start': min(firsts) if firsts else None,
+            'end': max(lasts) if lasts else None,
+            'rows': self.rows,
+        }
+
+    def _format_dates(self, values):
+        text = np.datetime_as_string(values, unit=self.store.index['date_unit'])
+        return [t.replace('T', ' ') for t in text.tolist()]
+
+    def query(self, entities=None, start=None, end=None, columns=None, limit=None):
+        """Same contract as DatasetIndex.query(); raises ValueError on bad input."""
+        columns = columns or self.columns
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise ValueError(f"unknown column(s): {', '.join(unknown)}")
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        if (start or end) and not self.dataset.date_column:
+            raise ValueError(f"dataset '{self.dataset.name}' has no date column")
+
+        data = {c: [] for c in columns}
+        truncated = False
+        for entity in (entities if entities is not None else self.entities):
+            if entity not in self.store.entities:
+                continue
+            lo, hi = self.store.rows_between(entity, start, end)
+            if limit is not None and hi - lo > limit:
+                hi = lo + limit
+                truncated = True
+            for c in columns:
+                values = self.store.column(c)[lo:hi]
+                if c == self.dataset.date_column:
+                    data[c].extend(self._format_dates(values))
+                else:
+                    data[c].extend(_json_values(values))
+
+        return {
+            'dataset': self.dataset.name,
+            'entity_column': self.dataset.entity_column,
+            'date_column': self.dataset.date_column,
+            'columns': columns,
+            'rows': len(data[columns[0]]) if columns else 0,
+            'truncated': truncated,
+            'data': data,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio.columnar',
+                                     description="Write columnar copies of data/processed CSVs")
+    parser.add_argument('names', nargs='*', help='datasets to convert (default: all with dates)')
+    parser.add_argument('--force', action='store_true', help='rewrite stores that are up to date')
+    args = parser.parse_args(argv)
+
+    names = args.names or [name for name, d in DATASETS.items() if d.date_column]
+    for name in names:
+        dataset = DATASETS[name]
+        written = convert(dataset, force=args.force)
+        if written:
+            print(f"  [OK] {dataset.path} -> {os.path.relpath(written, PROJECT_ROOT)}")
+        else:
+            print(f"  [--] {dataset.path} is up to date")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,413 @@
+"""
+Blockwise correlation engine for large ticker universes
+stock_correlations.csv and defi_correlations.csv are one
+pivot(...).corr() over the whole history. That is fine for five
+tickers, but for thousands it builds the full dense matrix in one step,
+and rolling-window correlations, sparse output and clustering are
+missing. Here:
+
+- correlation() and pairs() compute the matrix in stripes of
+  BLOCK_COLUMNS columns against all columns, each stripe one matrix
+  product over standardized values (or over pairwise-complete sums when
+  values are missing, matching DataFrame.corr()). Stripes can run in a
+  process pool with ``workers``. pairs() keeps only each column's
+  ``top`` strongest partners and/or those above ``threshold`` per stripe,
+  so the dense matrix never exists at once.
+- RollingCorrelation keeps the pairwise sums of the last ``window`` rows
+  and updates them by one rank-1 product per new row, O(columns**2)
+  instead of recomputing the window. rolling_pairs() uses it to emit
+  the sparse pairs of every window, and its state can be saved and
+  loaded so new returns are appended as they arrive.
+- cluster_order() gives an average-linkage clustering order for the
+  heatmap, with numpy only.
+
+Usage (from the project root):
+    python -m portfolio correlation --check     # compare with the *_correlations.csv files
+    python -m portfolio correlation stocks --top 3
+    python -m portfolio correlation stocks --window 60 --threshold 0.7 --out pairs.csv
+"""
+import argparse
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from portfolio import PROJECT_ROOT
+
+# Columns per stripe: a stripe of correlations is BLOCK_COLUMNS x columns
+BLOCK_COLUMNS = 512
+WINDOW = 60
+# Largest absolute difference from a saved matrix that --check accepts
+TOLERANCE = 1e-9
+
+Dataset = collections.namedtuple('Dataset', 'source by value matrix pairs')
+
+DATASETS = {
+    'stocks': Dataset('data/processed/stock_market_processed.csv', 'ticker', 'daily_return',
+                      'data/processed/stock_correlations.csv',
+                      'data/processed/stock_correlation_pairs.csv'),
+    'defi': Dataset('data/processed/defi_historical_processed.csv', 'protocol', 'tvl_millions',
+                    'data/processed/defi_correlations.csv',
+                    'data/processed/defi_correlation_pairs.csv'),
+}
+
+
+def wide(frame, by, value, date='date'):
+    """One column per entity and one row per date, as the notebooks pivot."""
+    return frame.pivot(index=date, columns=by, values=value)
+
+
+def _from_sums(n, sx, sy, sxx, syy, sxy, min_periods=1):
+    """Pearson correlations from pairwise-complete sums of shifted values."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / n
+        r = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+    r[n < max(min_periods, 2)] = np.nan
+    return np.clip(r, -1.0, 1.0, out=r)
+
+
+class _Values:
+    """Values of a wide frame prepared once for stripe products."""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values).all(axis=1)]
+        mask = ~np.isnan(values)
+        self.columns = values.shape[1]
+        self.complete = bool(mask.all())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.complete:
+                centered = values - values.mean(axis=0)
+                # Zero-variance columns become NaN, as in DataFrame.corr()
+                self.z = centered / np.sqrt((centered * centered).sum(axis=0))
+            else:
+                # Shifting by the column mean keeps the sums well conditioned
+                reference = np.nan_to_num(np.nanmean(np.where(mask, values, np.nan), axis=0))
+                self.x = np.where(mask, values - reference, 0.0)
+                self.x2 = self.x * self.x
+                self.m = mask.astype(np.float64)
+
+    def stripe(self, start, stop):
+        """Correlations of columns start:stop with every column."""
+        if self.complete:
+            z = self.z[:, start:stop]
+            r = np.clip(z.T @ self.z, -1.0, 1.0)
+        else:
+            x, x2, m = self.x[:, start:stop], self.x2[:, start:stop], self.m[:, start:stop]
+            r = _from_sums(m.T @ self.m, x.T @ self.m, m.T @ self.x,
+                           x2.T @ self.m, m.T @ self.x2, x.T @ self.x)
+        rows = np.arange(stop - start)
+        diagonal = r[rows, start + rows]
+        r[rows, start + rows] = np.where(np.isnan(diagonal), np.nan, 1.0)
+        return r
+
+
+def _select(r, start, top=None, threshold=None):
+    """(a, b, r) of each row's ``top`` strongest pairs and/or those with |r| >= threshold."""
+    rows = np.arange(len(r))
+    strength = np.abs(r)
+    strength[rows, start + rows] = np.nan
+    strength = np.nan_to_num(strength, nan=-1.0)
+    if threshold is not None:
+        strength[strength < threshold] = -1.0
+    if top is not None and top < r.shape[1]:
+        cols = np.argpartition(-strength, top - 1, axis=1)[:, :top]
+        rows = np.repeat(rows, top)
+        cols = cols.ravel()
+    else:
+        rows, cols = np.indices(r.shape).reshape(2, -1)
+    keep = strength[rows, cols] >= 0
+    rows, cols = rows[keep], cols[keep]
+    return start + rows, cols, r[rows, cols]
+
+
+_worker_values = None
+
+
+def _init_worker(values):
+    global _worker_values
+    _worker_values = values
+
+
+def _worker_stripe(start, stop, top, threshold, sparse):
+    r = _worker_values.stripe(start, stop)
+    return (start, _select(r, start, top, threshold)) if sparse else (start, r)
+
+
+def _stripes(values, block, workers, top=None, threshold=None, sparse=False):
+    """(start, stripe or selected pairs) for every stripe, in order."""
+    bounds = [(start, min(start + block, values.columns))
+              for start in range(0, values.columns, block)]
+    if (workers or 1) <= 1 or len(bounds) == 1:
+        _init_worker(values)
+        try:
+            for start, stop in bounds:
+                yield _worker_stripe(start, stop, top, threshold, sparse)
+        finally:
+            _init_worker(None)
+        return
+    # numpy's BLAS may already use several threads per product; processes
+    # help most with many small stripes
+    with ProcessPoolExecutor(max_workers=min(workers, len(bounds)), initializer=_init_worker,
+                             initargs=(values,)) as pool:
+        futures = [pool.submit(_worker_stripe, start, stop, top, threshold, sparse)
+                   for start, stop in bounds]
+        for future in futures:
+            yield future.result()
+
+
+def correlation(frame, block=BLOCK_COLUMNS, workers=None):
+    """Dense correlation matrix of ``frame``'s columns, like ``frame.corr()``."""
+    values = _Values(frame.to_numpy(np.float64))
+    r = np.empty((values.columns, values.columns))
+    for start, stripe in _stripes(values, block, workers):
+        r[start:start + len(stripe)] = stripe
+    return pd.DataFrame(r, index=frame.columns.copy(), columns=frame.columns.copy())
+
+
+def _pair_frame(columns, a, b, r):
+    # Each pair once, first column first
+    a, b = np.minimum(a, b), np.maximum(a, b)
+    _, first = np.unique(a * len(columns) + b, return_index=True)
+    columns = np.asarray(columns)
+    return pd.DataFrame({'a': columns[a[first]], 'b': columns[b[first]],
+                         'correlation': r[first]})
+
+
+def pairs(frame, top=None, threshold=None, block=BLOCK_COLUMNS, workers=None):
+    """Sparse correlations of ``frame``'s columns as rows ``a, b, correlation``.
+
+    Keeps each column's ``top`` strongest partners by |r|, those with
+    |r| >= ``threshold``, or both (a pair is kept when either column
+    selects it). Memory is one stripe plus the kept pairs.
+    """
+    if top is None and threshold is None:
+        raise ValueError("pairs() needs top or threshold")
+    values = _Values(frame.to_numpy(np.float64))
+    selected = [pair for _, pair in _stripes(values, block, workers, top, threshold, True)]
+    a, b, r = (np.concatenate(part) for part in zip(*selected))
+    return _pair_frame(frame.columns, a, b, r)
+
+
+class RollingCorrelation:
+    """Pairwise-complete correlation sums over the last ``window`` rows.
+
+    Values are shifted by ``reference`` (one value per column, e.g. the
+    column means) before summing to keep the sums well conditioned.
+    Column names are kept as strings, so the state can be saved as arrays.
+    """
+
+    def __init__(self, columns, window=WINDOW, reference=None):
+        self.columns = [str(column) for column in columns]
+        self.window = window
+        size = len(self.columns)
+        self.reference = np.zeros(size) if reference is None else np.nan_to_num(
+            np.asarray(reference, dtype=np.float64))
+        self.rows = collections.deque(maxlen=window)
+        self.pushes = 0
+        self._reset()
+
+    def _reset(self):
+        size = len(self.columns)
+        self.n, self.sx, self.sxx, self.sxy = (np.zeros((size, size)) for _ in range(4))
+
+    def _apply(self, rows, sign):
+        mask = ~np.isnan(rows)
+        x = np.where(mask, rows - self.reference, 0.0)
+        m = mask.astype(np.float64)
+        self.n += sign * (m.T @ m)
+        self.sx += sign * (x.T @ m)
+        self.sxx += sign * ((x * x).T @ m)
+        self.sxy += sign * (x.T @ x)
+
+    def push(self, row):
+        """Add one row of values (one per column, NaN when missing)."""
+        row = np.asarray(row, dtype=np.float64)
+        if len(self.rows) == self.window:
+            self._apply(self.rows[0][None], -1)
+        self.rows.append(row)
+        self._apply(row[None], 1)
+        self.pushes += 1
+        if self.pushes % self.window == 0:
+            # Recompute exactly once per window length so rounding cannot accumulate
+            self._reset()
+            self._apply(np.array(self.rows), 1)
+
+    def update(self, frame):
+        """Add the rows of a wide frame with (a subset of) the same columns."""
+        frame = frame.rename(columns=str)
+        unknown = set(frame.columns) - set(self.columns)
+        if unknown:
+            raise ValueError(f"unknown column(s): {', '.join(map(str, sorted(unknown)))}")
+        values = frame.reindex(columns=self.columns).to_numpy(np.float64)
+        for row in values:
+            self.push(row)
+
+    @property
+    def full(self):
+        return len(self.rows) == self.window
+
+    def _matrix(self, min_periods):
+        r = _from_sums(self.n, self.sx, self.sx.T, self.sxx, self.sxx.T, self.sxy, min_periods)
+        diagonal = np.diagonal(r).copy()
+        np.fill_diagonal(r, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return r
+
+    def matrix(self, min_periods=None):
+        """Correlations over the current window; pairs with fewer than
+        ``min_periods`` (default: the window) common values are NaN, as
+        in ``frame.rolling(window).corr()``."""
+        r = self._matrix(self.window if min_periods is None else min_periods)
+        return pd.DataFrame(r, index=self.columns, columns=self.columns)
+
+    def pairs(self, top=None, threshold=None, min_periods=None):
+        """Sparse correlations over the current window, as in pairs()."""
+        r = self._matrix(self.window if min_periods is None else min_periods)
+        return _pair_frame(self.columns, *_select(r, 0, top, threshold))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        rows = np.array(self.rows) if self.rows else np.empty((0, len(self.columns)))
+        np.savez(tmp_path, columns=np.array(self.columns, dtype=str), window=self.window,
+                 reference=self.reference, rows=rows, pushes=self.pushes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            rolling = cls(state['columns'].tolist(), int(state['window']), state['reference'])
+            rows = state['rows']
+            pushes = int(state['pushes'])
+        # Replaying the kept rows rebuilds the sums; the resync phase follows pushes
+        rolling.pushes = pushes - len(rows)
+        for row in rows:
+            rolling.push(row)
+        return rolling
+
+
+def rolling_pairs(frame, window=WINDOW, top=None, threshold=None):
+    """Sparse correlations of every full window of ``frame``'s rows.
+
+    Rows ``date, a, b, correlation`` where ``date`` is the window's last
+    index value. Pairs need a complete window, as with
+    ``frame.rolling(window).corr()``.
+    """
+    if top is None and threshold is None:
+        raise ValueError("rolling_pairs() needs top or threshold")
+    rolling = RollingCorrelation(frame.columns, window,
+                                 frame.mean().to_numpy(np.float64))
+    parts = []
+    for date, row in zip(frame.index, frame.to_numpy(np.float64)):
+        rolling.push(row)
+        if rolling.full:
+            part = rolling.pairs(top, threshold)
+            part.insert(0, 'date', date)
+            parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=['date', 'a', 'b', 'correlation'])
+    return pd.concat(parts, ignore_index=True)
+
+
+def cluster_order(matrix):
+    """Column order of an average-linkage clustering on 1 - correlation.
+
+    Similar columns end up next to each other, which is what makes a large
+    heatmap readable. Undefined correlations count as 0. O(columns**2)
+    memory; merges reuse each row's nearest neighbour.
+    """
+    r = np.asarray(matrix, dtype=np.float64)
+    size = len(r)
+    if size < 3:
+        return list(range(size))
+    distance = 1.0 - np.nan_to_num(r, nan=0.0)
+    np.fill_diagonal(distance, np.inf)
+    counts = np.ones(size)
+    members = [[i] for i in range(size)]
+    active = np.ones(size, dtype=bool)
+    nearest = distance.argmin(axis=1)
+    everything = np.arange(size)
+    for _ in range(size - 1):
+        live = np.flatnonzero(active)
+        i = live[np.argmin(distance[live, nearest[live]])]
+        j = nearest[i]
+        merged = (counts[i] * distance[i] + counts[j] * distance[j]) / (counts[i] + counts[j])
+        distance[i] = distance[:, i] = merged
+        distance[j] = distance[:, j] = np.inf
+        distance[i, i] = np.inf
+        active[j] = False
+        counts[i] += counts[j]
+        members[i], members[j] = members[i] + members[j], None
+        stale = active & ((nearest == i) | (nearest == j))
+        stale[i] = True
+        nearest[stale] = distance[stale].argmin(axis=1)
+        closer = active & (distance[:, i] < distance[everything, nearest])
+        nearest[closer] = i
+    return members[np.flatnonzero(active)[0]]
+
+
+def reorder(matrix):
+    """A square correlation DataFrame in cluster_order()."""
+    order = cluster_order(matrix.to_numpy())
+    return matrix.iloc[order, order]
+
+
+def load(name, root=PROJECT_ROOT):
+    """Wide values of a DATASETS entry."""
+    dataset = DATASETS[name]
+    frame = pd.read_csv(os.path.join(root, dataset.source))
+    return wide(frame, dataset.by, dataset.value)
+
+
+def check(root=PROJECT_ROOT):
+    """Largest absolute difference from each dataset's saved correlation CSV."""
+    result = {}
+    for name, dataset in DATASETS.items():
+        expected = pd.read_csv(os.path.join(root, dataset.matrix), index_col=0)
+        actual = correlation(load(name, root)).loc[expected.index, expected.columns]
+        result[dataset.matrix] = float(np.nanmax(np.abs(actual.to_numpy() - expected.to_numpy())))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio correlation',
+                                     description="Blockwise and rolling correlations")
+    parser.add_argument('dataset', nargs='?', choices=sorted(DATASETS))
+    parser.add_argument('--check', action='store_true',
+                        help='recompute the saved correlation matrices and compare')
+    parser.add_argument('--window', type=int,
+                        help='rolling window in rows (default: the whole history)')
+    parser.add_argument('--top', type=int, help="keep each column's N strongest pairs")
+    parser.add_argument('--threshold', type=float, help='keep pairs with |r| >= T')
+    parser.add_argument('--workers', type=int, default=1, help='processes for the stripes')
+    parser.add_argument('--out', help='pairs CSV (default: next to the dataset)')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failed = 0
+        for path, worst in check().items():
+            ok = worst <= TOLERANCE
+            failed += not ok
+            print(f"  [{'OK' if ok else 'FAIL'}] {path} {'matches' if ok else 'differs'} "
+                  f"(max absolute difference {worst:.1e})")
+        return 1 if failed else 0
+    if not args.dataset:
+        parser.error("a dataset or --check is required")
+    if args.top is None and args.threshold is None:
+        parser.error("--top or --threshold is required")
+
+    frame = load(args.dataset)
+    if args.window:
+        result = rolling_pairs(frame, args.window, args.top, args.threshold)
+    else:
+        result = pairs(frame, args.top, args.threshold, workers=args.workers)
+    out = args.out or os.path.join(PROJECT_ROOT, DATASETS[args.dataset].pairs)
+    result.to_csv(out, index=False)
+    print(f"  [OK] Wrote {len(result)} pairs to {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
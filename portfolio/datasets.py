@@ -0,0 +1,248 @@
+"""
+Dataset catalog and in-memory query index for data/processed/
+Backs the /api/datasets endpoints in serve.py, so the playground can fetch
+just the entities, dates and columns it plots instead of whole CSVs.
+
+Only the standard library is used here so the server runs without pandas.
+When numpy is installed and a fresh columnar store exists (see
+portfolio/columnar.py), the catalog serves from that instead of the CSV.
+Downsampled series for zoomable charts (/api/series, see
+portfolio/downsample.py) need numpy.
+"""
+import bisect
+import collections
+import csv
+import os
+import threading
+
+from portfolio import PROJECT_ROOT
+
+Dataset = collections.namedtuple('Dataset', 'name path entity_column date_column')
+
+# Keyed by the names the playground uses
+DATASETS = {
+    'stocks': Dataset('stocks', 'data/processed/stock_market_processed.csv', 'ticker', 'date'),
+    'crypto': Dataset('crypto', 'data/processed/crypto_processed.csv', 'coin', 'date'),
+    'crypto-risk': Dataset('crypto-risk', 'data/processed/crypto_risk_return.csv', 'coin', None),
+    'sentiment': Dataset('sentiment', 'data/processed/social_sentiment_processed.csv', 'coin', 'date'),
+    'defi': Dataset('defi', 'data/processed/defi_historical_processed.csv', 'protocol', 'date'),
+}
+
+
+def _parse_column(values):
+    """Convert a column of CSV strings to ints or floats when every value allows it."""
+    for convert in (int, float):
+        try:
+            return [convert(v) if v != '' else None for v in values]
+        except ValueError:
+            continue
+    return [v if v != '' else None for v in values]
+
+
+class DatasetIndex:
+    """One processed CSV held column-wise, grouped by entity and sorted by date.
+
+    Queries select entities by key, narrow to a date range with a binary
+    search over each entity's sorted dates and project only the requested
+    columns, so their cost depends on the rows returned rather than on the
+    size of the file.
+    """
+
+    def __init__(self, dataset, root=PROJECT_ROOT):
+        self.dataset = dataset
+        path = os.path.join(root, dataset.path)
+        with open(path, newline='') as f:
+            self.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            reader = csv.reader(f)
+            self.columns = next(reader)
+            rows = [row for row in reader if row]
+
+        entity_pos = self.columns.index(dataset.entity_column)
+        date_pos = self.columns.index(dataset.date_column) if dataset.date_column else None
+
+        groups = collections.defaultdict(list)
+        for row in rows:
+            groups[row[entity_pos]].append(row)
+
+        self.rows = len(rows)
+        self.entities = list(groups)
+        self._dates = {}
+        self._series = {}
+        for entity, group in groups.items():
+            if date_pos is not None:
+                # Stable sort keeps file order for equal timestamps
+                group.sort(key=lambda row: row[date_pos])
+                self._dates[entity] = [row[date_pos] for row in group]
+            columns = zip(*group)
+            self._series[entity] = {
+                name: (list(values) if pos in (entity_pos, date_pos) else _parse_column(values))
+                for pos, (name, values) in enumerate(zip(self.columns, columns))
+            }
+
+    def describe(self):
+        dates = [d for series in self._dates.values() for d in (series[0], series[-1]) if series]
+        return {
+            'entity_column': self.dataset.entity_column,
+            'date_column': self.dataset.date_column,
+            'columns': self.columns,
+            'entities': sorted(self.entities),
+            'start': min(dates) if dates else None,
+            'end': max(dates) if dates else None,
+            'rows': self.rows,
+        }
+
+    def query(self, entities=None, start=None, end=None, columns=None, limit=None):
+        """Return the matching rows as ``{column: [values]}`` plus metadata.
+
+        ``start`` and ``end`` are inclusive and compared as ISO date prefixes,
+        so ``end='2024-10-05'`` includes every timestamp on that day.
+        ``limit`` caps the rows returned per entity (earliest first).
+        Raises ValueError for unknown columns or a negative limit.
+        """
+        columns = columns or self.columns
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise ValueError(f"unknown column(s): {', '.join(unknown)}")
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        if (start or end) and not self.dataset.date_column:
+            raise ValueError(f"dataset '{self.dataset.name}' has no date column")
+
+        data = {c: [] for c in columns}
+        truncated = False
+        for entity in (entities if entities is not None else self.entities):
+            series = self._series.get(entity)
+            if series is None:
+                continue
+            lo, hi = 0, len(series[columns[0]])
+            if self.dataset.date_column:
+                dates = self._dates[entity]
+                if start:
+                    lo = bisect.bisect_left(dates, start)
+                if end:
+                    hi = bisect.bisect_right(dates, end + '\uffff')
+            if limit is not None and hi - lo > limit:
+                hi = lo + limit
+                truncated = True
+            for c in columns:
+                data[c].extend(series[c][lo:hi])
+
+        return {
+            'dataset': self.dataset.name,
+            'entity_column': self.dataset.entity_column,
+            'date_column': self.dataset.date_column,
+            'columns': columns,
+            'rows': len(data[columns[0]]) if columns else 0,
+            'truncated': truncated,
+            'data': data,
+        }
+
+
+def _open_columnar_index(dataset, root):
+    try:
+        from portfolio import columnar
+    except ImportError:
+        # numpy is not installed; stay on the CSV
+        return None
+    store = columnar.ColumnarStore.open(dataset, root)
+    return columnar.ColumnarDatasetIndex(dataset, store) if store is not None else None
+
+
+class DatasetCatalog:
+    """Lazily built index per dataset, rebuilt when its CSV changes.
+
+    A fresh columnar store is preferred over parsing the CSV.
+    """
+
+    def __init__(self, datasets=DATASETS, root=PROJECT_ROOT):
+        self.datasets = datasets
+        self.root = root
+        self._indexes = {}
+        self._pyramids = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """Return the index for ``name``; raises KeyError for unknown datasets."""
+        dataset = self.datasets[name]
+        mtime_ns = os.stat(os.path.join(self.root, dataset.path)).st_mtime_ns
+        with self._lock:
+            index = self._indexes.get(name)
+            if index is None or index.mtime_ns != mtime_ns:
+                index = (_open_columnar_index(dataset, self.root)
+                         or DatasetIndex(dataset, self.root))
+                self._indexes[name] = index
+            return index
+
+    def describe(self):
+        return {name: self.get(name).describe() for name in self.datasets}
+
+    def pyramid(self, name, entity, column):
+        """Return the SeriesPyramid of one entity's ``column`` by date, built on first use.
+
+        Missing values are dropped. Raises KeyError for unknown datasets,
+        ValueError for bad arguments and ImportError without numpy.
+        """
+        import numpy as np
+        from portfolio.downsample import SeriesPyramid
+
+        index = self.get(name)
+        dataset = index.dataset
+        if not dataset.date_column:
+            raise ValueError(f"dataset '{name}' has no date column")
+        if column not in index.columns or column in (dataset.date_column, dataset.entity_column):
+            raise ValueError(f"unknown column: {column}")
+        if entity not in index.entities:
+            raise ValueError(f"unknown {dataset.entity_column}: {entity}")
+
+        key = (name, entity, column)
+        with self._lock:
+            cached = self._pyramids.get(key)
+        if cached is not None and cached[0] is index:
+            return cached[1]
+
+        data = index.query(entities=[entity], columns=[dataset.date_column, column])['data']
+        x = np.array(data[dataset.date_column], dtype='datetime64[us]')
+        try:
+            y = np.array([np.nan if v is None else v for v in data[column]], dtype=np.float64)
+        except ValueError:
+            raise ValueError(f"column '{column}' is not numeric") from None
+        keep = ~np.isnan(y)
+        pyramid = SeriesPyramid(x[keep], y[keep])
+        with self._lock:
+            self._pyramids[key] = (index, pyramid)
+        return pyramid
+
+    def series(self, name, entity, column, start=None, end=None, points=None):
+        """Downsampled ``{x, y}`` of one series between ``start`` and ``end``.
+
+        ``start``/``end`` are ISO dates or timestamps (inclusive); at most
+        ``points`` points are returned, at full resolution when they fit.
+        """
+        import numpy as np
+        from portfolio import downsample
+
+        pyramid = self.pyramid(name, entity, column)
+        bounds = []
+        for value in (start, end):
+            try:
+                bounds.append(np.datetime64(value.replace(' ', 'T'), 'us') if value else None)
+            except ValueError:
+                raise ValueError(f"invalid date: {value}") from None
+        if end and len(end) <= 10:
+            # A bare date covers the whole day, as in DatasetIndex.query()
+            bounds[1] += np.timedelta64(1, 'D') - np.timedelta64(1, 'us')
+        points = downsample.DEFAULT_POINTS if points is None else points
+        if points < 2:
+            raise ValueError("points must be at least 2")
+
+        level, rows = pyramid.select(bounds[0], bounds[1], points)
+        return {
+            'dataset': name,
+            'entity': entity,
+            'column': column,
+            'level': level,
+            'total': len(pyramid),
+            'points': len(rows),
+            'x': downsample.iso_dates(pyramid.x[rows]),
+            'y': pyramid.y[rows].tolist(),
+        }
@@ -0,0 +1,146 @@
+"""
+Downsampling of long time series for the interactive charts
+Charts embed a coarse version of each long series (largest-triangle-
+three-buckets, which keeps the visual shape) and fetch finer detail from
+serve.py's /api/series/ endpoint as the user zooms in. The server keeps a
+SeriesPyramid per series: the full data plus levels reduced by FACTOR
+each time with min/max decimation (vectorized, and it keeps every
+spike), so a request for any date range is answered from the finest
+level that fits the point budget. The number of points sent for a view
+is therefore bounded however long the series is.
+
+Works on numpy arrays; x values are datetime64 or numbers, sorted.
+"""
+import numpy as np
+
+# Each pyramid level has about 1/FACTOR of the points of the one below
+FACTOR = 4
+# Stop adding levels once one has at most this many points
+MIN_LEVEL_POINTS = 1000
+# Default point budget for one trace in a view
+DEFAULT_POINTS = 2000
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        return x.astype('datetime64[ns]').view('int64').astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points chosen by largest-triangle-three-buckets.
+
+    The first and last points are always kept. Returns every index when
+    the series already has ``n_out`` points or fewer.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)])
+    x = _numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets of (nearly) equal size between the fixed end points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    bucket_count = n_out - 2
+    next_x = np.empty(bucket_count)
+    next_y = np.empty(bucket_count)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    # Each bucket looks ahead to the mean of the next one; the last to the end point
+    next_x[:-1] = sums_x[1:] / sizes[1:]
+    next_y[:-1] = sums_y[1:] / sizes[1:]
+    next_x[-1], next_y[-1] = x[-1], y[-1]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(bucket_count):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y, n_out):
+    """Indices keeping the minimum and maximum of ``n_out // 2`` equal buckets, in order."""
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    bucket = np.arange(n) * buckets // n
+    # Within each bucket, sorted by value: the first row is the min, the last the max
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    stops = np.append(starts[1:], n)
+    return np.unique(np.concatenate([order[starts], order[stops - 1]]))
+
+
+class SeriesPyramid:
+    """A series with precomputed min/max levels for bounded range queries."""
+
+    def __init__(self, x, y, factor=FACTOR, min_points=MIN_LEVEL_POINTS):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.levels = [np.arange(len(self.y))]
+        while len(self.levels[-1]) > min_points:
+            target = len(self.levels[-1]) // factor
+            coarser = self.levels[-1][minmax(self.y[self.levels[-1]], target)]
+            if len(coarser) >= len(self.levels[-1]):
+                break
+            self.levels.append(coarser)
+
+    def __len__(self):
+        return len(self.y)
+
+    def select(self, start=None, end=None, points=DEFAULT_POINTS):
+        """Return ``(level, indices)`` for the points between ``start`` and ``end``.
+
+        ``level`` 0 is full resolution and is returned whenever the range
+        holds at most ``points`` rows. Otherwise the range of the coarsest
+        level with more than ``points`` rows (at most about FACTOR times as
+        many, unless it is the last level) is reduced to ``points`` with LTTB.
+        """
+        previous = None
+        for level, rows in enumerate(self.levels):
+            xs = self.x[rows]
+            lo = np.searchsorted(xs, start, 'left') if start is not None else 0
+            hi = np.searchsorted(xs, end, 'right') if end is not None else len(rows)
+            if hi - lo <= points:
+                if previous is None:
+                    return level, rows[lo:hi]
+                break
+            previous = level, rows[lo:hi]
+        level, rows = previous
+        return level, rows[lttb(self.x[rows], self.y[rows], points)]
+
+
+def iso_dates(x):
+    """datetime64 values as ISO strings, with microseconds only when present."""
+    x = np.asarray(x, dtype='datetime64[us]')
+    whole_seconds = not (x.view('int64') % 1_000_000).any()
+    return np.datetime_as_string(x, unit='s' if whole_seconds else 'us').tolist()
+
+
+def trace_xy(dataset, entity, column, x, y, max_points=DEFAULT_POINTS, live=False):
+    """``x``, ``y`` (and ``meta``) keyword arguments for a line trace of one series.
+
+    A series longer than ``max_points`` is reduced with LTTB (``x`` keeps
+    its type, so a DatetimeIndex stays one) and gets a ``meta.lod`` entry
+    naming the /api/series/<dataset> query the chart shell uses on zoom.
+    With ``live``, ``meta.live`` names the serve.py /api/live/<dataset>
+    channel whose new rows the shell appends to the trace.
+    """
+    meta = {}
+    if live:
+        meta['live'] = {'dataset': dataset, 'entity': str(entity), 'column': column}
+    if max_points is None or len(y) <= max_points:
+        return {'x': x, 'y': y, 'meta': meta} if meta else {'x': x, 'y': y}
+    keep = lttb(x, y, max_points)
+    meta['lod'] = {'dataset': dataset, 'entity': str(entity), 'column': column, 'total': len(y)}
+    return {'x': x[keep], 'y': y[keep], 'meta': meta}
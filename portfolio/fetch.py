@@ -0,0 +1,381 @@
+"""
+Concurrent, rate-limited market-data fetching
+The notebooks call ``requests.get`` once per ticker or coin, one after
+another, without a session, retries or rate limiting beyond a
+``time.sleep(1)``, and always re-download the whole history. Here:
+
+- Client keeps one pooled requests.Session per provider and sends
+  requests from a thread pool, each after taking a token from the
+  provider's TokenBucket, so the provider's limit is respected however
+  many threads wait.
+- Failed requests (connection errors, timeouts, 429 and 5xx) are retried
+  with exponential backoff and jitter, honouring Retry-After.
+- refresh() reads the raw CSV's last date per symbol and requests only
+  later dates. Each symbol's new rows are appended as soon as they arrive,
+  so an interrupted refresh resumes where it stopped.
+- messari_metrics() and lunarcrush_coins() fetch the notebooks' current
+  snapshots through the same client.
+
+API keys come from the POLYGON_API_KEY, COINGECKO_API_KEY,
+LUNARCRUSH_API_KEY and MESSARI_API_KEY environment variables. Rates
+default to the providers' free tiers; pass ``rate`` for paid plans.
+
+Usage (from the project root):
+    python -m portfolio fetch stocks                      # every ticker in the raw CSV
+    python -m portfolio fetch crypto bitcoin solana --workers 8
+    python -m portfolio fetch stocks AAPL --base-url http://127.0.0.1:8765 --rate 100
+
+benchmarks/fetch_bench.py runs refresh() against a local stub server.
+"""
+import argparse
+import collections
+import datetime
+import email.utils
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from portfolio import PROJECT_ROOT
+
+Provider = collections.namedtuple('Provider', 'name base_url rate burst key_env key_header '
+                                              'key_prefix key_param')
+
+# rate is requests per second, burst the bucket size
+PROVIDERS = {
+    'polygon': Provider('polygon', 'https://api.polygon.io', 5 / 60, 5,
+                        'POLYGON_API_KEY', None, '', 'apiKey'),
+    'coingecko': Provider('coingecko', 'https://api.coingecko.com/api/v3', 30 / 60, 5,
+                          'COINGECKO_API_KEY', 'x-cg-demo-api-key', '', None),
+    'lunarcrush': Provider('lunarcrush', 'https://lunarcrush.com/api3', 10 / 60, 5,
+                           'LUNARCRUSH_API_KEY', 'Authorization', 'Bearer ', None),
+    'messari': Provider('messari', 'https://data.messari.io/api/v1', 20 / 60, 5,
+                        'MESSARI_API_KEY', 'x-messari-api-key', '', None),
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A request that failed for good (after retries, or with a 4xx status)."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, at most ``capacity``."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token now; waiting callers queue up behind it
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        """Take no tokens for ``seconds`` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+def _retry_after(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        date = email.utils.parsedate_to_datetime(value)
+        return max(0.0, date.timestamp() - time.time())
+
+
+class Client:
+    """Pooled, rate-limited, retrying JSON client for one provider."""
+
+    def __init__(self, provider, api_key=None, base_url=None, rate=None, workers=8,
+                 retries=5, backoff=0.5, max_backoff=30.0, timeout=30.0):
+        self.provider = PROVIDERS[provider] if isinstance(provider, str) else provider
+        self.api_key = api_key if api_key is not None else os.environ.get(
+            self.provider.key_env, '')
+        self.base_url = (base_url or self.provider.base_url).rstrip('/')
+        self.bucket = TokenBucket(rate or self.provider.rate,
+                                  self.provider.burst if rate is None else max(1, int(rate)))
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        # One connection per worker thread, reused across requests
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if self.api_key and self.provider.key_header:
+            self.session.headers[self.provider.key_header] = \
+                f"{self.provider.key_prefix}{self.api_key}"
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, path, params=None):
+        """GET ``path`` and return its JSON; raises FetchError."""
+        params = dict(params or {})
+        if self.api_key and self.provider.key_param:
+            params[self.provider.key_param] = self.api_key
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            delay = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                error = f"HTTP {response.status_code} for {path}"
+                if response.status_code not in RETRY_STATUS:
+                    raise FetchError(error)
+                delay = _retry_after(response)
+                if delay is not None:
+                    # Holds back every thread, this one included, in acquire()
+                    self.bucket.pause(delay)
+            if attempt == self.retries:
+                break
+            if delay is None:
+                # Full jitter keeps retrying threads from moving in lockstep
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+        raise FetchError(f"{error} (after {self.retries + 1} attempts)")
+
+    def get_many(self, jobs):
+        """Run ``{key: (path, params)}`` concurrently; yields ``(key, json or FetchError)``
+        in completion order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.get, path, params): key
+                       for key, (path, params) in jobs.items()}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except FetchError as e:
+                    yield futures[future], e
+
+
+# ==============================================================================
+# Time series datasets (incremental)
+# ==============================================================================
+
+def _polygon_request(ticker, start, end):
+    path = f"/v2/aggs/ticker/{ticker}/range/1/day/{start:%Y-%m-%d}/{end:%Y-%m-%d}"
+    return path, {'adjusted': 'true', 'sort': 'asc', 'limit': 50000}
+
+
+def _polygon_parse(ticker, data):
+    frame = pd.DataFrame(data.get('results') or [], columns=['t', 'o', 'h', 'l', 'c', 'v'])
+    frame['ticker'] = ticker
+    frame['date'] = pd.to_datetime(frame['t'], unit='ms')
+    return frame[['date', 'ticker', 'o', 'h', 'l', 'c', 'v']].rename(columns={
+        'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'})
+
+
+def _coingecko_request(coin_id, start, end):
+    # market_chart counts days back from now; older points are dropped after parsing
+    days = max(1, (datetime.date.today() - start).days + 1)
+    return f"/coins/{coin_id}/market_chart", {'vs_currency': 'usd', 'days': days,
+                                              'interval': 'daily'}
+
+
+def _coingecko_parse(symbol, data):
+    prices = pd.DataFrame(data.get('prices') or [], columns=['timestamp', 'price'])
+    frame = pd.DataFrame({'date': pd.to_datetime(prices['timestamp'], unit='ms'),
+                          'coin': symbol, 'price': prices['price']})
+    frame['volume'] = [v for _, v in data.get('total_volumes') or []][:len(frame)]
+    frame['market_cap'] = [v for _, v in data.get('market_caps') or []][:len(frame)]
+    return frame
+
+
+# weekdays: the market only trades Monday to Friday, so weekends need no request
+Series = collections.namedtuple('Series', 'provider path entity history weekdays symbols '
+                                          'request parse')
+
+SERIES = {
+    'stocks': Series('polygon', 'data/raw/stock_market_data.csv', 'ticker', 730, True,
+                     {t: t for t in ['AAPL', 'MSFT', 'GOOGL', 'META', 'NVDA']},
+                     _polygon_request, _polygon_parse),
+    # CoinGecko ids and the symbols stored for them
+    'crypto': Series('coingecko', 'data/raw/crypto_data.csv', 'coin', 365, False,
+                     {'bitcoin': 'BTC', 'ethereum': 'ETH', 'solana': 'SOL',
+                      'matic-network': 'MATIC'},
+                     _coingecko_request, _coingecko_parse),
+}
+
+RefreshResult = collections.namedtuple('RefreshResult', 'symbol rows error')
+
+
+def last_dates(path, entity):
+    """Last stored date per entity of a raw CSV (empty when it does not exist)."""
+    if not os.path.exists(path):
+        return {}
+    frame = pd.read_csv(path, usecols=['date', entity], parse_dates=['date'])
+    return frame.groupby(entity)['date'].max().to_dict()
+
+
+def refresh(name, symbols=None, client=None, root=PROJECT_ROOT, path=None, end=None,
+            on_result=None):
+    """Fetch the rows of SERIES ``name`` after each symbol's last stored date.
+
+    ``symbols`` are request symbols (CoinGecko ids for crypto; default:
+    the series' defaults plus every symbol already stored). New rows are
+    appended to the raw CSV per symbol as they arrive. Returns one
+    RefreshResult per symbol that needed fetching.
+    """
+    series = SERIES[name]
+    path = path or os.path.join(root, series.path)
+    end = end or datetime.date.today()
+    stored = last_dates(path, series.entity)
+    names = dict(series.symbols)
+    if symbols:
+        names = {s: names.get(s, s) for s in symbols}
+    else:
+        names.update({s: s for s in stored if s not in names.values()})
+
+    jobs, after = {}, {}
+    for symbol, entity in names.items():
+        last = stored.get(entity)
+        start = last.date() + datetime.timedelta(days=1) if last is not None else \
+            end - datetime.timedelta(days=series.history)
+        if start > end or series.weekdays and not np.busday_count(
+                start, end + datetime.timedelta(days=1)):
+            continue
+        after[symbol] = last
+        jobs[symbol] = series.request(symbol, start, end)
+
+    own_client = client is None
+    client = client or Client(series.provider)
+    results = []
+    write_header = not os.path.exists(path)
+    try:
+        for symbol, data in client.get_many(jobs):
+            if isinstance(data, FetchError):
+                result = RefreshResult(symbol, 0, str(data))
+            else:
+                rows = series.parse(names[symbol], data)
+                if after[symbol] is not None:
+                    rows = rows[rows['date'] > after[symbol]]
+                if len(rows):
+                    rows.to_csv(path, mode='a', header=write_header, index=False)
+                    write_header = False
+                result = RefreshResult(symbol, len(rows), None)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    finally:
+        if own_client:
+            client.close()
+    return results
+
+
+# ==============================================================================
+# Snapshots
+# ==============================================================================
+
+PROTOCOLS = {'uniswap': 'Uniswap', 'aave': 'Aave', 'compound': 'Compound',
+             'curve-dao-token': 'Curve', 'lido-dao': 'Lido'}
+
+
+def messari_metrics(protocols=PROTOCOLS, client=None):
+    """Current Messari metrics per protocol slug, one row each (failures are skipped)."""
+    own_client = client is None
+    client = client or Client('messari')
+    rows = []
+    try:
+        jobs = {slug: (f"/assets/{slug}/metrics", None) for slug in protocols}
+        for slug, data in client.get_many(jobs):
+            if isinstance(data, FetchError) or 'data' not in data:
+                continue
+            metrics = data['data']
+            market = metrics.get('market_data') or {}
+            rows.append({
+                'protocol': protocols[slug],
+                'slug': slug,
+                'market_cap': (metrics.get('marketcap') or {}).get('current_marketcap_usd', 0),
+                'volume_24h': market.get('volume_last_24_hours', 0),
+                'price': market.get('price_usd', 0),
+                'percent_change_24h': market.get('percent_change_usd_last_24_hours', 0),
+                'all_time_high': (metrics.get('all_time_high') or {}).get('price', 0),
+            })
+    finally:
+        if own_client:
+            client.close()
+    order = {slug: i for i, slug in enumerate(protocols)}
+    return pd.DataFrame(sorted(rows, key=lambda row: order[row['slug']]))
+
+
+def lunarcrush_coins(symbols, data_points=30, client=None):
+    """LunarCrush's daily social metrics per symbol, as returned (failures are skipped)."""
+    own_client = client is None
+    client = client or Client('lunarcrush')
+    try:
+        jobs = {symbol: ('/coins', {'symbol': symbol, 'data_points': data_points,
+                                    'interval': 'day'}) for symbol in symbols}
+        return {symbol: data for symbol, data in client.get_many(jobs)
+                if not isinstance(data, FetchError)}
+    finally:
+        if own_client:
+            client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio fetch',
+                                     description="Fetch new market data into data/raw/")
+    parser.add_argument('series', choices=sorted(SERIES))
+    parser.add_argument('symbols', nargs='*', help='symbols to fetch (default: all known)')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent requests')
+    parser.add_argument('--rate', type=float, help="requests per second (default: the "
+                                                   "provider's free tier)")
+    parser.add_argument('--base-url', help='API root, e.g. a local stub server')
+    args = parser.parse_args(argv)
+
+    series = SERIES[args.series]
+    t0 = time.perf_counter()
+
+    def report(result):
+        if result.error:
+            print(f"  [FAIL] {result.symbol}: {result.error}")
+        else:
+            print(f"  [OK] {result.symbol:<16} {result.rows:>6} new rows")
+
+    with Client(series.provider, base_url=args.base_url, rate=args.rate,
+                workers=args.workers) as client:
+        results = refresh(args.series, args.symbols, client, on_result=report)
+    failed = [r for r in results if r.error]
+    print(f"\n{sum(r.rows for r in results)} rows for {len(results) - len(failed)} symbol(s), "
+          f"{len(failed)} failed in {time.perf_counter() - t0:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
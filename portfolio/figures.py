@@ -0,0 +1,655 @@
+"""
+Interactive Plotly figure definitions
+Every chart in visualizations/interactive/ is a function registered with
+@figure: it reads its datasets through portfolio.loader and returns a
+plotly Figure without writing anything, so portfolio.build can render the
+figures independently and in parallel, and rebuild only those whose
+inputs or code changed.
+
+The functions were moved here from notebooks/create_interactive_visualizations.py
+(Week 2 - Day 1-3) and notebooks/create_advanced_visualizations.py
+(multi-chart dashboards and correlation matrices).
+"""
+import collections
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+from plotly.subplots import make_subplots
+
+from portfolio import align, correlation, downsample, loader, spec, traces, trendline, webgl
+
+# ``inputs`` are portfolio.loader dataset names; ``group`` is the script
+# that used to build the figure; ``params`` are passed to ``build`` as
+# keyword arguments and are part of the figure's build cache key
+Figure = collections.namedtuple('Figure', 'name output inputs group build params')
+
+FIGURES = {}
+
+
+def figure(name, inputs, group, **params):
+    """Register a figure builder that writes visualizations/interactive/<name>.html."""
+    def register(build):
+        FIGURES[name] = Figure(name, f'{name}.html', tuple(inputs), group, build, params)
+        return build
+    return register
+
+
+def metric_dropdown(grouped, x_column, metrics, colors, **menu):
+    """Figure with a line per entity of ``grouped`` and a dropdown choosing the metric.
+
+    ``metrics`` maps column names to (button label, y axis title); the first
+    is shown initially. ``menu`` positions the dropdown. Each metric's arrays
+    appear once in the written JSON however many buttons refer to them (see
+    portfolio/arrays.py), so dozens of metrics cost their data and no more.
+    """
+    columns = list(metrics)
+    fig = go.Figure()
+    for entity, data in grouped.items([x_column, columns[0]]):
+        fig.add_trace(go.Scatter(
+            x=data[x_column],
+            y=data[columns[0]],
+            name=entity,
+            line=dict(color=colors.get(entity, '#333'), width=3),
+            visible=True
+        ))
+
+    buttons = [
+        dict(label=label,
+             method="update",
+             args=[{"y": [grouped.column(column, e) for e in grouped.entities]},
+                   {"yaxis.title.text": axis_title}])
+        for column, (label, axis_title) in metrics.items()
+    ]
+    fig.update_layout(updatemenus=[dict(active=0, buttons=buttons, **menu)])
+    return fig
+
+
+# ==============================================================================
+# 1. STOCK MARKET INTERACTIVE VISUALIZATION
+# ==============================================================================
+
+@figure('stock_price_trends', ['stock_market_processed'], 'interactive',
+        max_points=downsample.DEFAULT_POINTS, point_budget=webgl.DEFAULT_POINT_BUDGET)
+def stock_price_trends(max_points, point_budget):
+    stock_data = loader.load('stock_market_processed')
+
+    # Create interactive line chart with all stocks
+    fig_stocks = go.Figure()
+
+    stocks = traces.group(stock_data, 'ticker')
+    colors = {'AAPL': '#2E86AB', 'MSFT': '#A23B72', 'GOOGL': '#F18F01',
+              'META': '#C73E1D', 'NVDA': '#6A994E'}
+
+    for ticker, data in stocks.items(['date', 'close']):
+        fig_stocks.add_trace(go.Scatter(
+            **downsample.trace_xy('stocks', ticker, 'close', data['date'], data['close'],
+                                  max_points, live=True),
+            mode='lines',
+            name=ticker,
+            line=dict(color=colors.get(ticker, '#333'), width=3),
+            hovertemplate='<b>%{fullData.name}</b><br>' +
+                         'Date: %{x|%Y-%m-%d}<br>' +
+                         'Price: $%{y:,.2f}<br>' +
+                         '<extra></extra>'
+        ))
+
+    fig_stocks.update_layout(
+        title={
+            'text': 'Tech Stock Price Trends: FAANG Performance Over 2 Years',
+            'font': {'size': 24, 'family': 'Arial Black'}
+        },
+        xaxis_title='Date',
+        yaxis_title='Stock Price (USD)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=14)
+        ),
+        xaxis=dict(
+            rangeslider=dict(visible=True),
+            type='date'
+        )
+    )
+    return webgl.apply(fig_stocks, point_budget)
+
+
+# ==============================================================================
+# 2. CRYPTO VOLATILITY INTERACTIVE VISUALIZATION
+# ==============================================================================
+
+@figure('crypto_volatility', ['crypto_processed'], 'interactive',
+        max_points=downsample.DEFAULT_POINTS, point_budget=webgl.DEFAULT_POINT_BUDGET)
+def crypto_volatility(max_points, point_budget):
+    crypto_data = loader.load('crypto_processed')
+
+    # Create interactive volatility comparison
+    fig_crypto_vol = go.Figure()
+
+    crypto_colors = {'BTC': '#F7931A', 'ETH': '#627EEA', 'SOL': '#14F195', 'MATIC': '#8247E5'}
+
+    coins = traces.group(crypto_data, 'coin')
+    for coin, data in coins.items(['date', 'volatility_30d'], dropna=['volatility_30d']):
+        fig_crypto_vol.add_trace(go.Scatter(
+            **downsample.trace_xy('crypto', coin, 'volatility_30d', data['date'],
+                                  data['volatility_30d'], max_points, live=True),
+            mode='lines',
+            name=coin,
+            line=dict(color=crypto_colors.get(coin, '#333'), width=3),
+            hovertemplate='<b>%{fullData.name}</b><br>' +
+                         'Date: %{x|%Y-%m-%d}<br>' +
+                         'Volatility: %{y:.2f}%<br>' +
+                         '<extra></extra>'
+        ))
+
+    fig_crypto_vol.update_layout(
+        title={
+            'text': 'Cryptocurrency 30-Day Rolling Volatility: Risk Comparison',
+            'font': {'size': 24, 'family': 'Arial Black'}
+        },
+        xaxis_title='Date',
+        yaxis_title='Annualized Volatility (%)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=14)
+        )
+    )
+    return webgl.apply(fig_crypto_vol, point_budget)
+
+
+@figure('crypto_risk_return', ['crypto_risk_return'], 'interactive')
+def crypto_risk_return():
+    risk_return = loader.load('crypto_risk_return')
+
+    fig_risk_return = go.Figure()
+
+    fig_risk_return.add_trace(go.Scatter(
+        x=risk_return['avg_volatility'],
+        y=risk_return['annualized_return'],
+        mode='markers+text',
+        text=risk_return['coin'],
+        textposition='top center',
+        textfont=dict(size=16, family='Arial Black'),
+        marker=dict(
+            size=30,
+            color=risk_return['annualized_return'],
+            colorscale='RdYlGn',
+            showscale=True,
+            colorbar=dict(title="Return %"),
+            line=dict(width=2, color='white')
+        ),
+        hovertemplate='<b>%{text}</b><br>' +
+                     'Volatility: %{x:.2f}%<br>' +
+                     'Return: %{y:.2f}%<br>' +
+                     '<extra></extra>'
+    ))
+
+    fig_risk_return.update_layout(
+        title={
+            'text': 'Crypto Risk vs Return: Find the Sweet Spot',
+            'font': {'size': 24, 'family': 'Arial Black'}
+        },
+        xaxis_title='Average Volatility (% Annualized)',
+        yaxis_title='Annualized Return (%)',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        showlegend=False
+    )
+
+    fig_risk_return.add_hline(y=0, line_dash="dash", line_color="gray",
+                             annotation_text="Break-even", annotation_position="right")
+    return fig_risk_return
+
+
+# ==============================================================================
+# 3. DEFI PROTOCOL INTERACTIVE VISUALIZATION
+# ==============================================================================
+
+@figure('defi_tvl_trends', ['defi_historical_processed'], 'interactive',
+        max_points=downsample.DEFAULT_POINTS, point_budget=webgl.DEFAULT_POINT_BUDGET)
+def defi_tvl_trends(max_points, point_budget):
+    defi_data = loader.load('defi_historical_processed')
+
+    # Create interactive TVL trends
+    fig_defi = go.Figure()
+
+    protocol_colors = {
+        'Uniswap': '#FF007A',
+        'Aave': '#B6509E',
+        'Compound': '#00D395',
+        'Curve': '#0445FF',
+        'Lido': '#73CBFF'
+    }
+
+    protocols = traces.group(defi_data, 'protocol')
+    for protocol, data in protocols.items(['date', 'tvl_millions']):
+        fig_defi.add_trace(go.Scatter(
+            **downsample.trace_xy('defi', protocol, 'tvl_millions', data['date'],
+                                  data['tvl_millions'], max_points, live=True),
+            mode='lines',
+            name=protocol,
+            line=dict(color=protocol_colors.get(protocol, '#333'), width=3),
+            hovertemplate='<b>%{fullData.name}</b><br>' +
+                         'Date: %{x|%Y-%m-%d}<br>' +
+                         'TVL: $%{y:,.0f}M<br>' +
+                         '<extra></extra>'
+        ))
+
+    fig_defi.update_layout(
+        title={
+            'text': 'DeFi Protocol Total Value Locked: 6-Month Battle for Dominance',
+            'font': {'size': 24, 'family': 'Arial Black'}
+        },
+        xaxis_title='Date',
+        yaxis_title='Total Value Locked (Millions USD)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=14)
+        )
+    )
+    return webgl.apply(fig_defi, point_budget)
+
+
+@figure('defi_growth_rates', ['defi_growth_rates'], 'interactive')
+def defi_growth_rates():
+    growth_data = loader.load('defi_growth_rates')
+    growth_data = growth_data.sort_values('growth_30d', ascending=True)
+
+    fig_growth = go.Figure()
+
+    colors_growth = ['#d62728' if x < 0 else '#2ca02c' for x in growth_data['growth_30d']]
+
+    fig_growth.add_trace(go.Bar(
+        y=growth_data['protocol'],
+        x=growth_data['growth_30d'],
+        orientation='h',
+        marker=dict(
+            color=colors_growth,
+            line=dict(color='white', width=2)
+        ),
+        text=[f"{val:.1f}%" for val in growth_data['growth_30d']],
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>' +
+                     '30-Day Growth: %{x:.2f}%<br>' +
+                     '<extra></extra>'
+    ))
+
+    fig_growth.update_layout(
+        title={
+            'text': 'DeFi 30-Day Growth Rates: Winners & Losers',
+            'font': {'size': 24, 'family': 'Arial Black'}
+        },
+        xaxis_title='Growth Rate (%)',
+        yaxis_title='Protocol',
+        template='plotly_white',
+        height=500,
+        font=dict(size=12),
+        showlegend=False
+    )
+
+    fig_growth.add_vline(x=0, line_dash="solid", line_color="black", line_width=1)
+    return fig_growth
+
+
+# ==============================================================================
+# 4. SOCIAL SENTIMENT INTERACTIVE VISUALIZATION
+# ==============================================================================
+
+@figure('social_sentiment', ['social_sentiment_processed'], 'interactive',
+        max_points=downsample.DEFAULT_POINTS, point_budget=webgl.DEFAULT_POINT_BUDGET)
+def social_sentiment(max_points, point_budget):
+    sentiment_data = loader.load('social_sentiment_processed')
+
+    # Create interactive sentiment heatmap
+    fig_sentiment = go.Figure()
+
+    sentiment_coins = traces.group(sentiment_data, 'coin')
+    for coin, data in sentiment_coins.items(['date', 'sentiment_score']):
+        fig_sentiment.add_trace(go.Scatter(
+            **downsample.trace_xy('sentiment', coin, 'sentiment_score', data['date'],
+                                  data['sentiment_score'], max_points),
+            mode='lines+markers',
+            name=coin,
+            line=dict(width=3),
+            marker=dict(size=6),
+            hovertemplate='<b>%{fullData.name}</b><br>' +
+                         'Date: %{x|%Y-%m-%d}<br>' +
+                         'Sentiment: %{y:.1f}/100<br>' +
+                         '<extra></extra>'
+        ))
+
+    fig_sentiment.update_layout(
+        title={
+            'text': 'Crypto Social Sentiment Tracker: What\'s Buzzing?',
+            'font': {'size': 24, 'family': 'Arial Black'}
+        },
+        xaxis_title='Date',
+        yaxis_title='Sentiment Score (0-100)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=14)
+        ),
+        yaxis=dict(range=[0, 100])
+    )
+
+    fig_sentiment.add_hline(y=50, line_dash="dash", line_color="gray",
+                           annotation_text="Neutral", annotation_position="right")
+    return webgl.apply(fig_sentiment, point_budget)
+
+
+# ==============================================================================
+# 5. MULTI-ASSET PERFORMANCE DASHBOARD
+# ==============================================================================
+
+@figure('multi_asset_dashboard', ['stock_market_processed', 'crypto_processed'], 'advanced',
+        max_points=downsample.DEFAULT_POINTS, point_budget=webgl.DEFAULT_POINT_BUDGET)
+def multi_asset_dashboard(max_points, point_budget):
+    stock_data = loader.load('stock_market_processed')
+    crypto_data = loader.load('crypto_processed')
+    stocks = traces.group(stock_data, 'ticker')
+    coins = traces.group(crypto_data, 'coin')
+
+    # Create subplots dashboard
+    fig_dashboard = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Tech Stocks Price Trends', 'Crypto Price Trends',
+                       'Stock Daily Returns Distribution', 'Crypto Volatility'),
+        specs=[[{"secondary_y": False}, {"secondary_y": False}],
+               [{"type": "histogram"}, {"secondary_y": False}]],
+        vertical_spacing=0.12,
+        horizontal_spacing=0.1
+    )
+
+    # Subplot 1: Stock prices
+    tickers = ['AAPL', 'MSFT', 'GOOGL']
+    colors_stock = {'AAPL': '#2E86AB', 'MSFT': '#A23B72', 'GOOGL': '#F18F01'}
+
+    for ticker, data in stocks.items(['date', 'close'], entities=tickers):
+        fig_dashboard.add_trace(
+            go.Scatter(**downsample.trace_xy('stocks', ticker, 'close', data['date'],
+                                             data['close'], max_points),
+                       name=ticker,
+                       line=dict(color=colors_stock[ticker], width=2)),
+            row=1, col=1
+        )
+
+    # Subplot 2: Crypto prices
+    cryptos = ['BTC', 'ETH']
+    colors_crypto = {'BTC': '#F7931A', 'ETH': '#627EEA'}
+
+    for coin, data in coins.items(['date', 'price'], entities=cryptos):
+        fig_dashboard.add_trace(
+            go.Scatter(**downsample.trace_xy('crypto', coin, 'price', data['date'],
+                                             data['price'], max_points),
+                       name=coin,
+                       line=dict(color=colors_crypto[coin], width=2)),
+            row=1, col=2
+        )
+
+    # Subplot 3: Stock returns histogram
+    for ticker in tickers:
+        data = stocks.column('daily_return', ticker, dropna=True) * 100
+        fig_dashboard.add_trace(
+            go.Histogram(x=data, name=f'{ticker} Returns', opacity=0.6,
+                        marker=dict(color=colors_stock[ticker])),
+            row=2, col=1
+        )
+
+    # Subplot 4: Crypto volatility
+    for coin, data in coins.items(['date', 'volatility_30d'], entities=cryptos,
+                                  dropna=['volatility_30d']):
+        fig_dashboard.add_trace(
+            go.Scatter(**downsample.trace_xy('crypto', coin, 'volatility_30d', data['date'],
+                                             data['volatility_30d'], max_points),
+                       name=f'{coin} Vol',
+                       line=dict(color=colors_crypto[coin], width=2)),
+            row=2, col=2
+        )
+
+    # Update layout
+    fig_dashboard.update_layout(
+        title_text="Multi-Asset Market Dashboard: Stocks vs Crypto",
+        title_font_size=22,
+        height=800,
+        showlegend=True,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+
+    fig_dashboard.update_xaxes(title_text="Date", row=1, col=1)
+    fig_dashboard.update_xaxes(title_text="Date", row=1, col=2)
+    fig_dashboard.update_xaxes(title_text="Daily Return (%)", row=2, col=1)
+    fig_dashboard.update_xaxes(title_text="Date", row=2, col=2)
+
+    fig_dashboard.update_yaxes(title_text="Price (USD)", row=1, col=1)
+    fig_dashboard.update_yaxes(title_text="Price (USD)", row=1, col=2)
+    fig_dashboard.update_yaxes(title_text="Frequency", row=2, col=1)
+    fig_dashboard.update_yaxes(title_text="Volatility (%)", row=2, col=2)
+    return webgl.apply(fig_dashboard, point_budget)
+
+
+# ==============================================================================
+# 6. CORRELATION MATRIX HEATMAP (Interactive)
+# ==============================================================================
+
+@figure('stock_correlation_matrix', ['stock_correlations'], 'advanced', max_labels=30)
+def stock_correlation_matrix(max_labels):
+    # Clustered order puts tickers that move together next to each other
+    stock_corr = correlation.reorder(loader.load('stock_correlations'))
+    # Cell labels are unreadable (and heavy) beyond a few dozen tickers
+    labels = len(stock_corr) <= max_labels
+
+    # Create interactive heatmap
+    fig_corr = go.Figure(data=go.Heatmap(
+        z=stock_corr.values,
+        x=stock_corr.columns,
+        y=stock_corr.index,
+        colorscale='RdBu',
+        zmid=0,
+        text=stock_corr.values if labels else None,
+        texttemplate='%{text:.2f}' if labels else None,
+        textfont={"size": 14, "family": "Arial Black"},
+        hovertemplate='%{x} vs %{y}<br>Correlation: %{z:.3f}<extra></extra>',
+        colorbar=dict(title="Correlation")
+    ))
+
+    fig_corr.update_layout(
+        title={
+            'text': 'Tech Stock Correlation Matrix: How Tech Giants Move Together',
+            'font': {'size': 22, 'family': 'Arial Black'}
+        },
+        xaxis_title='Stock Ticker',
+        yaxis_title='Stock Ticker',
+        height=600,
+        width=700,
+        template='plotly_white'
+    )
+    return fig_corr
+
+
+# ==============================================================================
+# 7. ANIMATED CRYPTO PRICE TRENDS
+# ==============================================================================
+
+@figure('crypto_animated_prices', ['crypto_processed'], 'advanced')
+def crypto_animated_prices():
+    crypto_data = loader.load('crypto_processed')
+
+    # Prepare data for animation
+    crypto_anim_data = crypto_data[crypto_data['coin'].isin(['BTC', 'ETH', 'SOL'])].copy()
+    crypto_anim_data['date_str'] = crypto_anim_data['date'].dt.strftime('%Y-%m-%d')
+    dates = crypto_anim_data['date_str'].unique()
+    rows = crypto_anim_data.groupby(['date_str', 'coin'], sort=False).indices
+
+    # Plotly Express builds a whole figure per date, which takes seconds. Let
+    # it animate each coin's first row over two placeholder dates (it adds
+    # the slider and buttons only for more than one frame) and use the
+    # result as the validated template for every real frame.
+    placeholder = '{date_str}'
+    first_rows = crypto_anim_data.groupby('coin', sort=False).head(1)
+    sample = pd.concat([first_rows.assign(date_str=placeholder),
+                        first_rows.assign(date_str=placeholder + '+1')])
+    fig_template = px.scatter(
+        sample,
+        x='date',
+        y='price',
+        color='coin',
+        size='volume',
+        animation_frame='date_str',
+        animation_group='coin',
+        color_discrete_map={'BTC': '#F7931A', 'ETH': '#627EEA', 'SOL': '#14F195'},
+        labels={'price': 'Price (USD)', 'date': 'Date', 'volume': 'Volume'},
+        title='Animated Crypto Price Evolution with Volume',
+        range_y=[0, crypto_anim_data['price'].max() * 1.1]
+    )
+
+    fig_template.update_layout(
+        height=600,
+        template='plotly_white',
+        title_font_size=22
+    )
+    fig_anim = spec.to_spec(fig_template)
+
+    # Marker areas are scaled to the largest volume of the whole animation
+    sizeref = crypto_anim_data['volume'].max() / 20 ** 2
+    columns = {name: crypto_anim_data[name].to_numpy() for name in ['date', 'price', 'volume']}
+    frames = []
+    for date in dates:
+        data = []
+        for template in fig_anim['data']:
+            picks = rows.get((date, template['name']))
+            if picks is None:
+                continue
+            data.append(spec.trace(
+                template,
+                hovertemplate=template['hovertemplate'].replace(placeholder, date),
+                ids=np.full(len(picks), template['name'], dtype=object),
+                x=columns['date'][picks],
+                y=columns['price'][picks],
+                marker=dict(size=columns['volume'][picks], sizeref=sizeref)
+            ))
+        frames.append({'data': data, 'name': date})
+
+    step = fig_anim['layout']['sliders'][0]['steps'][0]
+    fig_anim['layout']['sliders'][0]['steps'] = [
+        dict(step, args=[[date]] + step['args'][1:], label=date) for date in dates
+    ]
+    return spec.figure(frames[0]['data'], fig_anim['layout'], frames)
+
+
+# ==============================================================================
+# 8. DEFI TVL COMPARISON WITH DROPDOWN
+# ==============================================================================
+
+@figure('defi_comparison_dropdown', ['defi_historical_processed'], 'advanced',
+        point_budget=webgl.DEFAULT_POINT_BUDGET)
+def defi_comparison_dropdown(point_budget):
+    defi_data = loader.load('defi_historical_processed')
+
+    colors_defi = {
+        'Uniswap': '#FF007A',
+        'Aave': '#B6509E',
+        'Compound': '#00D395',
+        'Curve': '#0445FF',
+        'Lido': '#73CBFF'
+    }
+
+    # Create figure with all protocols and a dropdown for metrics
+    fig_defi_dropdown = metric_dropdown(
+        traces.group(defi_data, 'protocol'), 'date',
+        {'tvl_millions': ("TVL (Millions)", "TVL (Millions USD)"),
+         'daily_volume': ("Daily Volume", "Daily Volume (Millions USD)"),
+         'users_count': ("User Count", "Active Users")},
+        colors_defi,
+        direction="down",
+        pad={"r": 10, "t": 10},
+        showactive=True,
+        x=0.15,
+        xanchor="left",
+        y=1.15,
+        yanchor="top"
+    )
+
+    fig_defi_dropdown.update_layout(
+        title={
+            'text': 'DeFi Protocol Metrics: Interactive Comparison',
+            'font': {'size': 22, 'family': 'Arial Black'}
+        },
+        xaxis_title='Date',
+        yaxis_title='TVL (Millions USD)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600
+    )
+    return webgl.apply(fig_defi_dropdown, point_budget)
+
+
+# ==============================================================================
+# 9. SENTIMENT VS PRICE CORRELATION
+# ==============================================================================
+
+@figure('sentiment_price_correlation', ['social_sentiment_processed', 'crypto_processed'],
+        'advanced', tolerance='1D')
+def sentiment_price_correlation(tolerance):
+    sentiment_data = loader.load('social_sentiment_processed')
+    crypto_data = loader.load('crypto_processed')
+
+    # Sentiment is sampled in the evening and prices at midnight, so pair each
+    # sentiment row with the coin's last price at most ``tolerance`` earlier
+    sentiment_crypto = align.asof(sentiment_data, crypto_data, 'coin', columns=['price'],
+                                  tolerance=pd.Timedelta(tolerance), how='inner')
+    sentiment_crypto['coin'] = sentiment_crypto['coin'].cat.remove_unused_categories()
+
+    # Create scatter with trendline
+    labels = {'sentiment_score': 'Sentiment Score (0-100)', 'price': 'Price (USD)'}
+    fig_sent_price = px.scatter(
+        sentiment_crypto,
+        x='sentiment_score',
+        y='price',
+        color='coin',
+        title='Social Sentiment vs Price: Does Buzz Drive Value?',
+        labels=labels,
+        height=600
+    )
+    # Same traces as trendline='ols', fitted for all coins at once
+    fig_sent_price = trendline.add_ols(fig_sent_price, sentiment_crypto, 'sentiment_score',
+                                       'price', 'coin', labels)
+
+    fig_sent_price.update_layout(
+        template='plotly_white',
+        title_font_size=22
+    )
+    return fig_sent_price
@@ -0,0 +1,100 @@
+"""
+Compact encoding of animation frames for the split output
+Plotly Express writes one complete frame per animation step, repeating
+every trace's styling, hovertemplate and axis references, and one slider
+step per frame with the same animation options. For a daily animation
+that is over a kilobyte per day of which a few numbers change.
+
+encode() turns a figure dict's frames (and the slider steps pointing at
+them) into a template record plus one column per value that varies:
+numbers as a base64 little-endian float64 array, strings that only differ
+by the frame name (x dates, hovertemplates, labels) as the pieces around
+the name, anything else as a plain list. Identical columns are stored
+once. The split chart shell in portfolio/output.py rebuilds the exact
+frames and steps from these columns before drawing, so each added day
+costs a few dozen bytes instead of a full frame.
+"""
+import base64
+import json
+import numbers
+
+import numpy as np
+
+
+def _flatten(value, path=()):
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            yield from _flatten(item, path + (key,))
+    elif isinstance(value, list) and value:
+        for index, item in enumerate(value):
+            yield from _flatten(item, path + (index,))
+    else:
+        yield path, value
+
+
+def _column(values, names):
+    if all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in values):
+        data = np.asarray(values, dtype='<f8').tobytes()
+        return {'f8': base64.b64encode(data).decode('ascii')}
+    if names and all(names) and all(isinstance(v, str) for v in values):
+        parts = values[0].split(names[0])
+        if len(parts) > 1 and all(v.split(n) == parts for v, n in zip(values, names)):
+            return {'parts': parts}
+    return {'values': values}
+
+
+def encode_records(records, names, columns, seen):
+    """Encode a list of dicts, grouping those with the same shape.
+
+    Varying leaves are appended to the shared ``columns`` list (``seen``
+    maps a column's JSON to its index there) and referenced by index.
+    ``names`` are the frame names, one per record, or ``None``.
+    """
+    flat = [dict(_flatten(record)) for record in records]
+    shapes = {}
+    for row, leaves in enumerate(flat):
+        shapes.setdefault(tuple(leaves), []).append(row)
+
+    groups = []
+    for rows in shapes.values():
+        group_names = [names[row] for row in rows] if names else None
+        paths = []
+        for path in flat[rows[0]]:
+            values = [flat[row][path] for row in rows]
+            if all(v == values[0] for v in values):
+                continue
+            column = _column(values, group_names)
+            key = json.dumps(column, sort_keys=True)
+            if key not in seen:
+                seen[key] = len(columns)
+                columns.append(column)
+            paths.append([list(path), seen[key]])
+        groups.append({'rows': rows, 'template': records[rows[0]], 'paths': paths})
+    return {'count': len(records), 'groups': groups}
+
+
+def encode(spec):
+    """Replace ``spec``'s frames and matching slider steps with columns, in place.
+
+    Slider steps are encoded against the frame names when there is one
+    step per frame. Returns ``spec``.
+    """
+    frames = spec.get('frames')
+    if not frames:
+        return spec
+    names = [str(frame.get('name', '')) for frame in frames]
+    columns, seen = [], {}
+    encoded = encode_records(frames, names, columns, seen)
+
+    sliders = {}
+    for index, slider in enumerate(spec.get('layout', {}).get('sliders', [])):
+        if 'steps' not in slider:
+            continue
+        steps = slider.pop('steps')
+        sliders[index] = encode_records(steps, names if len(steps) == len(names) else None,
+                                        columns, seen)
+
+    del spec['frames']
+    spec['encoded'] = {'names': names, 'columns': columns, 'frames': encoded,
+                       'sliders': sliders}
+    return spec
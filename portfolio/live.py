@@ -0,0 +1,444 @@
+"""
+Live updates for the chart pages over Server-Sent Events
+serve.py answers ``/api/live/<dataset>?column=close`` with an event
+stream of rows appended to that dataset, and the chart shells written by
+portfolio.output apply them with Plotly.extendTraces() to the traces
+whose ``meta.live`` names the same dataset and column.
+
+- LiveFeed owns every subscriber's socket once the response headers are
+  out, so a connection does not hold one of the server's worker threads.
+  Each update is encoded once per channel (dataset, column), and the same
+  bytes are queued to every subscriber of that channel. One thread writes
+  to all non-blocking sockets as they become writable. Clients that fall
+  more than ``max_pending`` bytes behind are dropped, and the browser
+  reconnects with Last-Event-ID and is sent what it missed from a short
+  history.
+- Tailer polls the processed CSVs that have subscribers and publishes
+  the rows appended since the last poll (by fetch, rolling --append or
+  stream). A file that shrank or was rewritten is skipped to its end.
+- TickGenerator publishes synthetic rows (a random walk from each
+  entity's last row) for trying the pages and load testing:
+      python serve.py --live-ticks 1       # one tick per entity per second
+
+Only the standard library is used; when numpy is installed, batches
+longer than ``max_points`` per entity are LTTB-reduced before encoding.
+"""
+import collections
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import random
+import selectors
+import socket
+import threading
+import time
+
+LIVE_MAX_CLIENTS = 1024
+# Bytes queued for one client before it is considered stuck and dropped
+LIVE_MAX_PENDING_BYTES = 1024 * 1024
+# Messages kept per channel for clients reconnecting with Last-Event-ID
+LIVE_HISTORY = 64
+# Seconds a channel keeps filling its history after its last subscriber left,
+# so a browser that reconnects after a network blip misses nothing
+LIVE_LINGER = 60.0
+LIVE_HEARTBEAT = 15.0
+LIVE_POLL_INTERVAL = 1.0
+# Points per entity in one update; longer batches are downsampled
+LIVE_MAX_POINTS = 500
+# How far back the Tailer checks that a file was only appended to
+TAIL_BYTES = 4096
+
+HEARTBEAT = b': ping\n\n'
+
+
+def _downsample(x, y, max_points):
+    if len(y) <= max_points:
+        return x, y
+    try:
+        import numpy as np
+        from portfolio.downsample import lttb
+    except ImportError:
+        step = -(-len(y) // max_points)
+        keep = list(range(0, len(y) - 1, step)) + [len(y) - 1]
+        return [x[i] for i in keep], [y[i] for i in keep]
+    dates = np.array([value.replace(' ', 'T') for value in x], dtype='datetime64[us]')
+    keep = lttb(dates, np.array(y, dtype=np.float64), max_points)
+    return [x[i] for i in keep], [y[i] for i in keep]
+
+
+class _Client:
+    __slots__ = ('sock', 'channel', 'pending', 'offset', 'pending_bytes', 'dropped')
+
+    def __init__(self, sock, channel):
+        self.sock = sock
+        self.channel = channel
+        self.pending = collections.deque()
+        self.offset = 0
+        self.pending_bytes = 0
+        self.dropped = False
+
+
+class LiveFeed:
+    """Fan-out of encoded events to many non-blocking sockets from one thread."""
+
+    def __init__(self, max_clients=LIVE_MAX_CLIENTS, max_pending=LIVE_MAX_PENDING_BYTES,
+                 history=LIVE_HISTORY, heartbeat=LIVE_HEARTBEAT, max_points=LIVE_MAX_POINTS,
+                 linger=LIVE_LINGER):
+        self.max_clients = max_clients
+        self.linger = linger
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self.max_points = max_points
+        self.sequence = 0
+        self.published = 0
+        self._channels = collections.defaultdict(set)
+        self._history = collections.defaultdict(lambda: collections.deque(maxlen=history))
+        # channel -> time.monotonic() when its last subscriber left
+        self._idle_since = {}
+        self._clients = set()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='portfolio-live', daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def channels(self):
+        """The (dataset, column) pairs that have subscribers (or had one within ``linger``)."""
+        now = time.monotonic()
+        with self._lock:
+            for channel, since in list(self._idle_since.items()):
+                if now - since > self.linger:
+                    del self._idle_since[channel], self._channels[channel]
+                    self._history.pop(channel, None)
+            return list(self._channels)
+
+    def attach(self, sock, channel, last_id=None, preamble=b''):
+        """Take over ``sock`` (response headers already sent) as a subscriber.
+
+        Returns False when the feed is full or closed; the caller keeps the socket.
+        """
+        with self._lock:
+            if self._closed or len(self._clients) >= self.max_clients:
+                return False
+            sock.setblocking(False)
+            client = _Client(sock, channel)
+            self._clients.add(client)
+            self._channels[channel].add(client)
+            self._idle_since.pop(channel, None)
+            if preamble:
+                self._queue(client, preamble)
+            if last_id is not None:
+                for sequence, message in self._history[channel]:
+                    if sequence > last_id:
+                        self._queue(client, message)
+            self._dirty.add(client)
+        self._wake()
+        return True
+
+    def publish(self, dataset, batch):
+        """Send ``{entity: {'x': [dates], column: [values], ...}}`` to the
+        subscribers of each of its columns. Missing values are left out."""
+        for channel in self.channels():
+            if channel[0] != dataset:
+                continue
+            column = channel[1]
+            series = {}
+            for entity, rows in batch.items():
+                if column not in rows:
+                    continue
+                points = [(x, y) for x, y in zip(rows['x'], rows[column]) if y is not None]
+                if points:
+                    x, y = _downsample(*map(list, zip(*points)), self.max_points)
+                    series[entity] = {'x': x, 'y': y}
+            if series:
+                self.send(channel, 'rows', {'dataset': dataset, 'column': column,
+                                            'series': series})
+
+    def send(self, channel, event, payload):
+        """Encode ``payload`` once and queue it to every subscriber of ``channel``."""
+        body = json.dumps(payload, separators=(',', ':'))
+        with self._lock:
+            self.sequence += 1
+            message = f"id: {self.sequence}\nevent: {event}\ndata: {body}\n\n".encode()
+            self._history[channel].append((self.sequence, message))
+            for client in self._channels.get(channel, ()):
+                self._queue(client, message)
+                self._dirty.add(client)
+            self.published += 1
+        self._wake()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._wake()
+        self._thread.join()
+
+    def _queue(self, client, message):
+        # Called with the lock held
+        if client.pending_bytes + len(message) > self.max_pending:
+            client.dropped = True
+            return
+        client.pending.append(message)
+        client.pending_bytes += len(message)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            # A wake-up is already pending
+            pass
+
+    def _drop(self, client):
+        with self._lock:
+            self._clients.discard(client)
+            self._channels[client.channel].discard(client)
+            if not self._channels[client.channel]:
+                self._idle_since[client.channel] = time.monotonic()
+            self._dirty.discard(client)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.close()
+        except OSError:
+            pass
+
+    def _flush(self, client):
+        """Write what the socket accepts; returns False if the client is gone."""
+        while True:
+            with self._lock:
+                if not client.pending:
+                    return True
+                message = client.pending[0]
+            try:
+                sent = client.sock.send(memoryview(message)[client.offset:])
+            except (BlockingIOError, InterruptedError):
+                return True
+            except OSError:
+                return False
+            with self._lock:
+                client.offset += sent
+                if client.offset == len(message):
+                    client.pending.popleft()
+                    client.pending_bytes -= len(message)
+                    client.offset = 0
+
+    def _update(self, client):
+        """Flush ``client`` and watch it for writability only while data is pending."""
+        if client.dropped or not self._flush(client):
+            self._drop(client)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.pending else 0)
+        try:
+            self._selector.modify(client.sock, events, client)
+        except KeyError:
+            self._selector.register(client.sock, events, client)
+
+    def _run(self):
+        next_beat = time.monotonic() + self.heartbeat
+        while True:
+            for key, mask in self._selector.select(max(0.0, next_beat - time.monotonic())):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    continue
+                client = key.data
+                if mask & selectors.EVENT_READ:
+                    try:
+                        # Subscribers send nothing; readable means closed
+                        if not client.sock.recv(4096):
+                            client.dropped = True
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    except OSError:
+                        client.dropped = True
+                with self._lock:
+                    self._dirty.add(client)
+
+            if time.monotonic() >= next_beat:
+                next_beat = time.monotonic() + self.heartbeat
+                with self._lock:
+                    for client in self._clients:
+                        self._queue(client, HEARTBEAT)
+                    self._dirty.update(self._clients)
+
+            with self._lock:
+                closed = self._closed
+                dirty, self._dirty = self._dirty, set()
+            for client in dirty:
+                if client in self._clients:
+                    self._update(client)
+            if closed:
+                for client in list(self._clients):
+                    self._drop(client)
+                self._selector.close()
+                self._wake_r.close()
+                self._wake_w.close()
+                return
+
+
+def _parse(value):
+    if value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _tail_hash(f, offset):
+    f.seek(max(0, offset - TAIL_BYTES))
+    return hashlib.blake2b(f.read(min(offset, TAIL_BYTES)), digest_size=16).hexdigest()
+
+
+class Tailer:
+    """Publishes rows appended to the processed CSVs that have subscribers."""
+
+    def __init__(self, feed, catalog, interval=LIVE_POLL_INTERVAL):
+        self.feed = feed
+        self.catalog = catalog
+        self.interval = interval
+        # dataset -> (offset, tail hash)
+        self._positions = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='portfolio-tail', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for name in {dataset for dataset, _ in self.feed.channels()}:
+                try:
+                    self.poll(name)
+                except (OSError, KeyError, ValueError, UnicodeDecodeError):
+                    continue
+
+    def poll(self, name):
+        """Publish ``name``'s rows appended since the previous call; returns their count."""
+        dataset = self.catalog.datasets[name]
+        path = os.path.join(self.catalog.root, dataset.path)
+        with open(path, 'rb') as f:
+            header = f.readline()
+            size = os.fstat(f.fileno()).st_size
+            position = self._positions.get(name)
+            if position is None or position[0] > size or _tail_hash(f, position[0]) != position[1]:
+                # First look, or the file was rewritten: start from its end
+                self._positions[name] = (size, _tail_hash(f, size))
+                return 0
+            offset = position[0]
+            f.seek(offset)
+            data = f.read(size - offset)
+            # A writer may be half way through a line; leave it for the next poll
+            data = data[:data.rfind(b'\n') + 1]
+            if not data:
+                return 0
+            self._positions[name] = (offset + len(data), _tail_hash(f, offset + len(data)))
+
+        columns = next(csv.reader([header.decode()]))
+        entity_pos = columns.index(dataset.entity_column)
+        date_pos = columns.index(dataset.date_column)
+        batch = {}
+        rows = 0
+        for row in csv.reader(io.StringIO(data.decode())):
+            if len(row) != len(columns):
+                continue
+            rows += 1
+            series = batch.setdefault(row[entity_pos], {'x': []})
+            series['x'].append(row[date_pos])
+            for pos, column in enumerate(columns):
+                if pos not in (entity_pos, date_pos):
+                    series.setdefault(column, []).append(_parse(row[pos]))
+        self.feed.publish(name, batch)
+        return rows
+
+
+class TickGenerator:
+    """Publishes synthetic rows for every subscribed dataset every ``interval`` seconds.
+
+    Each tick adds ``rows`` days per entity after its last (real or
+    synthetic) row, moving every numeric column by a random 1% step.
+    """
+
+    def __init__(self, feed, catalog, interval=1.0, rows=1, seed=None):
+        self.feed = feed
+        self.catalog = catalog
+        self.interval = interval
+        self.rows = rows
+        self.random = random.Random(seed)
+        # dataset -> {entity: (last datetime, {column: value})}
+        self._last = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='portfolio-ticks', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for name in {dataset for dataset, _ in self.feed.channels()}:
+                self.tick(name)
+
+    def _start(self, name):
+        index = self.catalog.get(name)
+        dataset = index.dataset
+        columns = [c for c in index.columns if c not in (dataset.entity_column,
+                                                          dataset.date_column)]
+        last = {}
+        for entity in index.entities:
+            data = index.query(entities=[entity], columns=[dataset.date_column] + columns)['data']
+            if not data[dataset.date_column]:
+                continue
+            date = datetime.datetime.fromisoformat(data[dataset.date_column][-1])
+            values = {}
+            for column in columns:
+                known = [v for v in data[column] if isinstance(v, (int, float))]
+                if known:
+                    values[column] = float(known[-1])
+            last[entity] = (date, values)
+        return last
+
+    def tick(self, name):
+        """Publish one tick of ``name``; returns the rows generated."""
+        if name not in self._last:
+            self._last[name] = self._start(name)
+        batch = {}
+        for entity, (date, values) in self._last[name].items():
+            series = {'x': []}
+            for _ in range(self.rows):
+                date += datetime.timedelta(days=1)
+                values = {column: value * (1 + self.random.gauss(0, 0.01))
+                          for column, value in values.items()}
+                series['x'].append(date.strftime('%Y-%m-%d %H:%M:%S'))
+                for column, value in values.items():
+                    series.setdefault(column, []).append(value)
+            self._last[name][entity] = (date, values)
+            batch[entity] = series
+        self.feed.publish(name, batch)
+        return len(batch) * self.rows
@@ -0,0 +1,152 @@
+"""
+Typed, memoized loading of data/processed/ for the figure scripts
+Every processed file has a declared schema (categorical entity columns,
+explicit date formats, float32 where the precision is enough for charts),
+so nothing is re-inferred on each run. Parsed frames are memoized for the
+life of the process and pickled to data/processed/cache/, keyed by the
+CSV's content hash and SCHEMA_VERSION, so later runs skip parsing too.
+
+Frames returned by load() are shared between callers: treat them as
+read-only and .copy() before modifying.
+"""
+import collections
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from portfolio import PROJECT_ROOT
+
+# Bump whenever a schema below changes so old cache files are ignored
+SCHEMA_VERSION = 1
+CACHE_DIR = 'data/processed/cache'
+
+Schema = collections.namedtuple('Schema', 'path dtypes date_column date_format index_col',
+                                defaults=(None, None, None))
+
+SCHEMAS = {
+    'stock_market_processed': Schema(
+        'data/processed/stock_market_processed.csv',
+        {'ticker': 'category', 'open': 'float32', 'high': 'float32', 'low': 'float32',
+         'close': 'float32', 'volume': 'float64', 'daily_return': 'float32'},
+        'date', '%Y-%m-%d %H:%M:%S'),
+    # Crypto prices, volumes and market caps span too many digits for float32
+    'crypto_processed': Schema(
+        'data/processed/crypto_processed.csv',
+        {'coin': 'category', 'price': 'float64', 'volume': 'float64', 'market_cap': 'float64',
+         'daily_return': 'float32', 'volatility_30d': 'float32', 'sharpe_30d': 'float32'},
+        'date', '%Y-%m-%d %H:%M:%S'),
+    'defi_historical_processed': Schema(
+        'data/processed/defi_historical_processed.csv',
+        {'protocol': 'category', 'tvl_millions': 'float32', 'daily_volume': 'float32',
+         'users_count': 'int32', 'transactions': 'int32'},
+        'date', '%Y-%m-%d %H:%M:%S.%f'),
+    'social_sentiment_processed': Schema(
+        'data/processed/social_sentiment_processed.csv',
+        {'coin': 'category', 'sentiment_score': 'float32', 'social_volume': 'float32',
+         'social_dominance': 'float32', 'galaxy_score': 'float32'},
+        'date', '%Y-%m-%d %H:%M:%S.%f'),
+    'crypto_risk_return': Schema(
+        'data/processed/crypto_risk_return.csv',
+        {'coin': 'category', 'annualized_return': 'float64', 'avg_volatility': 'float64'}),
+    'defi_growth_rates': Schema(
+        'data/processed/defi_growth_rates.csv',
+        {'protocol': 'category', 'growth_30d': 'float64'}),
+    'stock_correlations': Schema(
+        'data/processed/stock_correlations.csv', None, index_col=0),
+    'defi_correlations': Schema(
+        'data/processed/defi_correlations.csv', None, index_col=0),
+    # Only saved raw; market_cap_rank is 'N/A' for unranked coins
+    'trending_coins': Schema(
+        'data/raw/trending_coins.csv', {'market_cap_rank': 'str'}),
+}
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def source_path(name, root=PROJECT_ROOT):
+    """Absolute path of the CSV behind a loader dataset name."""
+    return os.path.join(root, SCHEMAS[name].path)
+
+
+def file_hash(path):
+    """BLAKE2b content hash of a file, as hex."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse(name, root=PROJECT_ROOT):
+    """Parse one processed CSV with its schema, bypassing every cache."""
+    schema = SCHEMAS[name]
+    frame = pd.read_csv(source_path(name, root), dtype=schema.dtypes,
+                        index_col=schema.index_col)
+    if schema.date_column:
+        frame[schema.date_column] = pd.to_datetime(frame[schema.date_column],
+                                                   format=schema.date_format)
+    return frame
+
+
+def load(name, root=PROJECT_ROOT, use_disk_cache=True):
+    """Return the typed DataFrame for a processed file such as 'crypto_processed'.
+
+    Looked up in this order: the in-process memo, the on-disk cache for the
+    file's current content, and finally a fresh parse (which then fills both).
+    """
+    path = source_path(name, root)
+    st = os.stat(path)
+    memo_key = (name, root, st.st_mtime_ns, st.st_size)
+
+    with _lock:
+        frame = _memo.get(memo_key)
+    if frame is not None:
+        return frame
+
+    cache_path = None
+    if use_disk_cache:
+        cache_path = os.path.join(root, CACHE_DIR,
+                                  f"{name}-{file_hash(path)}-v{SCHEMA_VERSION}.pkl")
+        if os.path.exists(cache_path):
+            try:
+                frame = pd.read_pickle(cache_path)
+            except Exception:
+                # Unreadable (e.g. written by another pandas version): rebuild it
+                frame = None
+
+    if frame is None:
+        frame = parse(name, root)
+        if cache_path is not None:
+            _write_cache(frame, cache_path, name)
+
+    with _lock:
+        # Drop memo entries for older versions of the same file
+        for key in [k for k in _memo if k[:2] == memo_key[:2]]:
+            del _memo[key]
+        _memo[memo_key] = frame
+    return frame
+
+
+def _write_cache(frame, cache_path, name):
+    directory = os.path.dirname(cache_path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    frame.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+    # Remove cache files for earlier contents or schema versions of this file
+    for entry in os.listdir(directory):
+        if entry.startswith(f"{name}-") and entry.endswith('.pkl') \
+                and entry != os.path.basename(cache_path):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+
+
+def clear_memo():
+    """Forget every frame memoized in this process (the disk cache is kept)."""
+    with _lock:
+        _memo.clear()
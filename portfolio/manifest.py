@@ -0,0 +1,68 @@
+"""
+Build manifest for generated outputs
+Records, for every output file, the key it was built from (a hash over
+its input files' contents and the code and parameters that produced it)
+together with the output's size and mtime. An output is fresh while its
+key is unchanged and the file on disk is the one that was recorded, so
+only stale outputs are rebuilt. Input hashes are reused while a file's
+mtime and size are unchanged, which keeps a no-op check to a few stat()
+calls; touching a file without changing it re-hashes but rebuilds nothing.
+"""
+import json
+import os
+
+from portfolio.loader import file_hash
+
+MANIFEST_VERSION = 1
+
+
+class BuildManifest:
+
+    def __init__(self, path):
+        self.path = path
+        self.outputs = {}
+        self.sources = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.outputs = data.get('outputs', {})
+            self.sources = data.get('sources', {})
+
+    def source_hash(self, path):
+        """Content hash of an input file, re-hashed only when its stat changes."""
+        st = os.stat(path)
+        known = self.sources.get(path)
+        if known and (known['mtime_ns'], known['size']) == (st.st_mtime_ns, st.st_size):
+            return known['hash']
+        digest = file_hash(path)
+        self.sources[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'hash': digest}
+        return digest
+
+    def is_fresh(self, output_path, key):
+        entry = self.outputs.get(os.path.basename(output_path))
+        if entry is None or entry['key'] != key:
+            return False
+        try:
+            st = os.stat(output_path)
+        except OSError:
+            return False
+        return (entry['mtime_ns'], entry['size']) == (st.st_mtime_ns, st.st_size)
+
+    def record(self, output_path, key, **info):
+        """Note that ``output_path`` was just written from ``key``."""
+        st = os.stat(output_path)
+        self.outputs[os.path.basename(output_path)] = dict(
+            info, key=key, mtime_ns=st.st_mtime_ns, size=st.st_size)
+
+    def get(self, output_name, field, default=None):
+        return self.outputs.get(output_name, {}).get(field, default)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'outputs': self.outputs,
+                       'sources': self.sources}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
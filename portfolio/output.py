@@ -0,0 +1,331 @@
+"""
+Writers for the built figures
+Two output modes:
+
+- 'standalone': a page like fig.write_html()'s with plotly.js (~3.5 MB)
+  inlined, so every chart carries its own copy of the library.
+- 'split': one content-hashed plotly.js under assets/ shared by every
+  chart, plus per chart a small HTML shell and a compact <name>.json. The
+  shell fetches and draws the figure JSON only once the chart's container
+  comes within a screen's margin of the viewport. The bundle's URL
+  changes whenever plotly.js does, so it can be cached as immutable.
+  Traces downsampled by portfolio.downsample.trace_xy() are refetched
+  from serve.py's /api/series at screen resolution when the user zooms.
+  Traces with ``meta.live`` subscribe to serve.py's /api/live event
+  stream and are extended in place as rows are appended (see
+  portfolio/live.py).
+  Animation frames are stored as columns (see portfolio/frames.py),
+  numeric columns as binary and repeated arrays once (see
+  portfolio/arrays.py); the shell rebuilds them.
+
+Both take a go.Figure or a plain-dict figure, serialize it in one pass
+with portfolio.spec, and write to a temporary name and rename into place.
+"""
+import hashlib
+import html
+import os
+
+from portfolio import arrays, frames, spec
+
+ASSETS_DIR = 'assets'
+OUTPUT_MODES = ('split', 'standalone')
+
+SHELL_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>{title}</title>
+    <script src="{plotly_url}" defer></script>
+</head>
+<body>
+    <div id="{name}" class="plotly-graph-div" data-figure="{data_url}"
+         style="height:{height}; width:{width};"></div>
+    <script>
+        document.addEventListener('DOMContentLoaded', function () {{
+            var div = document.getElementById('{name}');
+            // Traces with meta.lod hold a downsampled copy of a long series; on
+            // zoom, fetch the visible range at screen resolution from serve.py
+            var detail = [];
+            function enableDetail() {{
+                div.data.forEach(function (trace, index) {{
+                    if (trace.meta && trace.meta.lod) {{
+                        detail.push({{index: index, lod: trace.meta.lod, x: trace.x, y: trace.y, request: 0}});
+                    }}
+                }});
+                if (!detail.length) return;
+                div.on('plotly_relayout', function (event) {{
+                    detail.forEach(function (item) {{
+                        var axis = 'xaxis' + (div.data[item.index].xaxis || 'x').slice(1);
+                        var range = event[axis + '.range'] || (axis + '.range[0]' in event
+                            ? [event[axis + '.range[0]'], event[axis + '.range[1]']] : null);
+                        if (event[axis + '.autorange']) {{
+                            item.request++;
+                            Plotly.restyle(div, {{x: [item.x], y: [item.y]}}, [item.index]);
+                        }} else if (range) {{
+                            var request = ++item.request;
+                            var query = new URLSearchParams({{
+                                entity: item.lod.entity, column: item.lod.column,
+                                start: range[0], end: range[1],
+                                points: Math.max(500, 2 * div.clientWidth)
+                            }});
+                            fetch('/api/series/' + encodeURIComponent(item.lod.dataset) + '?' + query)
+                                .then(function (response) {{ return response.ok ? response.json() : null; }})
+                                .then(function (detail) {{
+                                    // Ignore answers to zooms that have since been superseded
+                                    if (!detail || request !== item.request) return;
+                                    Plotly.restyle(div, {{x: [detail.x], y: [detail.y]}}, [item.index]);
+                                }})
+                                .catch(function () {{ /* keep the coarse data, e.g. on a static server */ }});
+                        }}
+                    }});
+                }});
+            }}
+            // Traces with meta.live are extended with the rows serve.py pushes
+            // for their dataset and column, one EventSource per channel
+            function enableLive() {{
+                if (!window.EventSource) return;
+                var channels = {{}};
+                div.data.forEach(function (trace, index) {{
+                    var live = trace.meta && trace.meta.live;
+                    if (!live) return;
+                    var key = live.dataset + '/' + live.column;
+                    channels[key] = channels[key] || {{dataset: live.dataset, column: live.column, traces: {{}}}};
+                    channels[key].traces[live.entity] = index;
+                }});
+                Object.keys(channels).forEach(function (key) {{
+                    var channel = channels[key];
+                    var source = new EventSource('/api/live/' + encodeURIComponent(channel.dataset) +
+                                                 '?column=' + encodeURIComponent(channel.column));
+                    source.addEventListener('rows', function (event) {{
+                        var update = JSON.parse(event.data), x = [], y = [], indices = [];
+                        Object.keys(update.series).forEach(function (entity) {{
+                            var index = channel.traces[entity], points = update.series[entity];
+                            if (index === undefined) return;
+                            x.push(points.x);
+                            y.push(points.y);
+                            indices.push(index);
+                            detail.forEach(function (item) {{
+                                // The coarse copy restored on autorange grows too
+                                if (item.index !== index) return;
+                                item.x = Array.from(item.x).concat(points.x);
+                                item.y = Array.from(item.y).concat(points.y);
+                            }});
+                        }});
+                        if (indices.length) Plotly.extendTraces(div, {{x: x, y: y}}, indices);
+                    }});
+                }});
+            }}
+            function float64(text) {{
+                var binary = atob(text), bytes = new Uint8Array(binary.length);
+                for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+                return new Float64Array(bytes.buffer);
+            }}
+            // Swap {{"$shared": k}} references for the arrays stored once by portfolio/arrays.py
+            function resolve(value, arrays) {{
+                if (Array.isArray(value)) {{
+                    for (var i = 0; i < value.length; i++) value[i] = resolve(value[i], arrays);
+                }} else if (value && typeof value === 'object') {{
+                    if ('$shared' in value) return arrays[value.$shared];
+                    for (var key in value) value[key] = resolve(value[key], arrays);
+                }}
+                return value;
+            }}
+            // Frames and slider steps stored as columns by portfolio/frames.py
+            function records(encoded, columns, group) {{
+                var result = new Array(group.count);
+                group.groups.forEach(function (shape) {{
+                    var template = JSON.stringify(shape.template);
+                    shape.rows.forEach(function (row, i) {{
+                        var record = JSON.parse(template);
+                        shape.paths.forEach(function (entry) {{
+                            var path = entry[0], column = columns[entry[1]], target = record;
+                            for (var k = 0; k < path.length - 1; k++) target = target[path[k]];
+                            target[path[path.length - 1]] = column.parts
+                                ? column.parts.join(encoded.names[row]) : column.values[i];
+                        }});
+                        result[row] = record;
+                    }});
+                }});
+                return result;
+            }}
+            function expand(fig) {{
+                var encoded = fig.encoded;
+                if (!encoded) return fig;
+                if (encoded.frames) {{
+                    var columns = encoded.columns.map(function (column) {{
+                        return column.f8 ? {{values: float64(column.f8)}} : column;
+                    }});
+                    fig.frames = records(encoded, columns, encoded.frames);
+                    Object.keys(encoded.sliders).forEach(function (index) {{
+                        fig.layout.sliders[index].steps = records(encoded, columns, encoded.sliders[index]);
+                    }});
+                }}
+                if (encoded.arrays) {{
+                    var arrays = encoded.arrays.map(function (array) {{
+                        return array.f8 ? float64(array.f8) : array.values;
+                    }});
+                    ['data', 'layout', 'frames'].forEach(function (key) {{ resolve(fig[key], arrays); }});
+                }}
+                delete fig.encoded;
+                return fig;
+            }}
+            function draw() {{
+                fetch(div.dataset.figure).then(function (response) {{
+                    if (!response.ok) throw new Error(response.status + ' ' + response.statusText);
+                    return response.json();
+                }}).then(expand).then(function (fig) {{
+                    return Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true}})
+                        .then(function () {{
+                            // Animations start playing, as plotly's standalone pages do
+                            if (fig.frames) return Plotly.addFrames(div, fig.frames)
+                                .then(function () {{ Plotly.animate(div, null); }});
+                        }})
+                        .then(enableDetail)
+                        .then(enableLive);
+                }}).catch(function (error) {{
+                    div.textContent = 'Could not load ' + div.dataset.figure + ': ' + error.message;
+                }});
+            }}
+            if (!('IntersectionObserver' in window)) return draw();
+            // The margin starts the download just before the chart scrolls in
+            new IntersectionObserver(function (entries, observer) {{
+                if (entries.some(function (entry) {{ return entry.isIntersecting; }})) {{
+                    observer.disconnect();
+                    draw();
+                }}
+            }}, {{rootMargin: '100% 0px'}}).observe(div);
+        }});
+    </script>
+</body>
+</html>
+"""
+
+
+STANDALONE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+</head>
+<body>
+    <script type="text/javascript">window.PlotlyConfig = {{MathJaxConfig: 'local'}};</script>
+    <script type="text/javascript">{plotlyjs}</script>
+    <div id="{name}" class="plotly-graph-div" style="height:{height}; width:{width};"></div>
+    <script type="text/javascript">
+        if (document.getElementById("{name}")) {{
+            Plotly.newPlot(
+                "{name}",
+                {data},
+                {layout},
+                {{"responsive": true}}
+            ){then_frames}
+        }}
+    </script>
+</body>
+</html>
+"""
+
+STANDALONE_FRAMES = """.then(function () {{
+                Plotly.addFrames('{name}', {frames});
+            }}).then(function () {{
+                Plotly.animate('{name}', null);
+            }})"""
+
+
+def write_atomic(path, data):
+    """Write ``data`` (str or bytes) to a temporary file and rename it to ``path``."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_html(fig, path):
+    """Standalone page with plotly.js inlined; drops a split build's JSON."""
+    from plotly.offline import get_plotlyjs
+
+    fig = spec.to_spec(fig)
+    layout = fig.get('layout', {})
+    frames = fig.get('frames')
+    name = os.path.splitext(os.path.basename(path))[0]
+    write_atomic(path, STANDALONE_TEMPLATE.format(
+        name=name,
+        title=html.escape(_title(layout, name)),
+        plotlyjs=get_plotlyjs(),
+        height=_size(layout, 'height'),
+        width=_size(layout, 'width'),
+        data=_script_json(spec.plain(fig.get('data', []))),
+        layout=_script_json(spec.plain(layout)),
+        then_frames=(STANDALONE_FRAMES.format(name=name, frames=_script_json(spec.plain(frames)))
+                     if frames else ''),
+    ))
+    if os.path.exists(data_path(path)):
+        os.remove(data_path(path))
+
+
+def _script_json(value):
+    # As plotly's writer does, so a string such as '</script>' in a title or
+    # hover text cannot end the inline <script> early
+    return (spec.dumps(value).replace('<', '\\u003c').replace('>', '\\u003e')
+            .replace('&', '\\u0026'))
+
+
+def plotly_bundle(out_dir):
+    """Write plotly.js to ``out_dir``/assets/ under a content hash and return its URL.
+
+    Bundles left by other plotly versions are removed.
+    """
+    from plotly.offline import get_plotlyjs
+
+    source = get_plotlyjs().encode('utf-8')
+    name = f"plotly-{hashlib.blake2b(source, digest_size=6).hexdigest()}.min.js"
+    directory = os.path.join(out_dir, ASSETS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        write_atomic(path, source)
+    for entry in os.listdir(directory):
+        if entry.startswith('plotly-') and entry.endswith('.min.js') and entry != name:
+            os.remove(os.path.join(directory, entry))
+    return f"{ASSETS_DIR}/{name}"
+
+
+def data_path(path):
+    """The figure JSON written next to the HTML shell at ``path``."""
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _size(layout, dimension):
+    """CSS size of the chart div, as plotly's own pages compute it."""
+    value = layout.get(dimension, layout.get('template', {}).get('layout', {}).get(dimension))
+    return f"{value}px" if isinstance(value, (int, float)) else '100%'
+
+
+def _title(layout, default):
+    title = layout.get('title')
+    return (title.get('text') if isinstance(title, dict) else title) or default
+
+
+def write_split(fig, path, plotly_url):
+    """Figure JSON plus an HTML shell that loads it with the shared plotly.js."""
+    fig = spec.to_spec(fig)
+    layout = fig.get('layout', {})
+    name = os.path.splitext(os.path.basename(path))[0]
+    encoded = {'data': spec.plain(fig.get('data', []), typed=True),
+               'layout': spec.plain(layout, typed=True)}
+    if fig.get('frames'):
+        encoded['frames'] = spec.plain(fig['frames'])
+    write_atomic(data_path(path), spec.dumps(arrays.share(frames.encode(encoded))))
+    write_atomic(path, SHELL_TEMPLATE.format(
+        name=name,
+        title=html.escape(_title(layout, name)),
+        data_url=os.path.basename(data_path(path)),
+        plotly_url=plotly_url,
+        height=_size(layout, 'height'),
+        width=_size(layout, 'width'),
+    ))
@@ -0,0 +1,354 @@
+"""
+Parallel, cached render of the static charts in portfolio/charts.py
+The notebooks saved every image with ``plt.savefig(..., dpi=300)`` one at
+a time, and site/index.html showed those 300-dpi PNGs (up to 800 KB each)
+as thumbnails. Here each registered chart is an independent task drawn
+headless (Agg) in a process pool. One drawing is saved as the full-size
+PNG (kept for downloads and social previews) and resampled to WIDTHS
+pixels wide as PNG and WebP in visualizations/static/sized/.
+
+Only stale charts are redrawn. A chart's key hashes the contents of its
+input files, its function's source, the shared drawing code, the sizes
+and formats, the font in use, and the matplotlib, seaborn and Pillow
+versions; keys are
+kept in a manifest next to the images (see portfolio/manifest.py).
+
+Every chart's sizes are written to sized/srcset.json, and the <img>
+tags of site/index.html that show a chart are rewritten as <picture>
+elements with WebP and PNG srcsets, so the browser downloads the
+smallest image that fills the layout.
+
+Usage (from any directory):
+    python -m portfolio render                     # every stale chart
+    python -m portfolio render defi_tvl_trends --force
+    python -m portfolio render --workers 4 --no-site
+"""
+import argparse
+import collections
+import hashlib
+import html
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import PIL
+import seaborn
+from PIL import Image
+
+from portfolio import PROJECT_ROOT, charts, loader
+from portfolio.manifest import BuildManifest
+
+OUTPUT_DIR = 'visualizations/static'
+SIZED_DIR = 'sized'
+MANIFEST_NAME = '.render-manifest.json'
+SRCSET_NAME = 'srcset.json'
+SITE_PAGE = 'site/index.html'
+
+DPI = 300
+WIDTHS = (480, 960, 1440)
+FORMATS = ('png', 'webp')
+WEBP_QUALITY = 85
+# The layout shows charts at most ~1060 CSS pixels wide (site/style.css)
+SIZES = '(max-width: 768px) calc(100vw - 80px), min(1060px, calc(100vw - 140px))'
+
+RenderResult = collections.namedtuple('RenderResult', 'name path seconds error variants')
+
+
+def select(names=None):
+    """Return the registered charts to render; raises KeyError for unknown names."""
+    if not names:
+        return list(charts.CHARTS.values())
+    unknown = [n for n in names if n not in charts.CHARTS]
+    if unknown:
+        raise KeyError(f"unknown chart(s): {', '.join(unknown)}")
+    return [charts.CHARTS[n] for n in names]
+
+
+def _shared_source():
+    # Helpers and constants every chart may use, and the writer below
+    helpers = [inspect.getsource(value) for name, value in sorted(vars(charts).items())
+               if inspect.isfunction(value) and name.startswith('_')]
+    constants = [f"{name}={value!r}" for name, value in sorted(vars(charts).items())
+                 if name.isupper() and isinstance(value, (str, int, float, list, tuple))]
+    return '\n'.join(helpers + constants + [inspect.getsource(charts.style),
+                                            inspect.getsource(write_variants)])
+
+
+def chart_key(chart, manifest, root=PROJECT_ROOT):
+    """Hash of everything ``chart``'s images depend on."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in chart.inputs:
+        digest.update(f"{name}={manifest.source_hash(loader.source_path(name, root))}\n".encode())
+    digest.update(inspect.getsource(chart.draw).encode())
+    digest.update(_shared_source().encode())
+    digest.update(repr((DPI, WIDTHS, FORMATS, WEBP_QUALITY)).encode())
+    digest.update(f"{charts.font()} {matplotlib.__version__} {seaborn.__version__} "
+                  f"{PIL.__version__}".encode())
+    return digest.hexdigest()
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_variants(png, name, out_dir):
+    """Write ``png`` (the full-size image) resampled to each of WIDTHS.
+
+    Returns one dict per width: its pixel size and file names relative to
+    ``out_dir``. Widths at or above the full size are skipped.
+    """
+    image = Image.open(io.BytesIO(png)).convert('RGB')
+    variants = []
+    for width in WIDTHS:
+        if width >= image.width:
+            continue
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        variant = {'width': width, 'height': height}
+        for fmt in FORMATS:
+            buffer = io.BytesIO()
+            if fmt == 'webp':
+                resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+            else:
+                # A 256-color palette halves the PNGs; median cut keeps light gridlines
+                resized.quantize(256, Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE) \
+                    .save(buffer, 'PNG', optimize=True)
+            variant[fmt] = f"{SIZED_DIR}/{name}-{width}.{fmt}"
+            _write(os.path.join(out_dir, variant[fmt]), buffer.getvalue())
+        variants.append(variant)
+    return variants
+
+
+_styled = False
+
+
+def render(name, out_dir, redraw=True, strict_font=False):
+    """Draw and write one chart and its variants; runs in a worker process.
+
+    With ``redraw`` false the variants are resampled from the full-size
+    PNG already in ``out_dir``. ``strict_font`` is passed to charts.style().
+    """
+    global _styled
+    t0 = time.perf_counter()
+    chart = charts.CHARTS[name]
+    path = os.path.join(out_dir, chart.output)
+    try:
+        if not redraw:
+            with open(path, 'rb') as f:
+                variants = write_variants(f.read(), chart.name, out_dir)
+            return RenderResult(name, path, time.perf_counter() - t0, None, variants)
+        if not _styled:
+            charts.style(strict_font)
+            _styled = True
+        chart.draw()
+        buffer = io.BytesIO()
+        charts.plt.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+        png = buffer.getvalue()
+        _write(path, png)
+        variants = write_variants(png, chart.name, out_dir)
+    except Exception as e:
+        return RenderResult(name, path, time.perf_counter() - t0,
+                            f"{type(e).__name__}: {e}", None)
+    finally:
+        charts.plt.close('all')
+    return RenderResult(name, path, time.perf_counter() - t0, None, variants)
+
+
+def _pool_context():
+    # fork shares the preloaded datasets with the workers copy-on-write
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def _is_fresh(chart, manifest, out_dir, key):
+    path = os.path.join(out_dir, chart.output)
+    variants = manifest.get(chart.output, 'variants') or []
+    return manifest.is_fresh(path, key) and all(
+        os.path.exists(os.path.join(out_dir, v[fmt])) for v in variants for fmt in FORMATS)
+
+
+def render_all(selected, workers=None, out_dir=None, on_result=None, force=False,
+               redraw=True, strict_font=False):
+    """Render the stale charts in ``selected`` with up to ``workers`` processes.
+
+    Returns ``(results, fresh, srcset)``: the results in completion order,
+    the charts that were up to date, and the srcset metadata of every
+    rendered chart (also written to sized/srcset.json). With ``redraw``
+    false only the variants are rebuilt from the existing full-size PNGs,
+    which keep the key they were drawn from.
+    """
+    out_dir = out_dir or os.path.join(PROJECT_ROOT, OUTPUT_DIR)
+    os.makedirs(os.path.join(out_dir, SIZED_DIR), exist_ok=True)
+    manifest = BuildManifest(os.path.join(out_dir, MANIFEST_NAME))
+    keys = {c.name: chart_key(c, manifest) for c in selected}
+    fresh = [] if force else [c for c in selected
+                              if _is_fresh(c, manifest, out_dir, keys[c.name])]
+    # Longest first, so the slowest chart is not left to run last on its own
+    todo = sorted((c for c in selected if c not in fresh),
+                  key=lambda c: -manifest.get(c.output, 'seconds', 0))
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+
+    results = []
+
+    def finished(result):
+        results.append(result)
+        if not result.error:
+            output = charts.CHARTS[result.name].output
+            key = keys[result.name] if redraw else manifest.get(output, 'key')
+            manifest.record(result.path, key,
+                            chart=result.name,
+                            seconds=round(result.seconds, 3), variants=result.variants)
+        if on_result:
+            on_result(result)
+
+    for name in sorted({i for c in todo for i in c.inputs} if redraw else ()):
+        loader.load(name)
+    if workers == 1:
+        for c in todo:
+            finished(render(c.name, out_dir, redraw, strict_font))
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = [pool.submit(render, c.name, out_dir, redraw, strict_font)
+                       for c in todo]
+            for future in as_completed(futures):
+                finished(future.result())
+    manifest.save()
+
+    srcset = {}
+    for chart in charts.CHARTS.values():
+        variants = manifest.get(chart.output, 'variants')
+        if variants:
+            srcset[chart.name] = {'full': chart.output, 'variants': variants}
+    _write(os.path.join(out_dir, SIZED_DIR, SRCSET_NAME),
+           json.dumps(srcset, indent=1, sort_keys=True).encode())
+    return results, fresh, srcset
+
+
+# A chart's <picture> (after a first run) or its plain <img> (before)
+_TAG = re.compile(r'(?P<indent>[ \t]*)(?:<picture data-chart="(?P<chart>[\w-]+)">.*?</picture>'
+                  r'|<img\s[^>]*?src="(?P<prefix>[^"]*?)(?P<src>[\w-]+)\.png"[^>]*>)', re.S)
+_IMG = re.compile(r'<img\s[^>]*>', re.S)
+_ATTR = re.compile(r'([\w-]+)="([^"]*)"')
+# Attributes that picture_html() sets itself
+_OWN = {'src', 'srcset', 'sizes', 'width', 'height', 'loading', 'decoding', 'data-full'}
+
+
+def picture_html(name, entry, prefix, attrs, indent=''):
+    """A <picture> element showing chart ``name`` from its srcset ``entry``.
+
+    ``prefix`` is the path from the page to the image directory; ``attrs``
+    are extra <img> attributes (alt, class, onclick, ...).
+    """
+    variants = entry['variants']
+    default = variants[len(variants) // 2]
+
+    def srcset(fmt):
+        return ', '.join(f"{prefix}{v[fmt]} {v['width']}w" for v in variants)
+
+    img = [f'src="{prefix}{default["png"]}"', f'srcset="{srcset("png")}"', f'sizes="{SIZES}"',
+           f'width="{default["width"]}" height="{default["height"]}" loading="lazy" '
+           f'decoding="async"', f'data-full="{prefix}{entry["full"]}"']
+    img += [f'{key}="{html.escape(value)}"' for key, value in attrs]
+    inner = indent + '    '
+    return '\n'.join([
+        f'{indent}<picture data-chart="{name}">',
+        f'{inner}<source type="image/webp"',
+        f'{inner}        srcset="{srcset("webp")}"',
+        f'{inner}        sizes="{SIZES}">',
+        f'{inner}<img ' + f'\n{inner}     '.join(img) + '>',
+        f'{indent}</picture>'])
+
+
+def update_site(srcset, page=None, out_dir=None):
+    """Point the chart images of ``page`` at their variants; returns how many."""
+    page = page or os.path.join(PROJECT_ROOT, SITE_PAGE)
+    out_dir = out_dir or os.path.join(PROJECT_ROOT, OUTPUT_DIR)
+    prefix = os.path.relpath(out_dir, os.path.dirname(page)).replace(os.sep, '/') + '/'
+    with open(page, encoding='utf-8') as f:
+        text = f.read()
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        name = match.group('chart') or match.group('src')
+        if name not in srcset or (match.group('src') and match.group('prefix') != prefix):
+            return match.group(0)
+        img = _IMG.search(match.group(0)).group(0)
+        attrs = [(key, html.unescape(value)) for key, value in _ATTR.findall(img)
+                 if key not in _OWN]
+        count += 1
+        return picture_html(name, srcset[name], prefix, attrs, match.group('indent'))
+
+    updated = _TAG.sub(replace, text)
+    if updated != text:
+        _write(page, updated.encode('utf-8'))
+    return count
+
+
+def report(result):
+    if result.error:
+        print(f"  [FAIL] {result.name}: {result.error}")
+    else:
+        print(f"  [OK] {os.path.basename(result.path):<34} {result.seconds:6.2f}s  "
+              f"{len(result.variants)} sizes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio render',
+                                     description="Render the static matplotlib charts")
+    parser.add_argument('names', nargs='*', help='charts to render (default: all)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count; 1 renders in-process)')
+    parser.add_argument('--out', help=f'output directory (default: {OUTPUT_DIR})')
+    parser.add_argument('--force', action='store_true', help='redraw charts that are up to date')
+    parser.add_argument('--no-site', action='store_true',
+                        help=f'do not rewrite the chart images in {SITE_PAGE}')
+    parser.add_argument('--variants-only', action='store_true',
+                        help='resample sized/ from the existing full-size PNGs, drawing nothing')
+    parser.add_argument('--strict-font', action='store_true',
+                        help=f'fail instead of falling back when {charts.FONT} is not installed')
+    parser.add_argument('--list', action='store_true', help='list the charts and exit')
+    args = parser.parse_args(argv)
+
+    try:
+        selected = select(args.names)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if args.list:
+        for c in selected:
+            print(f"{c.name:<30} notebook {c.notebook}  {', '.join(c.inputs)}")
+        return 0
+
+    print(f"Rendering {len(selected)} chart(s) with up to {args.workers} worker(s)...")
+    t0 = time.perf_counter()
+    results, fresh, srcset = render_all(selected, args.workers, args.out, on_result=report,
+                                        force=args.force or args.variants_only,
+                                        redraw=not args.variants_only,
+                                        strict_font=args.strict_font)
+    elapsed = time.perf_counter() - t0
+    for c in fresh:
+        print(f"  [--] {c.output} is up to date")
+    if not args.no_site:
+        count = update_site(srcset, out_dir=args.out)
+        print(f"  [OK] {SITE_PAGE}: {count} chart image(s) use responsive variants")
+
+    failed = [r for r in results if r.error]
+    print(f"\n{len(results) - len(failed)} rendered, {len(fresh)} up to date, "
+          f"{len(failed)} failed in {elapsed:.2f}s "
+          f"(render time {sum(r.seconds for r in results):.2f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,317 @@
+"""
+Rolling return statistics for the crypto analysis
+2_crypto_volatility_analysis.ipynb derives daily_return, volatility_30d
+and sharpe_30d with one groupby/rolling lambda per statistic. Here:
+
+- rolling_stats() runs the notebook's pandas code on a whole frame; it
+  is what produced data/processed/crypto_processed.csv.
+- RollingStats continues those columns row by row for prices that
+  follow the ones already seen, keeping each entity's last price, its
+  trailing window of returns and the running sums of pandas' rolling
+  mean and variance (Kahan compensations included). It repeats pandas'
+  arithmetic step for step, so its results are bit-for-bit those of
+  rolling_stats() on the whole history while its state stays the size
+  of one window. python -m portfolio stream carries it across chunks,
+  and --append saves it as JSON next to the loader cache.
+
+Definitions (as in the notebook, 0% risk-free rate):
+    daily_return   = price / previous price - 1 (per entity)
+    volatility_30d = std(last 30 returns, ddof=1) * sqrt(365) * 100
+    sharpe_30d     = mean(last 30 returns) / std(...) * sqrt(365)
+A window containing a missing return (each entity's first row) is NaN.
+
+Usage (from the project root):
+    python -m portfolio rolling --check           # compare with crypto_processed.csv
+    python -m portfolio rolling --append new.csv  # append new raw rows incrementally
+"""
+import argparse
+import collections
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from portfolio import PROJECT_ROOT
+
+WINDOW = 30
+PERIODS_PER_YEAR = 365
+RAW_PATH = 'data/raw/crypto_data.csv'
+PROCESSED_PATH = 'data/processed/crypto_processed.csv'
+STATE_PATH = 'data/processed/cache/rolling_state.json'
+# Bumped whenever the saved state's fields change
+STATE_VERSION = 2
+COLUMNS = ['daily_return', 'volatility_30d', 'sharpe_30d']
+# Largest relative difference from crypto_processed.csv that --check accepts
+TOLERANCE = 1e-9
+
+
+def rolling_stats(frame, by='coin', price='price', window=WINDOW, periods=PERIODS_PER_YEAR):
+    """DataFrame of COLUMNS for ``frame``'s rows (same index), rows in date order per entity."""
+    # As in 2_crypto_volatility_analysis.ipynb
+    out = frame.groupby(by)[price].pct_change().to_frame('daily_return')
+    returns = out.groupby(frame[by])['daily_return']
+    out['volatility_30d'] = returns.transform(
+        lambda x: x.rolling(window=window).std() * np.sqrt(periods) * 100)
+    out['sharpe_30d'] = returns.transform(
+        lambda x: x.rolling(window=window).mean() / x.rolling(window=window).std()
+        * np.sqrt(periods))
+    return out
+
+
+def _divide(a, b):
+    # a / b with numpy's result for a zero divisor instead of an exception
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+class _Window:
+    """Trailing returns of one entity and pandas' rolling mean/var state.
+
+    add() and remove() follow add_mean/remove_mean and add_var/remove_var
+    in pandas/_libs/window/aggregations.pyx line for line: a Kahan sum for
+    the mean, Welford with compensation for the variance, and the count
+    of repeated values pandas uses to return exact constants.
+    """
+
+    STATE = ('last_price', 'nobs', 'sum', 'sum_add', 'sum_remove', 'neg', 'mean', 'ssqdm',
+             'var_add', 'var_remove', 'same', 'prev')
+    __slots__ = ('values',) + STATE
+
+    def __init__(self, size, last_price=math.nan, returns=()):
+        self.values = collections.deque(maxlen=size)
+        self.last_price = last_price
+        self.nobs = self.neg = self.same = 0
+        self.sum = self.sum_add = self.sum_remove = 0.0
+        self.mean = self.ssqdm = self.var_add = self.var_remove = 0.0
+        self.prev = None
+        for value in returns:
+            self.push(value)
+
+    def _add(self, x):
+        if x != x:
+            return
+        self.nobs += 1
+        y = x - self.sum_add
+        t = self.sum + y
+        self.sum_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, x) < 0:
+            self.neg += 1
+        self.same = self.same + 1 if x == self.prev else 1
+        self.prev = x
+        prev_mean = self.mean - self.var_add
+        y = x - self.var_add
+        t = y - self.mean
+        self.var_add = t + self.mean - y
+        self.mean = self.mean + t / self.nobs
+        self.ssqdm = self.ssqdm + (x - prev_mean) * (x - self.mean)
+
+    def _remove(self, x):
+        if x != x:
+            return
+        self.nobs -= 1
+        y = -x - self.sum_remove
+        t = self.sum + y
+        self.sum_remove = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, x) < 0:
+            self.neg -= 1
+        if not self.nobs:
+            self.mean = self.ssqdm = 0.0
+            return
+        prev_mean = self.mean - self.var_remove
+        y = x - self.var_remove
+        t = y - self.mean
+        self.var_remove = t + self.mean - y
+        self.mean = self.mean - t / self.nobs
+        self.ssqdm = self.ssqdm - (x - prev_mean) * (x - self.mean)
+
+    def push(self, x):
+        # rolling() reads infinities as missing
+        if math.isinf(x):
+            x = math.nan
+        if self.prev is None:
+            # pandas starts from the series' first value, counted zero times
+            self.prev = x
+        if len(self.values) == self.values.maxlen:
+            self._remove(self.values[0])
+        self.values.append(x)
+        self._add(x)
+
+    def stats(self):
+        """(std, mean) of a full window, as rolling().std() and .mean() give them."""
+        if self.nobs < self.values.maxlen:
+            return math.nan, math.nan
+        if self.same >= self.nobs:
+            return 0.0, self.prev
+        mean = self.sum / self.nobs
+        if (self.neg == 0 and mean < 0) or (self.neg == self.nobs and mean > 0):
+            mean = 0.0
+        var = self.ssqdm / (self.nobs - 1)
+        return math.sqrt(var) if var >= 0 else 0.0, mean
+
+    def to_dict(self):
+        return dict({name: getattr(self, name) for name in self.STATE},
+                    returns=list(self.values))
+
+    @classmethod
+    def from_dict(cls, size, data):
+        window = cls(size)
+        window.values.extend(data['returns'])
+        for name in cls.STATE:
+            setattr(window, name, data[name])
+        return window
+
+
+class RollingStats:
+    """Append-only rolling statistics with per-entity state."""
+
+    def __init__(self, window=WINDOW, periods=PERIODS_PER_YEAR):
+        self.window = window
+        self.periods = periods
+        self.entities = {}
+
+    @classmethod
+    def from_frame(cls, frame, by='coin', price='price', window=WINDOW,
+                   periods=PERIODS_PER_YEAR):
+        """State after ``frame``'s rows, which must already have a daily_return column.
+
+        The running sums depend on every earlier return, so this replays
+        each entity's whole history once.
+        """
+        stats = cls(window, periods)
+        for entity, rows in frame.groupby(by, sort=False, observed=True):
+            prices = rows[price].dropna()
+            stats.entities[str(entity)] = _Window(
+                window,
+                float(prices.iloc[-1]) if len(prices) else math.nan,
+                rows['daily_return'].to_numpy(np.float64))
+        return stats
+
+    def update(self, frame, by='coin', price='price'):
+        """COLUMNS for rows following those already seen, in ``frame``'s order.
+
+        Rows must be in date order per entity. Costs O(len(frame)).
+        """
+        out = np.full((len(frame), 3), np.nan)
+        root = np.sqrt(self.periods)
+        for i, (entity, value) in enumerate(zip(frame[by].astype(str), frame[price])):
+            state = self.entities.get(entity)
+            if state is None:
+                state = self.entities[entity] = _Window(self.window)
+            # Like pct_change(), a missing price repeats the previous one
+            if value == value:
+                ret = _divide(value, state.last_price) - 1
+                state.last_price = value
+            else:
+                ret = _divide(state.last_price, state.last_price) - 1
+            state.push(ret)
+            std, mean = state.stats()
+            out[i] = ret, std * root * 100, _divide(mean, std) * root
+        return pd.DataFrame(out, index=frame.index, columns=COLUMNS)
+
+    def to_dict(self):
+        return {'version': STATE_VERSION, 'window': self.window, 'periods': self.periods,
+                'entities': {name: w.to_dict() for name, w in self.entities.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != STATE_VERSION:
+            raise ValueError(f"rolling state version {data.get('version')}, "
+                             f"expected {STATE_VERSION}")
+        stats = cls(data['window'], data['periods'])
+        for name, entity in data['entities'].items():
+            stats.entities[name] = _Window.from_dict(stats.window, entity)
+        return stats
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            # NaN is written as JSON NaN, which json.load reads back
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _read(path):
+    # round_trip parses every float back to the exact value that was written
+    return pd.read_csv(path, float_precision='round_trip')
+
+
+def process(raw):
+    """crypto_processed rows for raw crypto_data rows (all columns, same order)."""
+    return pd.concat([raw, rolling_stats(raw)], axis=1)
+
+
+def check(root=PROJECT_ROOT):
+    """Largest relative difference between process(raw) and crypto_processed.csv."""
+    expected = _read(os.path.join(root, PROCESSED_PATH))
+    actual = process(_read(os.path.join(root, RAW_PATH)))
+    worst = 0.0
+    for column in COLUMNS:
+        a, e = actual[column].to_numpy(), expected[column].to_numpy()
+        if not np.array_equal(np.isnan(a), np.isnan(e)):
+            raise ValueError(f"{column}: missing values differ")
+        finite = ~np.isnan(e)
+        scale = np.maximum(np.abs(e[finite]), 1e-12)
+        worst = max(worst, float(np.max(np.abs(a[finite] - e[finite]) / scale, initial=0.0)))
+    return worst
+
+
+def append(new_path, root=PROJECT_ROOT):
+    """Append processed rows for the raw rows in ``new_path`` to crypto_processed.csv."""
+    processed_path = os.path.join(root, PROCESSED_PATH)
+    state_path = os.path.join(root, STATE_PATH)
+    stats = None
+    if os.path.exists(state_path) and os.path.getmtime(state_path) >= os.path.getmtime(
+            processed_path):
+        try:
+            stats = RollingStats.load(state_path)
+        except ValueError:
+            # Saved by an older version; rebuilt below
+            pass
+    if stats is None:
+        stats = RollingStats.from_frame(_read(processed_path))
+
+    new = _read(new_path)
+    rows = pd.concat([new, stats.update(new)], axis=1)
+    rows.to_csv(processed_path, mode='a', header=False, index=False)
+    stats.save(state_path)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio rolling',
+                                     description="Rolling volatility and Sharpe for crypto prices")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--check', action='store_true',
+                       help=f'recompute {PROCESSED_PATH} from {RAW_PATH} and compare')
+    group.add_argument('--append', metavar='CSV',
+                       help=f'append processed rows for new raw rows to {PROCESSED_PATH}')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        worst = check()
+        if worst > TOLERANCE:
+            print(f"  [FAIL] {PROCESSED_PATH} differs (max relative difference {worst:.1e})")
+            return 1
+        print(f"  [OK] {PROCESSED_PATH} matches (max relative difference {worst:.1e})")
+    else:
+        count = append(args.append)
+        print(f"  [OK] Appended {count} rows to {PROCESSED_PATH}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Plain-dict figures and their fast serialization
+go.Scatter, go.Figure and update_layout run plotly's validators on every
+property, converting date columns to arrays of datetime objects on the
+way, and fig.to_json() then deep-copies the figure and encodes it three
+times (plotly re-parses its own output to turn NaN into null). With tens
+of thousands of points per trace both dominate the build.
+
+Figures can instead be assembled as plain dicts: template() validates a
+trace's constant properties once with plotly and caches the result;
+trace() copies a template and drops the data arrays in unvalidated.
+Every writer in portfolio/output.py takes either kind of figure and
+serializes it once with plain()/dumps(): numpy columns go straight to
+lists (or, in the split output, long ones stay arrays and are written as
+base64 float64 by portfolio/arrays.py), dates are formatted vectorized, and the
+resulting JSON is what the split shell, the standalone page and a static
+image export (plotly.io.write_image accepts the dict) all consume.
+
+    line = spec.template('scatter', mode='lines', line=dict(color='#2E86AB', width=3))
+    fig = spec.figure([spec.trace(line, x=dates, y=closes, name='AAPL')],
+                      spec.layout(template='plotly_white', height=600))
+
+benchmarks/figure_bench.py compares this path with go.*.
+"""
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Numeric arrays at least this long are written as binary in the split
+# output: base64 float64 costs no formatting, but is larger than the JSON
+# text of short, rounded values
+BINARY_MIN_LENGTH = 5000
+
+_templates = {}
+_checked = set()
+
+
+def template(trace_type, **props):
+    """Plotly-validated plain properties of a ``trace_type`` trace, cached."""
+    key = (trace_type, repr(sorted(props.items())))
+    if key not in _templates:
+        trace = go.Figure(data=[dict(props, type=trace_type)]).data[0]
+        _templates[key] = trace.to_plotly_json()
+    return _templates[key]
+
+
+def _check(trace_type, names):
+    """Raise ValueError once for property names a ``trace_type`` trace does not have."""
+    key = (trace_type, names)
+    if key not in _checked:
+        go.Figure(data=[{'type': trace_type, **{name: None for name in names}}])
+        _checked.add(key)
+
+
+def trace(template, **props):
+    """A trace dict: ``template`` plus ``props`` (arrays, names), not validated.
+
+    Dict values are merged one level into the template's, so
+    ``marker=dict(size=volumes)`` keeps the template's marker color.
+    """
+    _check(template['type'], tuple(sorted(props)))
+    result = dict(template)
+    for name, value in props.items():
+        if isinstance(value, dict) and isinstance(result.get(name), dict):
+            value = dict(result[name], **value)
+        result[name] = value
+    return result
+
+
+def layout(**props):
+    """Plotly-validated plain layout properties (``template`` names are expanded)."""
+    return go.Layout(**props).to_plotly_json()
+
+
+def figure(data, layout=None, frames=None):
+    """A plain-dict figure."""
+    fig = {'data': list(data), 'layout': layout or {}}
+    if frames:
+        fig['frames'] = list(frames)
+    return fig
+
+
+def to_spec(fig):
+    """``fig`` as a plain dict; plain-dict figures are returned as they are."""
+    return fig if isinstance(fig, dict) else fig.to_plotly_json()
+
+
+def _iso(values):
+    """datetime64 values as ISO strings, like datetime.isoformat() per value."""
+    values = np.asarray(values, dtype='datetime64[us]')
+    fraction = (values.view('int64') % 1_000_000) != 0
+    text = np.datetime_as_string(values, unit='s')
+    if fraction.any():
+        text = np.where(fraction, np.datetime_as_string(values, unit='us'), text)
+    return text.tolist()
+
+
+def _scalar(value):
+    if isinstance(value, float):
+        return value if np.isfinite(value) else None
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return _scalar(value.item())
+    return value
+
+
+def _array(values, typed):
+    kind = values.dtype.kind
+    if kind in 'fiu':
+        if typed and len(values) >= BINARY_MIN_LENGTH:
+            return values
+        if kind == 'f' and not np.isfinite(values).all():
+            return np.where(np.isfinite(values), values, None).tolist()
+        return values.tolist()
+    if kind == 'M':
+        return _iso(values)
+    if kind == 'O' and len(values) and all(
+            isinstance(v, datetime.datetime) and v.tzinfo is None for v in values):
+        return _iso(values.astype('datetime64[us]'))
+    return [plain(v, typed) for v in values.tolist()]
+
+
+def plain(value, typed=False):
+    """``value`` with numpy, pandas and date values converted for JSON.
+
+    With ``typed``, numeric arrays of at least BINARY_MIN_LENGTH values are
+    left as numpy arrays for portfolio.arrays.share() to write as binary.
+    """
+    if isinstance(value, dict):
+        return {key: plain(item, typed) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item, typed) for item in value]
+    if isinstance(value, (pd.Index, pd.Series)):
+        value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        if value.ndim == 0:
+            return _scalar(value.item())
+        if value.ndim > 1:
+            return [plain(row, typed) for row in value]
+        return _array(value, typed)
+    return _scalar(value)
+
+
+def _default(value):
+    if isinstance(value, np.ndarray):
+        return plain(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """Compact JSON for a value returned by plain()."""
+    return json.dumps(value, separators=(',', ':'), default=_default, allow_nan=False)
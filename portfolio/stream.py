@@ -0,0 +1,204 @@
+"""
+Streaming raw -> processed pipeline with bounded memory
+The notebooks read a whole raw CSV, add their derived columns and write
+the whole processed CSV. process() streams the raw CSV in chunks sized
+to a memory ceiling instead, appending each processed chunk to the
+output as it goes.
+
+Derived columns look back along each entity's rows (the previous close
+for a return, the 30-day window for volatility). Chunks cut through
+entities wherever the row budget runs out, so each step carries a fixed
+amount of state per entity into the next chunk:
+
+- Returns need the previous close. Carry puts each entity's last price
+  in front of its rows in the next chunk, reruns the notebook's pandas
+  code on the extended chunk and drops the carried rows.
+- pandas' rolling mean and std keep running sums whose last bits depend
+  on every earlier return, so rerunning them on a short tail would not
+  give the same numbers. The crypto step carries rolling.RollingStats
+  instead: each coin's last price, 30-return window and pandas' own
+  accumulators, continued with pandas' arithmetic.
+
+Memory therefore depends on the chunk size and the number of entities,
+not the length of the file, and the output is byte-identical to the
+shipped processed CSVs; ``python -m portfolio stream --check`` verifies
+that.
+
+Usage (from the project root):
+    python -m portfolio stream                        # every dataset
+    python -m portfolio stream stocks --memory 64     # ceiling in MB
+    python -m portfolio stream --check --memory 1     # compare with data/processed/
+"""
+import argparse
+import collections
+import filecmp
+import functools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from portfolio import PROJECT_ROOT, rolling
+
+# Rows read to estimate the memory one row takes while it is being processed
+SAMPLE_ROWS = 1000
+# Working copies per chunk: the parsed chunk, the extended chunk, derived
+# columns and the CSV text written
+OVERHEAD = 4
+MIN_CHUNK_ROWS = 100
+DEFAULT_MEMORY_MB = 256
+
+
+def _daily_return(frame):
+    # As in 1_stock_market_analysis.ipynb
+    return frame.groupby('ticker')['close'].pct_change().to_frame('daily_return')
+
+
+class Carry:
+    """Runs ``compute`` on each chunk behind the last ``size`` prices of its entities."""
+
+    def __init__(self, compute, by, value, size):
+        self.compute = compute
+        self.by = by
+        self.value = value
+        self.size = size
+        self.rows = None
+
+    def _extend(self, chunk):
+        # Carried rows get negative index labels, so index >= 0 selects the chunk's own
+        if self.rows is None:
+            return chunk
+        carried = self.rows[self.rows[self.by].isin(chunk[self.by].unique())]
+        if not len(carried):
+            return chunk
+        return pd.concat([carried.set_axis(np.arange(-len(carried), 0)), chunk], copy=False)
+
+    def _keep(self, extended):
+        # Like pct_change(), a missing value carries the entity's previous one
+        values = extended[[self.by, self.value]].copy()
+        values[self.value] = values.groupby(self.by, sort=False)[self.value].ffill()
+        tails = values.groupby(self.by, sort=False).tail(self.size)
+        if self.rows is not None:
+            kept = self.rows[~self.rows[self.by].isin(tails[self.by].unique())]
+            tails = pd.concat([kept, tails])
+        self.rows = tails.reset_index(drop=True)
+
+    def update(self, chunk):
+        """Derived columns for ``chunk``'s rows, which follow those seen so far."""
+        extended = self._extend(chunk)
+        derived = self.compute(extended)
+        self._keep(extended)
+        return derived[derived.index >= 0]
+
+
+# compute: derived columns for a frame of whole entities (same index), or
+# None to copy rows through; carry: makes the object whose update(chunk)
+# continues them across chunks
+Step = collections.namedtuple('Step', 'raw processed compute carry')
+
+STEPS = {
+    'stocks': Step('data/raw/stock_market_data.csv', 'data/processed/stock_market_processed.csv',
+                   _daily_return, functools.partial(Carry, _daily_return, 'ticker', 'close', 1)),
+    'crypto': Step(rolling.RAW_PATH, rolling.PROCESSED_PATH,
+                   rolling.rolling_stats, rolling.RollingStats),
+    'sentiment': Step('data/raw/social_sentiment_data.csv',
+                      'data/processed/social_sentiment_processed.csv', None, None),
+    'defi': Step('data/raw/defi_protocols_historical.csv',
+                 'data/processed/defi_historical_processed.csv', None, None),
+}
+
+
+def _read(path, **kwargs):
+    # round_trip parses every float back to the exact value that was written
+    return pd.read_csv(path, float_precision='round_trip', **kwargs)
+
+
+def chunk_rows(path, memory_mb=DEFAULT_MEMORY_MB):
+    """Rows per chunk so that processing one chunk stays under ``memory_mb``."""
+    sample = _read(path, nrows=SAMPLE_ROWS)
+    per_row = sample.memory_usage(index=True, deep=True).sum() / max(len(sample), 1)
+    return max(MIN_CHUNK_ROWS, int(memory_mb * 2 ** 20 / (per_row * OVERHEAD)))
+
+
+def stream(step, chunksize, root=PROJECT_ROOT):
+    """Yield processed chunks (DataFrames) of ``step``'s raw CSV."""
+    carry = step.carry() if step.carry else None
+    start = 0
+    for chunk in _read(os.path.join(root, step.raw), chunksize=chunksize):
+        if carry is None:
+            yield chunk
+            continue
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield pd.concat([chunk, carry.update(chunk)], axis=1)
+
+
+def process(name, memory_mb=DEFAULT_MEMORY_MB, root=PROJECT_ROOT, output=None):
+    """Write ``name``'s processed CSV chunk by chunk; returns (rows, chunks).
+
+    ``output`` defaults to the dataset's processed path. The file is
+    written under a temporary name and replaced at the end, so readers
+    never see a partial file.
+    """
+    step = STEPS[name]
+    output = output or os.path.join(root, step.processed)
+    size = chunk_rows(os.path.join(root, step.raw), memory_mb)
+    tmp_path = f"{output}.tmp{os.getpid()}"
+    rows = chunks = 0
+    try:
+        for chunk in stream(step, size, root):
+            chunk.to_csv(tmp_path, mode='a' if chunks else 'w', header=not chunks, index=False)
+            rows += len(chunk)
+            chunks += 1
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows, chunks
+
+
+def check(name, memory_mb, root=PROJECT_ROOT):
+    """Stream ``name`` to a scratch file; True if it equals the processed CSV byte for byte."""
+    step = STEPS[name]
+    scratch = os.path.join(root, 'data/processed/cache', f'stream_check_{name}.csv')
+    os.makedirs(os.path.dirname(scratch), exist_ok=True)
+    try:
+        _, chunks = process(name, memory_mb, root, scratch)
+        return filecmp.cmp(scratch, os.path.join(root, step.processed), shallow=False), chunks
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio stream',
+                                     description="Stream raw CSVs into data/processed/")
+    parser.add_argument('datasets', nargs='*',
+                        help=f"datasets to process: {', '.join(STEPS)} (default: all)")
+    parser.add_argument('--memory', type=float, default=DEFAULT_MEMORY_MB,
+                        help=f'memory ceiling in MB (default: {DEFAULT_MEMORY_MB})')
+    parser.add_argument('--check', action='store_true',
+                        help='compare streamed output with data/processed/ instead')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.datasets) - set(STEPS))
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)}")
+
+    failed = 0
+    for name in args.datasets or STEPS:
+        t0 = time.perf_counter()
+        if args.check:
+            same, chunks = check(name, args.memory)
+            failed += not same
+            print(f"  [{'OK' if same else 'FAIL'}] {name:<10} {chunks:>4} chunks, "
+                  f"{'byte-identical to' if same else 'differs from'} {STEPS[name].processed}")
+        else:
+            rows, chunks = process(name, args.memory)
+            print(f"  [OK] {STEPS[name].processed} ({rows} rows, {chunks} chunks, "
+                  f"{time.perf_counter() - t0:.2f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
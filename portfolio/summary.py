@@ -0,0 +1,524 @@
+"""
+Incrementally maintained summary tables
+crypto_risk_return.csv, defi_growth_rates.csv and sentiment_summary.csv
+are groupby aggregates over whole processed files. Here each processed
+file gets a Store of mergeable accumulators (count, mean and sum of
+squared deviations, min, max, and the first and last values with their
+times), and the tables are computed from the Store:
+
+- refresh() remembers how many bytes of the processed CSV it has read.
+  When the file has only grown (rolling --append, stream output, the
+  notebooks rewriting the same rows), it reads the new bytes alone,
+  merges their accumulators into the per-entity totals and writes them
+  per (entity, day) as one new segment file, so an update costs
+  O(new rows). Anything else rebuilds the Store in chunks.
+- Store.query() answers any entity subset from the totals, and any date
+  window (or each entity's last N days) by merging the day buckets of
+  the segments overlapping it, without rereading the CSV. Means and
+  variances are merged with Chan et al.'s pairwise update, so they stay
+  accurate over long histories.
+
+Stores are kept in data/processed/cache/summary_<source>/.
+
+Usage (from the project root):
+    python -m portfolio summary                    # update the three tables
+    python -m portfolio summary --check            # compare with the saved tables
+    python -m portfolio summary --query crypto --entities BTC ETH --start 2025-01-01
+"""
+import argparse
+import collections
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from portfolio import PROJECT_ROOT, loader
+
+CACHE_DIR = 'data/processed/cache'
+# Bump whenever the accumulators change so old stores are rebuilt
+STORE_VERSION = 1
+STATS = ('count', 'mean', 'm2', 'min', 'max', 'first', 'first_time', 'last', 'last_time')
+CHUNK_ROWS = 500_000
+# Bytes before the read offset that must be unchanged for an append-only refresh
+TAIL_BYTES = 4096
+# Segments are compacted into one when there are more than this
+MAX_SEGMENTS = 32
+# Largest relative difference from a saved table that --check accepts
+TOLERANCE = 1e-9
+
+Source = collections.namedtuple('Source', 'dataset by on measures')
+
+SOURCES = {
+    'crypto': Source('crypto_processed', 'coin', 'date', ['daily_return', 'volatility_30d']),
+    'defi': Source('defi_historical_processed', 'protocol', 'date', ['tvl_millions']),
+    'sentiment': Source('social_sentiment_processed', 'coin', 'date',
+                        ['sentiment_score', 'social_volume', 'social_dominance']),
+}
+
+
+def _column(measure, stat):
+    return f'{measure}.{stat}'
+
+
+def partials(frame, by, on, measures):
+    """Accumulators per (entity, day) of ``frame``'s rows."""
+    times = pd.to_datetime(frame[on])
+    rows = pd.DataFrame({by: frame[by].astype(str).to_numpy(), 'day': times.dt.floor('D'),
+                         '_time': times})
+    rows = rows.join(frame[measures].astype(np.float64))
+    rows = rows.sort_values([by, '_time'], kind='stable')
+    keys = [rows[by], rows['day']]
+    groups = rows.groupby(keys, sort=False)
+
+    columns = {}
+    for measure in measures:
+        count = groups[measure].count()
+        stamped = rows['_time'].where(rows[measure].notna()).groupby(keys, sort=False)
+        columns[_column(measure, 'count')] = count
+        columns[_column(measure, 'mean')] = groups[measure].mean()
+        columns[_column(measure, 'm2')] = groups[measure].var(ddof=0) * count
+        columns[_column(measure, 'min')] = groups[measure].min()
+        columns[_column(measure, 'max')] = groups[measure].max()
+        columns[_column(measure, 'first')] = groups[measure].first()
+        columns[_column(measure, 'first_time')] = stamped.min()
+        columns[_column(measure, 'last')] = groups[measure].last()
+        columns[_column(measure, 'last_time')] = stamped.max()
+    return _numeric(pd.DataFrame(columns))
+
+
+def _numeric(frame):
+    """``frame`` with times as float nanoseconds (NaN where missing)."""
+    for column in frame.columns:
+        if column.endswith('_time') and frame[column].dtype.kind == 'M':
+            values = frame[column]
+            frame[column] = values.astype('int64').astype(np.float64).where(values.notna())
+    return frame.astype(np.float64)
+
+
+def merge(a, b, measures):
+    """Accumulators of the rows behind ``a`` and ``b`` (frames with the same index).
+
+    Rows missing from one side are NaN there.
+    """
+    result = {}
+    for measure in measures:
+        c = lambda frame, stat: frame[_column(measure, stat)].to_numpy()  # noqa: E731
+        na, nb = np.nan_to_num(c(a, 'count')), np.nan_to_num(c(b, 'count'))
+        n = na + nb
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = c(b, 'mean') - c(a, 'mean')
+            mean = np.where(na == 0, c(b, 'mean'), np.where(
+                nb == 0, c(a, 'mean'), c(a, 'mean') + delta * nb / n))
+            m2 = np.where(na == 0, c(b, 'm2'), np.where(
+                nb == 0, c(a, 'm2'), c(a, 'm2') + c(b, 'm2') + delta * delta * na * nb / n))
+        take_first = ~(c(a, 'first_time') <= c(b, 'first_time')) & ~np.isnan(c(b, 'first_time'))
+        take_last = c(b, 'last_time') >= np.nan_to_num(c(a, 'last_time'), nan=-np.inf)
+        result.update({
+            _column(measure, 'count'): n,
+            _column(measure, 'mean'): mean,
+            _column(measure, 'm2'): m2,
+            _column(measure, 'min'): np.fmin(c(a, 'min'), c(b, 'min')),
+            _column(measure, 'max'): np.fmax(c(a, 'max'), c(b, 'max')),
+            _column(measure, 'first'): np.where(take_first, c(b, 'first'), c(a, 'first')),
+            _column(measure, 'first_time'): np.where(take_first, c(b, 'first_time'),
+                                                     c(a, 'first_time')),
+            _column(measure, 'last'): np.where(take_last, c(b, 'last'), c(a, 'last')),
+            _column(measure, 'last_time'): np.where(take_last, c(b, 'last_time'),
+                                                    c(a, 'last_time')),
+        })
+    return pd.DataFrame(result, index=a.index)
+
+
+def reduce(buckets, measures, level=0):
+    """Merge ``buckets`` (indexed by entity, day) per index ``level``: 0 per
+    entity, [0, 1] per (entity, day)."""
+    groups = buckets.groupby(level=level, sort=True)
+    keys = buckets.index.droplevel([i for i in range(buckets.index.nlevels)
+                                    if i not in np.atleast_1d(level)])
+    result = {}
+    for measure in measures:
+        c = lambda stat: buckets[_column(measure, stat)]  # noqa: E731
+        count = groups[_column(measure, 'count')].sum()
+        mean = (c('mean') * c('count')).fillna(0).groupby(level=level).sum() / count
+        deviation = c('mean').to_numpy() - mean.reindex(keys).to_numpy()
+        m2 = (c('m2') + c('count') * deviation ** 2).fillna(0).groupby(level=level).sum()
+        by_first = buckets.sort_values(_column(measure, 'first_time'), kind='stable')
+        by_last = buckets.sort_values(_column(measure, 'last_time'), kind='stable')
+        result.update({
+            _column(measure, 'count'): count,
+            _column(measure, 'mean'): mean,
+            _column(measure, 'm2'): m2.where(count > 0),
+            _column(measure, 'min'): groups[_column(measure, 'min')].min(),
+            _column(measure, 'max'): groups[_column(measure, 'max')].max(),
+            _column(measure, 'first'): by_first.groupby(level=level)[
+                _column(measure, 'first')].first(),
+            _column(measure, 'first_time'): groups[_column(measure, 'first_time')].min(),
+            _column(measure, 'last'): by_last.groupby(level=level)[
+                _column(measure, 'last')].last(),
+            _column(measure, 'last_time'): groups[_column(measure, 'last_time')].max(),
+        })
+    return pd.DataFrame(result)
+
+
+def describe(accumulators, measures):
+    """Columns (measure, stat) of count, mean, std, min, max, first, last,
+    first_time and last_time per row of ``accumulators``."""
+    columns = {}
+    for measure in measures:
+        c = lambda stat: accumulators[_column(measure, stat)]  # noqa: E731
+        count = c('count').fillna(0).astype(int)
+        columns.update({
+            (measure, 'count'): count,
+            (measure, 'mean'): c('mean'),
+            (measure, 'std'): np.sqrt(c('m2') / (count - 1)).where(count > 1),
+            (measure, 'min'): c('min'),
+            (measure, 'max'): c('max'),
+            (measure, 'first'): c('first'),
+            (measure, 'last'): c('last'),
+            (measure, 'first_time'): pd.to_datetime(c('first_time')),
+            (measure, 'last_time'): pd.to_datetime(c('last_time')),
+        })
+    return pd.DataFrame(columns, index=accumulators.index)
+
+
+def _save_frame(path, frame):
+    """Write an (entity[, day])-indexed accumulator frame as .npz, atomically."""
+    tmp_path = f"{path}.tmp{os.getpid()}.npz"
+    arrays = {'entity': frame.index.get_level_values(0).to_numpy(str),
+              'values': frame.to_numpy(np.float64)}
+    if frame.index.nlevels > 1:
+        arrays['day'] = frame.index.get_level_values(1).to_numpy('datetime64[ns]')
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_frame(path, columns, names):
+    with np.load(path, allow_pickle=False) as data:
+        index = pd.Index(data['entity'].astype(object), name=names[0])
+        if 'day' in data:
+            index = pd.MultiIndex.from_arrays([index, pd.DatetimeIndex(data['day'])],
+                                              names=names)
+        return pd.DataFrame(data['values'], index=index, columns=columns)
+
+
+class Store:
+    """Mergeable accumulators of one source: totals per entity, and per
+    (entity, day) in append-only segment files under ``directory``."""
+
+    def __init__(self, directory, by, on, measures):
+        self.directory = directory
+        self.by = by
+        self.on = on
+        self.measures = list(measures)
+        self.columns = [_column(m, stat) for m in self.measures for stat in STATS]
+        self.totals = pd.DataFrame(columns=self.columns, dtype=np.float64,
+                                   index=pd.Index([], name=by))
+        # [{'file', 'start', 'end'}] with each segment's first and last day
+        self.segments = []
+        # Where refresh() stopped reading the source CSV
+        self.offset = 0
+        self.tail = ''
+        self.header = ''
+
+    def append(self, frame):
+        """Merge the accumulators of ``frame``'s rows; costs O(len(frame))."""
+        new = partials(frame, self.by, self.on, self.measures)
+        if not len(new):
+            return
+        entities = self.totals.index.union(new.index.get_level_values(0).unique())
+        self.totals = merge(self.totals.reindex(entities),
+                            reduce(new, self.measures).reindex(entities), self.measures)
+        days = new.index.get_level_values(1)
+        number = max([int(s['file'][8:-4]) for s in self.segments], default=0) + 1
+        segment = {'file': f'segment-{number:06d}.npz',
+                   'start': str(days.min().date()), 'end': str(days.max().date())}
+        os.makedirs(self.directory, exist_ok=True)
+        _save_frame(os.path.join(self.directory, segment['file']), new)
+        self.segments.append(segment)
+        if len(self.segments) > MAX_SEGMENTS:
+            self.compact()
+
+    def buckets(self, start=None, end=None):
+        """Day buckets from the segments overlapping ``start``..``end``.
+
+        The same (entity, day) may appear in several segments; reduce()
+        merges them.
+        """
+        frames = []
+        for segment in self.segments:
+            if start is not None and pd.Timestamp(segment['end']) < start:
+                continue
+            if end is not None and pd.Timestamp(segment['start']) > end:
+                continue
+            frames.append(_load_frame(os.path.join(self.directory, segment['file']),
+                                      self.columns, [self.by, 'day']))
+        if not frames:
+            return pd.DataFrame(columns=self.columns, dtype=np.float64, index=pd.MultiIndex(
+                levels=[[], []], codes=[[], []], names=[self.by, 'day']))
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def compact(self):
+        """Merge all segments into one (amortized over MAX_SEGMENTS appends)."""
+        merged = reduce(self.buckets(), self.measures, level=[0, 1])
+        old = self.segments
+        days = merged.index.get_level_values(1)
+        number = max(int(s['file'][8:-4]) for s in old) + 1
+        segment = {'file': f'segment-{number:06d}.npz',
+                   'start': str(days.min().date()), 'end': str(days.max().date())}
+        _save_frame(os.path.join(self.directory, segment['file']), merged)
+        self.segments = [segment]
+        self.save()
+        for stale in old:
+            os.remove(os.path.join(self.directory, stale['file']))
+
+    def query(self, entities=None, start=None, end=None, days=None):
+        """Summary per entity, as describe() columns.
+
+        Restricted to ``entities``, to days from ``start`` to ``end``
+        (inclusive) and to each entity's last ``days`` days. Without a
+        date restriction it is answered from the totals alone.
+        """
+        entities = None if entities is None else [str(e) for e in entities]
+        totals = self.totals if entities is None else \
+            self.totals[self.totals.index.isin(entities)]
+        if start is None and end is None and days is None:
+            return describe(totals.sort_index(), self.measures)
+
+        start = None if start is None else pd.Timestamp(start).floor('D')
+        end = None if end is None else pd.Timestamp(end).floor('D')
+        first_day = None
+        if days is not None:
+            # Each entity's last day with data, up to ``end``
+            last = pd.to_datetime(totals[[_column(m, 'last_time') for m in self.measures]]
+                                  .max(axis=1)).dt.floor('D')
+            if end is not None:
+                last = last.clip(upper=end)
+            first_day = last - pd.Timedelta(days=days - 1)
+        low = start if first_day is None or not len(first_day) else \
+            max(filter(None, [start, first_day.min()]))
+        buckets = self.buckets(low, end)
+
+        entity = buckets.index.get_level_values(0)
+        day = buckets.index.get_level_values(1)
+        keep = np.ones(len(buckets), dtype=bool)
+        if entities is not None:
+            keep &= entity.isin(entities)
+        if start is not None:
+            keep &= day >= start
+        if end is not None:
+            keep &= day <= end
+        if first_day is not None:
+            keep &= day.to_numpy() >= first_day.reindex(entity).to_numpy()
+        return describe(reduce(buckets[keep], self.measures), self.measures)
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        _save_frame(os.path.join(self.directory, 'totals.npz'), self.totals)
+        meta = {'version': STORE_VERSION, 'by': self.by, 'on': self.on,
+                'measures': self.measures, 'segments': self.segments,
+                'offset': self.offset, 'tail': self.tail, 'header': self.header}
+        path = os.path.join(self.directory, 'meta.json')
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != STORE_VERSION:
+            raise ValueError(f"{directory}: store version {meta['version']}")
+        store = cls(directory, meta['by'], meta['on'], meta['measures'])
+        store.totals = _load_frame(os.path.join(directory, 'totals.npz'), store.columns,
+                                   [store.by])
+        store.segments = meta['segments']
+        store.offset, store.tail, store.header = meta['offset'], meta['tail'], meta['header']
+        return store
+
+
+def _tail_hash(f, offset):
+    f.seek(max(0, offset - TAIL_BYTES))
+    return hashlib.blake2b(f.read(min(offset, TAIL_BYTES)), digest_size=16).hexdigest()
+
+
+def _read(f, source, header):
+    names = header.strip().split(',')
+    return pd.read_csv(f, header=None, names=names, usecols=[source.by, source.on] +
+                       source.measures, float_precision='round_trip', chunksize=CHUNK_ROWS)
+
+
+def refresh(name, root=PROJECT_ROOT, rebuild=False):
+    """The up-to-date Store of SOURCES ``name`` and the number of rows it read."""
+    source = SOURCES[name]
+    csv_path = loader.source_path(source.dataset, root)
+    directory = os.path.join(root, CACHE_DIR, f'summary_{name}')
+    store = None
+    if not rebuild and os.path.exists(os.path.join(directory, 'meta.json')):
+        try:
+            store = Store.load(directory)
+        except (OSError, ValueError, KeyError):
+            store = None
+
+    rows = 0
+    with open(csv_path, 'rb') as f:
+        header = f.readline().decode()
+        size = os.fstat(f.fileno()).st_size
+        appended = store is not None and store.header == header and \
+            store.measures == source.measures and store.offset <= size and \
+            _tail_hash(f, store.offset) == store.tail
+        if not appended:
+            shutil.rmtree(directory, ignore_errors=True)
+            store = Store(directory, source.by, source.on, source.measures)
+            store.offset = len(header.encode())
+        if store.offset < size:
+            f.seek(store.offset)
+            text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+            for chunk in _read(text, source, header):
+                store.append(chunk)
+                rows += len(chunk)
+            text.detach()
+        store.offset = size
+        store.tail = _tail_hash(f, size)
+        store.header = header
+    if rows or not appended:
+        store.save()
+    return store, rows
+
+
+# ==============================================================================
+# Tables
+# ==============================================================================
+
+Table = collections.namedtuple('Table', 'path source build')
+
+
+def risk_return(store):
+    # As in 2_crypto_volatility_analysis.ipynb
+    summary = store.query()
+    return pd.DataFrame({
+        'coin': summary.index,
+        'annualized_return': summary[('daily_return', 'mean')].to_numpy() * 365 * 100,
+        'avg_volatility': summary[('volatility_30d', 'mean')].to_numpy()})
+
+
+def growth_rates(store, days=30):
+    # As in 4_market_intelligence_analysis.ipynb: last value against the one days - 1 earlier
+    summary = store.query(days=days)['tvl_millions']
+    growth = (summary['last'] - summary['first']) / summary['first'] * 100
+    return pd.DataFrame({'protocol': summary.index, 'growth_30d': growth.to_numpy()}) \
+        .sort_values('growth_30d', ascending=False)
+
+
+def sentiment_summary(store):
+    # As in 3_crypto_social_sentiment.ipynb
+    summary = store.query()
+    return summary[[('sentiment_score', 'mean'), ('sentiment_score', 'std'),
+                    ('social_volume', 'mean'), ('social_volume', 'max'),
+                    ('social_dominance', 'mean')]].round(2)
+
+
+TABLES = {
+    'crypto_risk_return': Table('data/processed/crypto_risk_return.csv', 'crypto', risk_return),
+    'defi_growth_rates': Table('data/processed/defi_growth_rates.csv', 'defi', growth_rates),
+    'sentiment_summary': Table('data/processed/sentiment_summary.csv', 'sentiment',
+                               sentiment_summary),
+}
+
+
+def _csv(table, frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=table.build is sentiment_summary)
+    return buffer.getvalue()
+
+
+def update(names=None, root=PROJECT_ROOT, rebuild=False, write=True):
+    """Refresh the stores behind ``names`` (default: all tables) and rewrite changed tables.
+
+    Returns {name: (table DataFrame, rows read, changed)}.
+    """
+    stores, results = {}, {}
+    for name in names or TABLES:
+        table = TABLES[name]
+        if table.source not in stores:
+            stores[table.source] = refresh(table.source, root, rebuild)
+        store, rows = stores[table.source]
+        frame = table.build(store)
+        path = os.path.join(root, table.path)
+        text = _csv(table, frame)
+        with open(path, newline='') as f:
+            changed = f.read() != text
+        if changed and write:
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, 'w', newline='') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        results[name] = frame, rows, changed
+    return results
+
+
+def check(root=PROJECT_ROOT):
+    """Largest relative difference per table between the stores and the saved CSVs."""
+    worst = {}
+    for name, (frame, _, _) in update(root=root, write=False).items():
+        table = TABLES[name]
+        saved = pd.read_csv(os.path.join(root, table.path),
+                            **({'header': [0, 1], 'index_col': 0}
+                               if table.build is sentiment_summary else {}))
+        actual = frame.reset_index(drop=True).select_dtypes('number').to_numpy()
+        expected = saved.reset_index(drop=True).select_dtypes('number').to_numpy()
+        if actual.shape != expected.shape:
+            raise ValueError(f"{name}: shape {actual.shape}, expected {expected.shape}")
+        scale = np.maximum(np.abs(expected), 1e-12)
+        worst[name] = float(np.nanmax(np.abs(actual - expected) / scale))
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m portfolio summary',
+                                     description="Maintain the summary tables incrementally")
+    parser.add_argument('tables', nargs='*',
+                        help=f"tables to update: {', '.join(TABLES)} (default: all)")
+    parser.add_argument('--rebuild', action='store_true', help='rebuild the stores from scratch')
+    parser.add_argument('--check', action='store_true',
+                        help='compare the tables with the saved CSVs instead of writing')
+    parser.add_argument('--query', choices=sorted(SOURCES), help='print a summary of a source')
+    parser.add_argument('--entities', nargs='+', help='with --query: entities to include')
+    parser.add_argument('--start', help='with --query: first day')
+    parser.add_argument('--end', help='with --query: last day')
+    parser.add_argument('--days', type=int, help="with --query: each entity's last N days")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.tables) - set(TABLES))
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    if args.query:
+        store, _ = refresh(args.query, rebuild=args.rebuild)
+        summary = store.query(args.entities, args.start, args.end, args.days)
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(summary.xs('mean', axis=1, level=1).join(
+                summary.xs('count', axis=1, level=1), rsuffix=' (count)'))
+        return 0
+    if args.check:
+        failed = 0
+        for name, worst in check().items():
+            ok = worst <= TOLERANCE
+            failed += not ok
+            print(f"  [{'OK' if ok else 'FAIL'}] {name:<20} max relative difference {worst:.1e}")
+        return 1 if failed else 0
+
+    t0 = time.perf_counter()
+    for name, (frame, rows, changed) in update(args.tables, rebuild=args.rebuild).items():
+        state = 'updated' if changed else 'unchanged'
+        print(f"  [OK] {TABLES[name].path} {state} ({rows} new source rows)")
+    print(f"\nDone in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
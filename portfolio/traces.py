@@ -0,0 +1,162 @@
+"""
+Group-once trace building for the figure scripts
+Instead of filtering a frame with ``frame[frame['ticker'] == ticker]`` once
+per entity (O(rows x entities)), a dataset is grouped a single time: rows
+are sorted by entity (in order of first appearance, matching
+``Series.unique()``) and then by date, so every entity's rows form one
+contiguous block. Columns are gathered into that order once and each
+entity's data is handed to the trace constructors as a slice of it.
+
+Usage:
+    stocks = traces.group(stock_data, 'ticker')
+    for ticker, data in stocks.items(['date', 'close']):
+        fig.add_trace(go.Scatter(x=data['date'], y=data['close'], name=ticker))
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+_groups = {}
+_lock = threading.Lock()
+
+
+def shortest_float64(values):
+    """Widen float32 to the float64 nearest its shortest decimal form.
+
+    Equivalent to ``values.astype(str).astype(np.float64)`` without going
+    through strings: each value is rounded to 1, 2, ... 9 significant digits
+    until the result converts back to the same float32.
+    """
+    exact = values.astype(np.float64)
+    widened = exact.copy()
+    pending = np.isfinite(exact) & (exact != 0)
+    magnitude = np.zeros(len(exact))
+    magnitude[pending] = np.floor(np.log10(np.abs(exact[pending])))
+    for digits in range(1, 10):
+        rows = np.flatnonzero(pending)
+        if not len(rows):
+            break
+        power = digits - 1 - magnitude[rows]
+        scaled = np.round(exact[rows] * 10.0 ** power)
+        # Dividing by an exact power of ten rounds correctly, multiplying by
+        # 10**-power would not
+        rounded = np.where(power >= 0, scaled / 10.0 ** np.abs(power),
+                           scaled * 10.0 ** np.abs(power))
+        done = rounded.astype(np.float32) == values[rows]
+        widened[rows[done]] = rounded[done]
+        pending[rows[done]] = False
+    return widened
+
+
+def _plot_ready(values):
+    """Convert a gathered column into what plotly serializes compactly.
+
+    Dates become a DatetimeIndex (plotly writes '2024-01-02T05:00:00' for
+    those, but appends nanoseconds for raw datetime64 arrays). float32 is
+    widened through its shortest decimal form, so 172.4 is written as 172.4
+    and not 172.39999389648438.
+    """
+    if values.dtype.kind == 'M':
+        return pd.DatetimeIndex(values)
+    if values.dtype == np.float32:
+        return shortest_float64(values)
+    return values
+
+
+class GroupedFrame:
+    """A frame grouped once by entity and sorted by date within each entity."""
+
+    def __init__(self, frame, by, sort_by='date'):
+        self.frame = frame
+        self.by = by
+        codes, uniques = pd.factorize(frame[by], sort=False)
+        valid = codes >= 0
+
+        # Rank the codes by first appearance so groups come out in the same
+        # order as frame[by].unique()
+        first_seen = np.full(len(uniques), len(codes), dtype=np.int64)
+        np.minimum.at(first_seen, codes[valid], np.flatnonzero(valid))
+        rank_of_code = np.argsort(np.argsort(first_seen))
+        rank = np.where(valid, rank_of_code[codes], len(uniques))
+
+        keys = [rank]
+        if sort_by is not None and sort_by in frame.columns:
+            keys.insert(0, frame[sort_by].to_numpy())
+        # lexsort is stable: rows with equal keys keep their original order
+        order = np.lexsort(keys)
+        order = order[rank[order] < len(uniques)]
+        self._order = order
+
+        sorted_rank = rank[order]
+        boundaries = np.flatnonzero(sorted_rank[1:] != sorted_rank[:-1]) + 1
+        starts = np.concatenate([[0], boundaries]) if len(order) else np.array([], dtype=int)
+        stops = np.concatenate([boundaries, [len(order)]]) if len(order) else np.array([], dtype=int)
+        entities_by_rank = [uniques[i] for i in np.argsort(rank_of_code)]
+        self.entities = [entities_by_rank[r] for r in sorted_rank[starts]]
+        self._bounds = dict(zip(self.entities, zip(starts.tolist(), stops.tolist())))
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __contains__(self, entity):
+        return entity in self._bounds
+
+    def _gathered(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            with self._lock:
+                values = self._columns.get(name)
+                if values is None:
+                    values = _plot_ready(self.frame[name].to_numpy()[self._order])
+                    self._columns[name] = values
+        return values
+
+    def column(self, name, entity, dropna=False):
+        """One entity's values of ``name`` in date order (a view, no copy).
+
+        ``dropna=True`` drops missing values, which makes a copy.
+        """
+        start, stop = self._bounds[entity]
+        values = self._gathered(name)[start:stop]
+        if dropna:
+            values = values[~pd.isna(values)]
+        return values
+
+    def items(self, columns, entities=None, dropna=None):
+        """Yield ``(entity, {column: values})`` for each entity.
+
+        ``entities`` restricts (and orders) the output; unknown ones are
+        skipped. ``dropna`` lists columns whose missing values drop the row
+        from every returned column, like ``DataFrame.dropna(subset=...)``.
+        """
+        for entity in (self.entities if entities is None else entities):
+            if entity not in self._bounds:
+                continue
+            start, stop = self._bounds[entity]
+            data = {name: self._gathered(name)[start:stop] for name in columns}
+            if dropna:
+                keep = np.ones(stop - start, dtype=bool)
+                for name in dropna:
+                    keep &= ~pd.isna(self._gathered(name)[start:stop])
+                if not keep.all():
+                    data = {name: values[keep] for name, values in data.items()}
+            yield entity, data
+
+
+def group(frame, by, sort_by='date'):
+    """Return the GroupedFrame for ``frame``, grouping it only on first use.
+
+    Results are shared across every figure built in the process, so pass
+    the (read-only) frames returned by portfolio.loader.
+    """
+    key = (id(frame), by, sort_by)
+    with _lock:
+        grouped = _groups.get(key)
+        # Keeping a reference to the frame stops its id() from being reused
+        if grouped is None or grouped.frame is not frame:
+            grouped = GroupedFrame(frame, by, sort_by)
+            _groups[key] = grouped
+    return grouped
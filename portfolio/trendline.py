@@ -0,0 +1,76 @@
+"""
+Per-group OLS trendlines without statsmodels
+``px.scatter(..., color=..., trendline='ols')`` fits one statsmodels OLS
+model per color group, sorting and copying each group's rows on the way.
+ols() fits every group at once from per-group sums (np.bincount over the
+group codes), and add_ols() adds the same trendline traces plotly express
+would: one line per group after its markers, through the fitted values at
+the group's sorted x, with px's hovertemplate.
+"""
+import collections
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+Fit = collections.namedtuple('Fit', 'slope intercept rsquared count')
+
+
+def ols(x, y, groups):
+    """DataFrame of Fit columns per group (in order of first appearance).
+
+    Rows where x or y is missing are ignored, as with ``missing='drop'``.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    codes, names = pd.factorize(np.asarray(groups))
+    keep = ~(np.isnan(x) | np.isnan(y)) & (codes >= 0)
+    x, y, codes = x[keep], y[keep], codes[keep]
+    size = len(names)
+
+    count = np.bincount(codes, minlength=size).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = np.bincount(codes, x, size) / count
+        mean_y = np.bincount(codes, y, size) / count
+        # Centered sums keep the fit accurate for large, nearly constant values
+        dx = x - mean_x[codes]
+        dy = y - mean_y[codes]
+        sxx = np.bincount(codes, dx * dx, size)
+        sxy = np.bincount(codes, dx * dy, size)
+        syy = np.bincount(codes, dy * dy, size)
+        slope = sxy / sxx
+        rsquared = sxy * sxy / (sxx * syy)
+    return pd.DataFrame({'slope': slope, 'intercept': mean_y - slope * mean_x,
+                         'rsquared': rsquared, 'count': count.astype(int)},
+                        index=pd.Index(names, name='group'))
+
+
+def add_ols(fig, frame, x, y, color, labels=None):
+    """``fig`` from ``px.scatter(frame, x, y, color=color)`` with OLS trendlines.
+
+    Returns a new figure whose traces are those of ``trendline='ols'``.
+    """
+    labels = labels or {}
+    fits = ols(frame[x], frame[y], frame[color])
+    values = frame[[x, y, color]].dropna()
+    values = values.iloc[np.lexsort((values[x].to_numpy(),
+                                     pd.factorize(values[color])[0]))]
+    rows = values.groupby(color, sort=False, observed=True).indices
+
+    data = []
+    for trace in fig.data:
+        data.append(trace)
+        name = trace.name
+        if name not in rows or fits.loc[name, 'count'] < 2:
+            continue
+        fit = fits.loc[name]
+        xs = values[x].to_numpy()[rows[name]]
+        header = (f"<b>OLS trendline</b><br>{y} = {fit.slope:g} * {x} + {fit.intercept:g}<br>"
+                  f"R<sup>2</sup>={fit.rsquared:f}<br><br>")
+        hover = (f"{header}{labels.get(color, color)}={name}<br>{labels.get(x, x)}=%{{x}}<br>"
+                 f"{labels.get(y, y)}=%{{y}} <b>(trend)</b><extra></extra>")
+        data.append(go.Scatter(
+            x=xs, y=fit.intercept + fit.slope * xs.astype(np.float64), mode='lines',
+            name=name, legendgroup=trace.legendgroup, marker=trace.marker,
+            showlegend=False, hovertemplate=hover, xaxis=trace.xaxis, yaxis=trace.yaxis))
+    return go.Figure(data=data, layout=fig.layout)
@@ -0,0 +1,90 @@
+"""
+WebGL trace selection for large figures
+SVG scatter traces slow the browser to a crawl beyond roughly 10k points
+per chart, so apply() switches traces to go.Scattergl: every trace above
+TRACE_THRESHOLD points, then the largest remaining ones until the SVG
+traces fit the figure's point budget. Hovertemplates, colors, names and
+everything else Scattergl supports carry over.
+
+Plotly's rangeslider does not draw WebGL traces, so traces on an axis
+with a visible rangeslider stay SVG and are reduced with LTTB to the
+threshold instead. Animated figures are left alone (frames would need
+the same trace types).
+
+See benchmarks/webgl_bench.py for the browser-side render benchmark.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from portfolio.downsample import lttb
+
+# Points above which a single trace is always drawn with WebGL
+TRACE_THRESHOLD = 5000
+# Default number of points a figure may draw as SVG
+DEFAULT_POINT_BUDGET = 20000
+
+# Scatter attributes that Scattergl lacks or draws differently
+_SVG_ONLY = ('stackgroup', 'groupnorm')
+
+
+def _points(trace):
+    values = trace.y if trace.y is not None else trace.x
+    return len(values) if values is not None else 0
+
+
+def _has_rangeslider(layout, trace):
+    axis = layout[f"xaxis{(trace.xaxis or 'x')[1:]}"]
+    return bool(axis.rangeslider.visible)
+
+
+def _eligible(trace):
+    if trace.type != 'scatter' or any(trace[name] is not None for name in _SVG_ONLY):
+        return False
+    return trace.line.shape in (None, 'linear', 'hv', 'vh', 'hvh', 'vhv')
+
+
+def plan(fig, point_budget=DEFAULT_POINT_BUDGET, threshold=TRACE_THRESHOLD):
+    """Return ``(webgl, reduce)``: indices of traces to convert and to LTTB-reduce."""
+    if fig.frames:
+        return [], []
+    webgl, reduce, svg = [], [], []
+    for index, trace in enumerate(fig.data):
+        if not _eligible(trace):
+            continue
+        if _has_rangeslider(fig.layout, trace):
+            if _points(trace) > threshold:
+                reduce.append(index)
+        elif _points(trace) > threshold:
+            webgl.append(index)
+        else:
+            svg.append(index)
+
+    total = sum(_points(fig.data[i]) for i in range(len(fig.data)) if i not in webgl)
+    total -= sum(_points(fig.data[i]) - threshold for i in reduce)
+    for index in sorted(svg, key=lambda i: -_points(fig.data[i])):
+        if total <= point_budget:
+            break
+        webgl.append(index)
+        total -= _points(fig.data[index])
+    return sorted(webgl), reduce
+
+
+def apply(fig, point_budget=DEFAULT_POINT_BUDGET, threshold=TRACE_THRESHOLD):
+    """Return ``fig`` with large traces switched to WebGL (``fig`` when nothing changes)."""
+    webgl, reduce = plan(fig, point_budget, threshold)
+    if not webgl and not reduce:
+        return fig
+
+    data = []
+    for index, trace in enumerate(fig.data):
+        if index in webgl:
+            props = trace.to_plotly_json()
+            props.pop('type')
+            trace = go.Scattergl(props, skip_invalid=True)
+        elif index in reduce:
+            x, y = np.asarray(trace.x), np.asarray(trace.y)
+            # plotly hands dates back as datetime objects
+            keep = lttb(x.astype('datetime64[ns]') if x.dtype == object else x, y, threshold)
+            trace = go.Scatter(trace, x=x[keep], y=y[keep])
+        data.append(trace)
+    return go.Figure(data=data, layout=fig.layout)
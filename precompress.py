@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Precompress text assets for serve.py
+Writes .gz (and .br, when the optional brotli package is installed)
+siblings next to every compressible file so the server can send them
+without compressing on each request.
+
+Usage (from the project root):
+    python precompress.py                # site/, visualizations/, data/processed/
+    python precompress.py data/processed # just one directory
+"""
+import argparse
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.html', '.htm', '.css', '.js', '.mjs', '.json', '.csv', '.svg', '.txt', '.xml', '.map',
+}
+# Below this size the headers cost more than compression saves
+MIN_COMPRESS_BYTES = 1024
+# Only keep a variant if it is at most this fraction of the original
+MAX_COMPRESSED_RATIO = 0.9
+
+DEFAULT_ROOTS = ['site', 'visualizations', 'data/processed']
+
+# Content-Encoding -> file suffix, in order of preference
+VARIANT_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    """Encodings this interpreter can produce, best first."""
+    return [encoding for encoding in VARIANT_SUFFIXES if encoding != 'br' or brotli is not None]
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def compress(data, encoding, best=True):
+    """Compress ``data``; ``best=False`` trades ratio for speed (on-the-fly use)."""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output byte-for-byte reproducible
+        return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+    if encoding == 'br':
+        if brotli is None:
+            raise ValueError("brotli is not installed")
+        return brotli.compress(data, quality=11 if best else 5)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+def variant_is_fresh(source_path, variant_path):
+    """Variants are stamped with their source's mtime, so any edit makes them stale."""
+    try:
+        return os.stat(variant_path).st_mtime_ns == os.stat(source_path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def write_variant(source_path, encoding, data, source_stat):
+    variant_path = source_path + VARIANT_SUFFIXES[encoding]
+    compressed = compress(data, encoding)
+    if len(compressed) > len(data) * MAX_COMPRESSED_RATIO:
+        if os.path.exists(variant_path):
+            os.remove(variant_path)
+        return None
+
+    tmp_path = f"{variant_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(compressed)
+    os.utime(tmp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    os.replace(tmp_path, variant_path)
+    return len(compressed)
+
+
+def iter_compressible(roots):
+    for root in roots:
+        if os.path.isfile(root):
+            if is_compressible(root):
+                yield root
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                if is_compressible(path):
+                    yield path
+
+
+def precompress(roots, encodings=None, force=False, verbose=True):
+    """Write compressed siblings for every compressible file under ``roots``.
+
+    Returns ``(original_bytes, {encoding: compressed_bytes})`` over the
+    files that got a variant.
+    """
+    encodings = encodings or available_encodings()
+    original_total = 0
+    compressed_totals = dict.fromkeys(encodings, 0)
+
+    for path in iter_compressible(roots):
+        st = os.stat(path)
+        if st.st_size < MIN_COMPRESS_BYTES:
+            continue
+
+        stale = [encoding for encoding in encodings
+                 if force or not variant_is_fresh(path, path + VARIANT_SUFFIXES[encoding])]
+        if stale:
+            with open(path, 'rb') as f:
+                data = f.read()
+        sizes = {}
+        for encoding in encodings:
+            if encoding in stale:
+                sizes[encoding] = write_variant(path, encoding, data, st)
+            elif os.path.exists(path + VARIANT_SUFFIXES[encoding]):
+                sizes[encoding] = os.path.getsize(path + VARIANT_SUFFIXES[encoding])
+
+        if not any(sizes.values()):
+            continue
+        original_total += st.st_size
+        for encoding, size in sizes.items():
+            compressed_totals[encoding] += size or st.st_size
+
+        if verbose and stale:
+            ratios = ', '.join(f"{encoding} {st.st_size / size:.1f}x"
+                               for encoding, size in sizes.items() if size)
+            print(f"  [OK] {path} ({st.st_size:,} bytes; {ratios})")
+
+    return original_total, compressed_totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('roots', nargs='*', default=DEFAULT_ROOTS)
+    parser.add_argument('--force', action='store_true', help='rewrite up-to-date variants too')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if brotli is None:
+        print("brotli not installed; writing gzip variants only (pip install brotli)")
+
+    original, compressed = precompress([r for r in args.roots if os.path.exists(r)], force=args.force)
+    if not original:
+        print("Nothing to compress.")
+        return 0
+
+    print(f"\nCompressible assets: {original:,} bytes")
+    for encoding, size in compressed.items():
+        print(f"  {encoding:<5} {size:>12,} bytes ({original / size:.1f}x smaller)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
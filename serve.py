@@ -2,17 +2,331 @@
 """
 Simple HTTP server for Data Visualization Portfolio
 Serves the site/ directory while allowing access to visualizations/
+
+Connections are handled by a bounded worker pool with HTTP/1.1 keep-alive,
+so a slow client downloading a large PNG no longer blocks other visitors.
+Between requests, idle keep-alive connections wait in a selector rather
+than in a worker, which only gets a connection once a request arrives.
+Static files get strong content-hash ETags, conditional GET (304) support
+and a per-directory Cache-Control policy, and the hottest file bodies are
+kept in a size-bounded in-memory LRU cache. Text assets are sent gzip or
+brotli encoded per Accept-Encoding, preferring the siblings written by
+precompress.py and compressing on the fly (cached) otherwise. Large binary
+files are streamed with zero-copy sendfile(), and single-range requests
+(Range / If-Range) are answered with 206 Partial Content.
+
+/api/datasets lists the processed datasets and /api/datasets/<name> returns
+a slice of one as compact column-wise JSON:
+    ?entity=AAPL,MSFT&start=2024-01-01&end=2024-06-30&columns=date,close&limit=500
+/api/series/<name> returns one entity's column downsampled to a point
+budget, at full resolution when the range is narrow enough (needs numpy):
+    ?entity=AAPL&column=close&start=2024-01-01&end=2024-03-31&points=2000
+/api/live/<name>?column=close is a Server-Sent Events stream of the rows
+appended to a dataset, which the chart pages add to their traces without
+reloading (see portfolio/live.py; --live-ticks publishes synthetic rows).
+Set PORTFOLIO_ROOT to serve another tree with the same layout, such as
+the synthetic datasets of benchmarks/synthetic.py.
+Run with --single-threaded to get the original one-connection-at-a-time
+server (useful as a baseline for benchmarks/load_test.py).
 """
+import argparse
+import collections
+import concurrent.futures
+import datetime
+import email.utils
+import hashlib
 import http.server
-import socketserver
+import io
+import json
 import os
+import selectors
+import shutil
+import signal
+import socket
+import threading
+import time
+import urllib.parse
+
+import precompress
+from portfolio import PROJECT_ROOT
+from portfolio.datasets import DatasetCatalog
+from portfolio.live import LIVE_MAX_CLIENTS, LIVE_POLL_INTERVAL, LiveFeed, Tailer, TickGenerator
 
 PORT = 8000
+WORKERS = 16
+MAX_CONNECTIONS = 256
+KEEPALIVE_TIMEOUT = 15
+SHUTDOWN_GRACE = 10
+
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_MAX_FILE_BYTES = 8 * 1024 * 1024
+# Cached entries are trusted for this long before their mtime is re-checked
+CACHE_STAT_INTERVAL = 1.0
+# Most paths remembered as missing (random 404s would grow the set otherwise)
+CACHE_MAX_MISSING = 4096
+COMPRESS_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Binary files at least this big skip the body cache and go out via sendfile()
+SENDFILE_MIN_BYTES = 256 * 1024
+# Upper bound on ?points= for /api/series
+MAX_SERIES_POINTS = 20000
+
+# Cache-Control per directory, matched on the path relative to the project
+# root. Everything revalidates cheaply thanks to the ETag.
+CACHE_POLICIES = [
+    ('site/assets/', 'public, max-age=86400'),
+    ('site/', 'no-cache'),
+    # Content-hashed bundles written by python -m portfolio build
+    ('visualizations/interactive/assets/', 'public, max-age=31536000, immutable'),
+    ('visualizations/', 'public, max-age=3600'),
+    ('data/processed/', 'public, max-age=300, must-revalidate'),
+]
+DEFAULT_CACHE_POLICY = 'no-cache'
+
+CachedFile = collections.namedtuple('CachedFile', 'path mtime_ns size etag body')
+
+
+class FileCache:
+    """Size-bounded LRU of static file bodies and their ETags.
+
+    Entries are keyed by absolute path and invalidated whenever the file's
+    mtime or size changes. Files larger than ``max_file_bytes`` only have
+    their ETag remembered; their body is streamed from disk each time.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_file_bytes=CACHE_MAX_FILE_BYTES,
+                 stat_interval=CACHE_STAT_INTERVAL, max_missing=CACHE_MAX_MISSING):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.stat_interval = stat_interval
+        self.max_missing = max_missing
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._checked = {}
+        self._missing = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, max_body_bytes=None):
+        """Return a CachedFile for ``path``; raises OSError if it can't be read.
+
+        ``max_body_bytes`` lowers the size limit for keeping this file's body.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - self._checked.get(path, 0) < self.stat_interval:
+                self._entries.move_to_end(path)
+                if entry.body is not None:
+                    self.hits += 1
+                return entry
+            if now - self._missing.get(path, -self.stat_interval) < self.stat_interval:
+                raise FileNotFoundError(path)
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            # Remembered so that probing for absent .br/.gz siblings stays cheap
+            with self._lock:
+                self._remember_missing(path, now)
+            raise
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (entry.mtime_ns, entry.size) == (st.st_mtime_ns, st.st_size):
+                self._entries.move_to_end(path)
+                self._checked[path] = now
+                if entry.body is not None:
+                    self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = self._load(path, max_body_bytes)
+        with self._lock:
+            self._store(entry, now)
+        return entry
+
+    def _remember_missing(self, path, now):
+        # Oldest first: expired entries and any beyond max_missing go from the front
+        self._missing.pop(path, None)
+        self._missing[path] = now
+        while self._missing and (len(self._missing) > self.max_missing or
+                                 now - next(iter(self._missing.values())) >= self.stat_interval):
+            self._missing.popitem(last=False)
+
+    def _load(self, path, max_body_bytes=None):
+        limit = self.max_file_bytes if max_body_bytes is None else min(self.max_file_bytes,
+                                                                       max_body_bytes)
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            digest = hashlib.blake2b(digest_size=16)
+            if st.st_size <= limit:
+                body = f.read()
+                digest.update(body)
+            else:
+                body = None
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return CachedFile(path, st.st_mtime_ns, st.st_size, f'"{digest.hexdigest()}"', body)
+
+    def _store(self, entry, now):
+        old = self._entries.pop(entry.path, None)
+        if old is not None and old.body is not None:
+            self.current_bytes -= len(old.body)
+        self._entries[entry.path] = entry
+        self._checked[entry.path] = now
+        if entry.body is not None:
+            self.current_bytes += len(entry.body)
+        while self.current_bytes > self.max_bytes:
+            path, evicted = self._entries.popitem(last=False)
+            self._checked.pop(path, None)
+            if evicted.body is not None:
+                self.current_bytes -= len(evicted.body)
+
+
+class CompressionCache:
+    """LRU of bodies compressed on the fly, keyed by source ETag and encoding.
+
+    A ``None`` entry records that compression did not pay off for that body.
+    """
+
+    def __init__(self, max_bytes=COMPRESS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, entry, encoding):
+        key = (entry.etag, encoding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        compressed = precompress.compress(entry.body, encoding, best=False)
+        if len(compressed) > len(entry.body) * precompress.MAX_COMPRESSED_RATIO:
+            variant = None
+        else:
+            etag = f'{entry.etag[:-1]}-{encoding}"'
+            variant = CachedFile(entry.path, entry.mtime_ns, len(compressed), etag, compressed)
+
+        with self._lock:
+            if key not in self._entries and variant is not None:
+                self.current_bytes += variant.size
+            self._entries[key] = variant
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                if evicted is not None:
+                    self.current_bytes -= evicted.size
+        return variant
+
+
+def parse_range(header, size):
+    """Parse a ``Range: bytes=...`` header against a body of ``size`` bytes.
+
+    Returns ``(start, stop)`` with ``stop`` exclusive, or ``None`` when the
+    header should be ignored (malformed, or more than one range). Raises
+    ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition('-'))
+    if (not sep or not (first or last)
+            or (first and not first.isdigit()) or (last and not last.isdigit())):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError("empty suffix range")
+        return max(size - int(last), 0), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("range starts past the end of the body")
+    return start, min(int(last) + 1, size) if last else size
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
 
 class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections are dropped after this many seconds
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response waits ~40ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+    file_cache = FileCache()
+    compression_cache = CompressionCache()
+    dataset_catalog = DatasetCatalog()
+    # Set by main() for the pooled server; /api/live answers 501 without it
+    live_feed = None
+    use_sendfile = hasattr(os, 'sendfile')
+    response_length = None
+    # True once handle() has given the idle connection back to the pooled server
+    parked = False
+
+    def handle(self):
+        """Answer the requests that are waiting, then park the connection.
+
+        The pooled server watches parked connections in a selector and
+        hands them back to a worker when the next request arrives, so an
+        idle keep-alive connection does not hold a worker.
+        """
+        park = getattr(self.server, 'park', None)
+        if park is None:
+            return super().handle()
+        self.parked = False
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.request_waiting():
+            self.handle_one_request()
+        if not self.close_connection:
+            self.parked = park(self)
+
+    def request_waiting(self):
+        """True if request bytes (or EOF) can be read without blocking."""
+        timeout = self.connection.gettimeout()
+        self.connection.settimeout(0)
+        try:
+            # Returns what is buffered, or one non-blocking read of the socket
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True
+        finally:
+            self.connection.settimeout(timeout)
+
+    def finish(self):
+        if self.parked:
+            # The files stay open for the connection's next request
+            self.wfile.flush()
+            return
+        super().finish()
+
     def end_headers(self):
         # Add CORS headers if needed
         self.send_header('Access-Control-Allow-Origin', '*')
+        # Ask clients not to reuse the connection once shutdown has started
+        if getattr(self.server, 'draining', False):
+            self.send_header('Connection', 'close')
         super().end_headers()
 
     def translate_path(self, path):
@@ -26,17 +340,626 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
         return path
 
-if __name__ == '__main__':
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-
-    with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
-        print(f"=" * 60)
-        print(f"Data Visualization Portfolio Server")
-        print(f"=" * 60)
-        print(f"Serving at: http://localhost:{PORT}")
-        print(f"Main site: http://localhost:{PORT}/site/")
-        print(f"Visualizations accessible at /visualizations/")
-        print(f"=" * 60)
-        print(f"Press CTRL+C to stop")
-        print(f"=" * 60)
+    def send_head(self):
+        # Left over from the previous request on a keep-alive connection otherwise
+        self.response_length = None
+        if urllib.parse.urlsplit(self.path).path.startswith('/api/'):
+            return self.send_api_head()
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = self.directory_index(path)
+            if index is None or not urllib.parse.urlsplit(self.path).path.endswith('/'):
+                # The trailing-slash redirect and directory listings stay as they were
+                return super().send_head()
+            # Served like any other file: cached, conditional and compressed
+            path = index
+        if path.endswith('/'):
+            self.send_error(404, "File not found")
+            return None
+
+        compressible = precompress.is_compressible(path)
+        try:
+            # Compressible files keep their body for on-the-fly compression;
+            # big binaries are left to the page cache and sendfile()
+            entry = self.file_cache.get(
+                path, max_body_bytes=None if compressible else SENDFILE_MIN_BYTES - 1)
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        encoding = None
+        if compressible:
+            entry, encoding = self.select_encoding(entry)
+
+        if self.is_not_modified(entry):
+            self.send_response(304)
+            self.send_validators(entry)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        start, stop = 0, entry.size
+        range_header = self.headers.get('Range')
+        if range_header is not None and self.if_range_matches(entry):
+            try:
+                byte_range = parse_range(range_header, entry.size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{entry.size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+            if byte_range is not None:
+                start, stop = byte_range
+
+        if (start, stop) == (0, entry.size):
+            self.send_response(200)
+        else:
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{stop - 1}/{entry.size}')
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header('Content-Length', str(stop - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_validators(entry)
+        self.end_headers()
+        if entry.body is not None:
+            return io.BytesIO(entry.body[start:stop] if stop - start < entry.size else entry.body)
+        f = open(entry.path, 'rb')
+        f.seek(start)
+        self.response_length = stop - start
+        return f
+
+    @staticmethod
+    def directory_index(path):
+        """The index page SimpleHTTPRequestHandler would serve for directory ``path``, or None."""
+        for name in ('index.html', 'index.htm'):
+            index = os.path.join(path, name)
+            if os.path.isfile(index):
+                return index
+        return None
+
+    def send_api_head(self):
+        parts = urllib.parse.urlsplit(self.path)
+        route = parts.path.rstrip('/')
+        params = urllib.parse.parse_qs(parts.query)
+        if route.startswith('/api/live/'):
+            return self.send_live_head(urllib.parse.unquote(route[len('/api/live/'):]), params)
+
+        try:
+            if route == '/api/datasets':
+                payload = self.dataset_catalog.describe()
+                version = max(self.dataset_catalog.get(name).mtime_ns for name in payload)
+            elif route.startswith('/api/datasets/'):
+                index = self.dataset_catalog.get(urllib.parse.unquote(route[len('/api/datasets/'):]))
+                payload = index.query(**self.dataset_query_args(params))
+                version = index.mtime_ns
+            elif route.startswith('/api/series/'):
+                name = urllib.parse.unquote(route[len('/api/series/'):])
+                payload = self.dataset_catalog.series(name, **self.series_query_args(params))
+                version = self.dataset_catalog.get(name).mtime_ns
+            else:
+                return self.send_json_error(404, "Unknown API endpoint")
+        except KeyError:
+            return self.send_json_error(404, "Unknown dataset")
+        except ValueError as exc:
+            return self.send_json_error(400, str(exc))
+        except OSError:
+            return self.send_json_error(404, "Dataset file not found")
+        except ImportError:
+            return self.send_json_error(501, "Downsampled series need numpy on the server")
+
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry, encoding = self.select_encoding(
+            CachedFile(parts.path, version, len(body), etag, body), precompressed=False)
+
+        not_modified = self.is_not_modified(entry)
+        if not_modified:
+            self.send_response(304)
+        else:
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(entry.size))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', entry.etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if not_modified or self.command == 'HEAD':
+            return None
+        return io.BytesIO(entry.body)
+
+    def send_live_head(self, name, params):
+        """Start an event stream of ``name``'s appended rows and hand the socket to the feed."""
+        feed = self.live_feed
+        if feed is None or not hasattr(self.server, 'detach'):
+            return self.send_json_error(501, "Live updates need the pooled server")
+        column = params.get('column', [None])[-1]
+        try:
+            index = self.dataset_catalog.get(name)
+        except KeyError:
+            return self.send_json_error(404, "Unknown dataset")
+        except OSError:
+            return self.send_json_error(404, "Dataset file not found")
+        dataset = index.dataset
+        if column in (None, dataset.entity_column, dataset.date_column) or \
+                column not in index.columns:
+            return self.send_json_error(400, f"column must be a value column of {name}")
+        if len(feed) >= feed.max_clients:
+            self.send_response(503)
+            self.send_header('Retry-After', '5')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        try:
+            last_id = int(self.headers.get('Last-Event-ID', ''))
+        except ValueError:
+            last_id = None
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        # Proxies such as nginx would otherwise hold events back in a buffer
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        if self.command == 'HEAD':
+            return None
+        self.wfile.flush()
+        if feed.attach(self.connection, (name, column), last_id, preamble=b'retry: 2000\n\n'):
+            self.server.detach(self.connection)
+        return None
+
+    @staticmethod
+    def dataset_query_args(params):
+        """Turn /api/datasets/<name> query parameters into DatasetIndex.query() kwargs."""
+        def split(name):
+            values = [v for item in params.get(name, []) for v in item.split(',') if v]
+            return values or None
+
+        limit = params.get('limit', [None])[-1]
+        try:
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            raise ValueError("limit must be an integer") from None
+        return {
+            'entities': split('entity'),
+            'start': params.get('start', [None])[-1],
+            'end': params.get('end', [None])[-1],
+            'columns': split('columns'),
+            'limit': limit,
+        }
+
+    @staticmethod
+    def series_query_args(params):
+        """Turn /api/series/<name> query parameters into DatasetCatalog.series() kwargs."""
+        args = {name: params.get(name, [None])[-1] for name in ('entity', 'column', 'start', 'end')}
+        if not args['entity'] or not args['column']:
+            raise ValueError("entity and column are required")
+        points = params.get('points', [None])[-1]
+        try:
+            args['points'] = min(int(points), MAX_SERIES_POINTS) if points is not None else None
+        except ValueError:
+            raise ValueError("points must be an integer") from None
+        return args
+
+    def send_json_error(self, status, message):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body) if self.command != 'HEAD' else None
+
+    def copyfile(self, source, outputfile):
+        if isinstance(source, io.BytesIO):
+            # Cached bodies go out in a single write
+            outputfile.write(source.getbuffer())
+            return
+        length = self.response_length
+        if length is None:
+            shutil.copyfileobj(source, outputfile)
+            return
+        if self.use_sendfile:
+            self.connection.sendfile(source, offset=source.tell(), count=length)
+            return
+        while length > 0:
+            chunk = source.read(min(length, 64 * 1024))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            length -= len(chunk)
+
+    def if_range_matches(self, entry):
+        """A Range header only applies if If-Range (when sent) still matches."""
+        if_range = self.headers.get('If-Range')
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            # If-Range needs the strong comparison; weak tags never match
+            return if_range == entry.etag
+        return if_range == self.date_time_string(entry.mtime_ns // 10**9)
+
+    def select_encoding(self, entry, precompressed=True):
+        """Return the best representation of ``entry`` the client accepts.
+
+        Precompressed siblings win over on-the-fly compression; the result
+        is ``(entry, content_encoding)`` with ``None`` meaning identity.
+        Pass ``precompressed=False`` for bodies that have no file on disk.
+        """
+        if entry.size < precompress.MIN_COMPRESS_BYTES:
+            return entry, None
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding', ''))
+        wildcard = accepted.get('*', 0.0)
+        candidates = [encoding for encoding in precompress.VARIANT_SUFFIXES
+                      if accepted.get(encoding, wildcard) > 0]
+        # sorted() is stable, so equal q-values keep the server's preference
+        candidates.sort(key=lambda encoding: -accepted.get(encoding, wildcard))
+
+        for encoding in candidates if precompressed else []:
+            try:
+                variant = self.file_cache.get(entry.path + precompress.VARIANT_SUFFIXES[encoding])
+            except OSError:
+                continue
+            if variant.mtime_ns == entry.mtime_ns:
+                return variant, encoding
+
+        if entry.body is None:
+            return entry, None
+        for encoding in candidates:
+            if encoding not in precompress.available_encodings():
+                continue
+            variant = self.compression_cache.get(entry, encoding)
+            if variant is not None:
+                return variant, encoding
+        return entry, None
+
+    def send_validators(self, entry):
+        self.send_header('ETag', entry.etag)
+        self.send_header('Last-Modified', self.date_time_string(entry.mtime_ns // 10**9))
+        self.send_header('Cache-Control', self.cache_policy(entry.path))
+
+    def is_not_modified(self, entry):
+        # If-None-Match wins over If-Modified-Since (RFC 7232, section 6)
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            # GET uses the weak comparison, so W/"x" matches "x"
+            return '*' in tags or any(tag.removeprefix('W/') == entry.etag for tag in tags)
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since is None:
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.timezone.utc)
+            return entry.mtime_ns // 10**9 <= since.timestamp()
+        return False
+
+    def cache_policy(self, path):
+        relpath = os.path.relpath(path, os.getcwd()).replace(os.sep, '/')
+        for prefix, policy in CACHE_POLICIES:
+            if relpath.startswith(prefix):
+                return policy
+        return DEFAULT_CACHE_POLICY
+
+
+class SingleThreadedHTTPRequestHandler(MyHTTPRequestHandler):
+    # The original server spoke HTTP/1.0 and closed after every response
+    protocol_version = 'HTTP/1.0'
+
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """TCP server that hands each request to a bounded thread pool.
+
+    At most ``workers`` requests are answered at once and at most
+    ``max_connections`` connections are admitted; connections beyond that
+    limit get an immediate 503. Between requests a keep-alive connection
+    is parked in a selector rather than holding a worker, and handed to a
+    worker again when its next request arrives. Parked connections idle
+    for longer than the handler's timeout are closed.
+    """
+
+    def __init__(self, server_address, handler_class,
+                 workers=WORKERS, max_connections=MAX_CONNECTIONS):
+        self.request_queue_size = max_connections
+        self.draining = False
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='portfolio-http')
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._futures = set()
+        self._connections = set()
+        self._detached = set()
+        # Parked connections: socket -> (handler, monotonic time parked)
+        self._parked = {}
+        self._to_park = []
+        self._selector = selectors.DefaultSelector()
+        self._wakeup, self._wakeup_writer = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        super().__init__(server_address, handler_class)
+        self._parking = threading.Thread(target=self._watch_parked, name='portfolio-http-idle',
+                                         daemon=True)
+        self._parking.start()
+
+    def process_request(self, request, client_address):
+        if self.draining or not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+
+        with self._lock:
+            self._connections.add(request)
+        self._submit(request, client_address)
+
+    def _submit(self, request, client_address, handler=None):
+        future = self._pool.submit(self._process_in_worker, request, client_address, handler)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget_future)
+
+    def _process_in_worker(self, request, client_address, handler=None):
+        parked = False
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(request, client_address, self)
+            else:
+                # A parked connection whose next request has arrived
+                try:
+                    handler.handle()
+                finally:
+                    handler.finish()
+            parked = handler.parked
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if parked:
+                with self._lock:
+                    self._to_park.append(handler)
+                self._wake()
+            else:
+                self._close(request)
+
+    def park(self, handler):
+        """Called by a handler done with its requests; False if it should close instead."""
+        return not self.draining
+
+    def _close(self, request):
+        with self._lock:
+            self._connections.discard(request)
+            detached = request in self._detached
+            self._detached.discard(request)
+        if not detached:
+            self.shutdown_request(request)
+        self._slots.release()
+
+    def _wake(self):
+        try:
+            self._wakeup_writer.send(b'\0')
+        except OSError:
+            pass
+
+    def _watch_parked(self):
+        # Runs in its own thread until server_close()
+        while True:
+            try:
+                events = self._selector.select(timeout=1.0)
+            except (OSError, ValueError):
+                return
+            now = time.monotonic()
+            for key, _ in events:
+                if key.fileobj is self._wakeup:
+                    try:
+                        while self._wakeup.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                self._selector.unregister(key.fileobj)
+                handler, _ = self._parked.pop(key.fileobj)
+                try:
+                    self._submit(key.fileobj, handler.client_address, handler)
+                except RuntimeError:
+                    # The pool has shut down (drain())
+                    self._close_parked(handler)
+
+            with self._lock:
+                to_park, self._to_park = self._to_park, []
+                draining = self.draining
+            for handler in to_park:
+                if draining:
+                    self._close_parked(handler)
+                    continue
+                self._parked[handler.connection] = handler, now
+                self._selector.register(handler.connection, selectors.EVENT_READ)
+
+            idle = [conn for conn, (handler, since) in self._parked.items()
+                    if draining or now - since >= handler.timeout]
+            for conn in idle:
+                self._selector.unregister(conn)
+                handler, _ = self._parked.pop(conn)
+                self._close_parked(handler)
+
+    def _close_parked(self, handler):
+        handler.parked = False
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self._close(handler.connection)
+
+    def detach(self, request):
+        """Leave ``request``'s socket open when its handler returns (it now
+        belongs to someone else, like the live feed)."""
+        with self._lock:
+            self._detached.add(request)
+
+    def _forget_future(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _reject(self, request):
+        try:
+            request.sendall(b'HTTP/1.1 503 Service Unavailable\r\n'
+                            b'Retry-After: 1\r\n'
+                            b'Content-Length: 0\r\n'
+                            b'Connection: close\r\n\r\n')
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _shutdown_connections(self, how):
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                conn.shutdown(how)
+            except OSError:
+                pass
+
+    def drain(self, timeout=SHUTDOWN_GRACE):
+        """Finish in-flight requests, then close every remaining connection.
+
+        Must be called after serve_forever() has returned. Parked keep-alive
+        connections are closed straight away; requests that are already
+        being answered get up to ``timeout`` seconds to complete.
+        """
+        self.draining = True
+        # The parking thread closes parked connections, and handlers finishing
+        # from now on close instead of parking. Reading a request that has
+        # only partly arrived is cut short; responses being written are not.
+        self._wake()
+        self._shutdown_connections(socket.SHUT_RD)
+
+        with self._lock:
+            pending = list(self._futures)
+        _, not_done = concurrent.futures.wait(pending, timeout=timeout)
+        if not_done:
+            print(f"Closing {len(not_done)} connection(s) still open after {timeout}s")
+            self._shutdown_connections(socket.SHUT_RDWR)
+
+        self._pool.shutdown(wait=True)
+        # Connections parked by the last requests
+        self._wake()
+        deadline = time.monotonic() + 2
+        while self._parked_count() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _parked_count(self):
+        with self._lock:
+            waiting = len(self._to_park)
+        return waiting + len(self._parked)
+
+    def server_close(self):
+        super().server_close()
+        self._selector.close()
+        self._wakeup_writer.close()
+        self._wakeup.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bind', default='', help='address to bind (default: all interfaces)')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='connections served concurrently')
+    parser.add_argument('--max-connections', type=int, default=MAX_CONNECTIONS,
+                        help='connections admitted before answering 503')
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help='seconds an idle keep-alive connection is kept open')
+    parser.add_argument('--shutdown-grace', type=float, default=SHUTDOWN_GRACE,
+                        help='seconds to let in-flight requests finish on shutdown')
+    parser.add_argument('--cache-mb', type=float, default=CACHE_MAX_BYTES / 2**20,
+                        help='memory for cached file bodies (0 disables body caching)')
+    parser.add_argument('--cache-file-mb', type=float, default=CACHE_MAX_FILE_BYTES / 2**20,
+                        help='largest file whose body is kept in memory')
+    parser.add_argument('--compress-cache-mb', type=float, default=COMPRESS_CACHE_MAX_BYTES / 2**20,
+                        help='memory for bodies compressed on the fly')
+    parser.add_argument('--no-sendfile', action='store_true',
+                        help='copy large files through Python buffers instead of sendfile()')
+    parser.add_argument('--single-threaded', action='store_true',
+                        help='use the original one-connection-at-a-time server')
+    parser.add_argument('--live-poll', type=float, default=LIVE_POLL_INTERVAL,
+                        help='seconds between checks for rows appended to the datasets')
+    parser.add_argument('--live-ticks', type=float, default=0, metavar='SECONDS',
+                        help='publish synthetic rows to /api/live every SECONDS (default: off)')
+    parser.add_argument('--live-tick-rows', type=int, default=1,
+                        help='synthetic rows per entity in each tick')
+    parser.add_argument('--live-max-clients', type=int, default=LIVE_MAX_CLIENTS,
+                        help='event stream subscribers admitted before answering 503')
+    return parser.parse_args(argv)
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The project root, or the tree PORTFOLIO_ROOT names (see portfolio/__init__.py)
+    os.chdir(PROJECT_ROOT)
+
+    MyHTTPRequestHandler.file_cache = FileCache(max_bytes=int(args.cache_mb * 2**20),
+                                                max_file_bytes=int(args.cache_file_mb * 2**20))
+    MyHTTPRequestHandler.use_sendfile = MyHTTPRequestHandler.use_sendfile and not args.no_sendfile
+    MyHTTPRequestHandler.compression_cache = CompressionCache(
+        max_bytes=int(args.compress_cache_mb * 2**20))
+
+    if args.single_threaded:
+        httpd = http.server.HTTPServer((args.bind, args.port), SingleThreadedHTTPRequestHandler)
+        mode = "single-threaded (HTTP/1.0)"
+    else:
+        MyHTTPRequestHandler.timeout = args.keepalive_timeout
+        httpd = PooledHTTPServer((args.bind, args.port), MyHTTPRequestHandler,
+                                 workers=args.workers,
+                                 max_connections=args.max_connections)
+        mode = f"{args.workers} workers, {args.max_connections} max connections, keep-alive"
+        MyHTTPRequestHandler.live_feed = LiveFeed(max_clients=args.live_max_clients)
+        live = [Tailer(MyHTTPRequestHandler.live_feed, MyHTTPRequestHandler.dataset_catalog,
+                       args.live_poll).start()]
+        if args.live_ticks:
+            live.append(TickGenerator(MyHTTPRequestHandler.live_feed,
+                                      MyHTTPRequestHandler.dataset_catalog, args.live_ticks,
+                                      args.live_tick_rows).start())
+            mode += f", synthetic live ticks every {args.live_ticks:g}s"
+
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    print(f"=" * 60)
+    print(f"Data Visualization Portfolio Server")
+    print(f"=" * 60)
+    print(f"Serving at: http://localhost:{args.port}")
+    print(f"Main site: http://localhost:{args.port}/site/")
+    print(f"Visualizations accessible at /visualizations/")
+    print(f"Mode: {mode}")
+    print(f"=" * 60)
+    print(f"Press CTRL+C to stop")
+    print(f"=" * 60)
+
+    try:
         httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        if isinstance(httpd, PooledHTTPServer):
+            for thread in live:
+                thread.stop()
+            MyHTTPRequestHandler.live_feed.close()
+            httpd.drain(timeout=args.shutdown_grace)
+        httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()